@@ -0,0 +1,87 @@
+'''Benchmark of the tokenization of the local (UniEval) factual_consistency
+inputs on the QAGS datasets. It compares tokenizing the full input once per
+generated sentence with tokenizing each unique source once and concatenating
+the cached token IDs, and checks that both give the same inputs.
+
+Run from the repository root:
+
+    python benchmarking/factual_consistency_tokenization.py
+'''
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+
+import nltk
+
+from langcheck.metrics.scorer.unieval_models import \
+    UniEvalFactualConsistencyScorer
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+
+def _tokenize_per_sentence(tokenizer, gen_sentences: list[str],
+                           sources: list[str]) -> list[list[int]]:
+    '''Tokenizes the full input of every generated sentence, which is how the
+    inputs used to be built.
+    '''
+    return [
+        tokenizer(
+            'question: Is this claim consistent with the document? </s> '
+            f'claim: {gen} </s> document: {src}',
+            truncation=True)['input_ids']
+        for gen, src in zip(gen_sentences, sources)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--datasets',
+                        nargs='+',
+                        default=['qags_xsum.json', 'qags_cnndm.json'])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    try:
+        nltk.data.find('tokenizers/punkt')
+    except LookupError:
+        nltk.download('punkt')
+    scorer = UniEvalFactualConsistencyScorer(language='en')
+    tokenizer = scorer.tokenizer
+
+    def _tokenize_cached_sources(tokenizer, gen_sentences: list[str],
+                                 sources: list[str]) -> list[list[int]]:
+        input_ids_list, _ = scorer._tokenize(list(zip(gen_sentences, sources)))
+        return input_ids_list
+
+    for dataset in args.datasets:
+        with open(os.path.join(DATA_DIR, dataset)) as f:
+            data = json.load(f)
+        gen_sentences, sources = [], []
+        for item in data:
+            sentences = nltk.tokenize.sent_tokenize(item['system_output'])
+            gen_sentences += sentences
+            sources += [item['source']] * len(sentences)
+
+        timings = {}
+        results = {}
+        for name, tokenize in [('per sentence', _tokenize_per_sentence),
+                               ('cached sources', _tokenize_cached_sources)]:
+            start_time = time.perf_counter()
+            for _ in range(args.repeat):
+                results[name] = tokenize(tokenizer, gen_sentences, sources)
+            timings[name] = (time.perf_counter() - start_time) / args.repeat
+
+        assert results['per sentence'] == results['cached sources']
+        print(f'{dataset}: {len(data)} outputs, {len(gen_sentences)} '
+              f'sentences, {len(set(sources))} unique sources')
+        for name, timing in timings.items():
+            print(f'  {name:<15} {timing:.3f}s')
+        print(f'  speedup         '
+              f'{timings["per sentence"] / timings["cached sources"]:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+'''Load test of OpenAICompatibleEvalClient against a local mock server.
+
+Run from the repository root:
+
+    python benchmarking/openai_compatible_load_test.py --num-outputs 200 \
+        --delay 0.05 --max-concurrency 1 8 32
+'''
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from langcheck.metrics.en import fluency  # noqa: E402
+from langcheck.metrics.eval_clients import \
+    OpenAICompatibleEvalClient  # noqa: E402
+from tests.utils import MockOpenAIServer  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--num-outputs', type=int, default=200)
+    parser.add_argument('--delay',
+                        type=float,
+                        default=0.05,
+                        help='Simulated latency of each request in seconds.')
+    parser.add_argument('--max-concurrency',
+                        type=int,
+                        nargs='+',
+                        default=[1, 8, 32])
+    args = parser.parse_args()
+
+    outputs = [f'Output number {i}.' for i in range(args.num_outputs)]
+    print('concurrency  wall time (s)  requests/s  p50 (s)  p99 (s)  '
+          'connections')
+    for max_concurrency in args.max_concurrency:
+        with MockOpenAIServer(delay=args.delay) as server:
+            client = OpenAICompatibleEvalClient(server.base_url,
+                                                'mock-model',
+                                                max_concurrency=max_concurrency)
+            start_time = time.perf_counter()
+            metric_value = fluency(outputs, eval_model=client)
+            wall_time = time.perf_counter() - start_time
+            stats = metric_value.eval_client_stats
+            assert stats is not None
+            print(f'{max_concurrency:>11}  {wall_time:>13.2f}  '
+                  f'{stats.num_requests / wall_time:>10.1f}  '
+                  f'{stats.p50_latency:>7.3f}  {stats.p99_latency:>7.3f}  '
+                  f'{server.num_connections:>11}')
+
+
+if __name__ == '__main__':
+    main()
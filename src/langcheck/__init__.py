@@ -1,3 +1,4 @@
 from langcheck import augment, metrics, plot, utils
+from langcheck.profiling import profile
 
-__all__ = ['augment', 'metrics', 'plot', 'utils']
+__all__ = ['augment', 'metrics', 'plot', 'profile', 'utils']
@@ -1,4 +1,5 @@
 from langcheck.metrics import en, eval_clients
+from langcheck.metrics._deadline import deadline
 from langcheck.metrics.en.pairwise_text_quality import pairwise_comparison
 from langcheck.metrics.en.reference_based_text_quality import (
     rouge1, rouge2, rougeL, semantic_similarity)
@@ -7,12 +8,18 @@ from langcheck.metrics.en.reference_free_text_quality import (
     flesch_reading_ease, fluency, sentiment, toxicity)
 from langcheck.metrics.en.source_based_text_quality import (context_relevance,
                                                             factual_consistency)
+from langcheck.metrics.lazy_metric_value import lazy
+from langcheck.metrics.metric_report import MetricReport
+from langcheck.metrics.metric_summary import MetricSummary
 from langcheck.metrics.metric_value import MetricValue
-from langcheck.metrics.reference_based_text_quality import exact_match
+from langcheck.metrics.readability import readability
+from langcheck.metrics.reference_based_text_quality import (exact_match, rouge,
+                                                            rouge_corpus)
 from langcheck.metrics.text_structure import (contains_all_strings,
                                               contains_any_strings,
                                               contains_regex, is_float, is_int,
                                               is_json_array, is_json_object,
+                                              matches_json_schema,
                                               matches_regex, validation_fn)
 
 __all__ = [
@@ -22,6 +29,9 @@ __all__ = [
     'contains_any_strings',
     'contains_regex',
     'context_relevance',
+    'deadline',
+    'MetricReport',
+    'MetricSummary',
     'MetricValue',
     'en',
     'eval_clients',
@@ -34,8 +44,13 @@ __all__ = [
     'is_int',
     'is_json_array',
     'is_json_object',
+    'lazy',
+    'matches_json_schema',
     'matches_regex',
     'pairwise_comparison',
+    'readability',
+    'rouge',
+    'rouge_corpus',
     'rouge1',
     'rouge2',
     'rougeL',
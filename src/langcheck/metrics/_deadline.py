@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import (Any, Callable, Iterator, List, Optional, Sequence, TypeVar,
+                    cast)
+
+from langcheck.metrics.metric_value import MetricValue
+
+_MetricFunction = TypeVar('_MetricFunction', bound=Callable[..., MetricValue])
+
+# The time.monotonic() value at which the active deadline expires, or None if
+# there is no deadline
+_active_deadline: ContextVar[Optional[float]] = ContextVar('_active_deadline',
+                                                           default=None)
+
+# The timed-out flags recorded in the innermost collector, one list per
+# recorded call. None if no collector is active.
+_active_records: ContextVar[Optional[List[List[bool]]]] = ContextVar(
+    '_active_records', default=None)
+
+
+class DeadlineExceeded(Exception):
+    '''Returned (not raised) in place of a result that could not be computed
+    before the deadline.
+    '''
+
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[None]:
+    '''Context manager that bounds the runtime of the metric calls within the
+    context. Once the time budget runs out, the pending EvalClient requests and
+    scorer batches are cancelled and the metric functions return a partial
+    :class:`~langcheck.metrics.metric_value.MetricValue`. The rows that did not
+    finish have a value of `None` and are marked in its ``timed_out`` list,
+    which tells them apart from the rows that failed to be evaluated.
+
+    Requests that are already in flight are sent with the remaining time as
+    their timeout, but local model batches that already started run to
+    completion, so the deadline can be overrun by up to one batch.
+
+    Example:
+        >>> with deadline(60):
+        ...     toxicity_value = toxicity(outputs, eval_model=eval_client)
+        >>> toxicity_value.timed_out
+
+    Args:
+        seconds: The time budget in seconds. Nested deadlines cannot extend
+            the deadline of an outer context.
+    '''
+    expires_at = time.monotonic() + seconds
+    outer_deadline = _active_deadline.get()
+    if outer_deadline is not None:
+        expires_at = min(expires_at, outer_deadline)
+    token = _active_deadline.set(expires_at)
+    try:
+        yield
+    finally:
+        _active_deadline.reset(token)
+
+
+def time_remaining() -> Optional[float]:
+    '''Returns the number of seconds left before the active deadline (never
+    negative), or None if there is no deadline.
+    '''
+    expires_at = _active_deadline.get()
+    if expires_at is None:
+        return None
+    return max(expires_at - time.monotonic(), 0.0)
+
+
+def deadline_exceeded() -> bool:
+    '''Returns True if the active deadline has passed.'''
+    return time_remaining() == 0.0
+
+
+def record_timed_out(timed_out: List[bool]) -> None:
+    '''Records which of the results of one call timed out, if the call is made
+    within :func:`collect_timed_out`.
+    '''
+    records = _active_records.get()
+    if records is not None:
+        records.append(timed_out)
+
+
+@contextmanager
+def collect_timed_out() -> Iterator[List[List[bool]]]:
+    '''Context manager that collects the timed-out flags recorded within the
+    context. The records are not passed on to the outer collectors, so the
+    caller needs to record its own (re-aligned) flags.
+    '''
+    records: List[List[bool]] = []
+    token = _active_records.set(records)
+    try:
+        yield records
+    finally:
+        _active_records.reset(token)
+
+
+def merge_timed_out(records: List[List[bool]],
+                    results: Sequence[Any]) -> Optional[List[bool]]:
+    '''Merges the collected timed-out flags into one flag per result. Records
+    that are aligned with the results are combined element-wise. If a record
+    cannot be aligned, every result that is missing (None) is considered
+    timed out.
+
+    Returns:
+        A list of flags, or None if nothing timed out.
+    '''
+    if not any(any(record) for record in records):
+        return None
+    if any(any(record) and len(record) != len(results) for record in records):
+        return [result is None for result in results]
+    timed_out = [False] * len(results)
+    for record in records:
+        timed_out = [x or y for x, y in zip(timed_out, record)]
+    return timed_out
+
+
+def attach_timed_out(metric_fn: _MetricFunction) -> _MetricFunction:
+    '''Decorator for metric functions that marks the rows of the returned
+    MetricValue that timed out because of :func:`deadline`.
+    '''
+
+    @functools.wraps(metric_fn)
+    def wrapper(*args: Any, **kwargs: Any) -> MetricValue:
+        with collect_timed_out() as records:
+            metric_value = metric_fn(*args, **kwargs)
+        timed_out = merge_timed_out(records, metric_value.metric_values)
+        if timed_out is not None:
+            metric_value.timed_out = timed_out
+            # Let the outer metric function (if any) know about the rows
+            record_timed_out(timed_out)
+        return metric_value
+
+    return cast(_MetricFunction, wrapper)
@@ -0,0 +1,663 @@
+from __future__ import annotations
+
+import json
+import math
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+# The Python types of the JSON types, for the "type" keyword. Booleans and
+# non-integral floats are excluded from "number" and "integer" separately.
+_PYTHON_TYPES: Dict[str, Tuple[type, ...]] = {
+    'null': (type(None),),
+    'boolean': (bool,),
+    'object': (dict,),
+    'array': (list,),
+    'string': (str,),
+    'number': (int, float),
+    'integer': (int, float),
+}
+
+
+class SchemaError(Exception):
+    '''The first error found when validating a JSON value against a schema.
+    The path is built from the innermost value outwards while the error
+    propagates, so that no path is built for valid values.
+    '''
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message = message
+        self.reversed_path: List[str | int] = []
+
+    @property
+    def path(self) -> str:
+        '''The location of the failing value as a JSONPath, e.g.
+        `$.items[0].name`.
+        '''
+        path = '$'
+        for key in reversed(self.reversed_path):
+            if isinstance(key, int):
+                path += f'[{key}]'
+            elif re.fullmatch(r'[A-Za-z_][A-Za-z0-9_]*', key):
+                path += f'.{key}'
+            else:
+                path += f'[{json.dumps(key, ensure_ascii=False)}]'
+        return path
+
+
+# A compiled schema, which raises a SchemaError if the value is invalid
+_Validator = Callable[[Any], None]
+
+# The keywords that constrain the values but are not implemented. A schema with
+# them is rejected instead of silently accepting the values they would reject.
+_UNSUPPORTED_KEYWORDS = [
+    'unevaluatedProperties', 'unevaluatedItems', '$dynamicRef', '$recursiveRef'
+]
+
+
+def _json_equal(value1: Any, value2: Any) -> bool:
+    '''Compare two JSON values, where booleans are not equal to numbers.
+    '''
+    if isinstance(value1, bool) or isinstance(value2, bool):
+        return type(value1) is type(value2) and value1 == value2
+    if isinstance(value1, list) and isinstance(value2, list):
+        return len(value1) == len(value2) and all(
+            _json_equal(item1, item2) for item1, item2 in zip(value1, value2))
+    if isinstance(value1, dict) and isinstance(value2, dict):
+        return value1.keys() == value2.keys() and all(
+            _json_equal(value1[key], value2[key]) for key in value1)
+    return value1 == value2
+
+
+def _describe(value: Any) -> str:
+    '''Describe a value in an error message, without dumping large values.
+    '''
+    if isinstance(value, dict):
+        return 'an object'
+    if isinstance(value, list):
+        return 'an array'
+    text = json.dumps(value, ensure_ascii=False)
+    return text if len(text) <= 50 else text[:47] + '...'
+
+
+class _SchemaCompiler:
+    '''Compiles a JSON Schema into nested validator functions. The local
+    references (e.g. `{"$ref": "#/$defs/item"}`) are resolved against the root
+    schema, and each referenced schema is compiled once, which also supports
+    recursive schemas.
+    '''
+
+    def __init__(self, root_schema: Any):
+        self.root_schema = root_schema
+        self.ref_validators: Dict[str, _Validator] = {}
+
+    def compile(self, schema: Any) -> _Validator:
+        if schema is True or schema == {}:
+            return lambda value: None
+        if schema is False:
+
+            def _reject(value: Any) -> None:
+                raise SchemaError('No value is allowed here')
+
+            return _reject
+        if not isinstance(schema, dict):
+            raise ValueError(f'Invalid schema: {schema!r}')
+        for keyword in _UNSUPPORTED_KEYWORDS:
+            if keyword in schema:
+                raise ValueError(f'Unsupported keyword in schema: {keyword}')
+
+        checks: List[_Validator] = []
+        used_compilers = set()
+        for keyword, compile_keyword in _KEYWORD_COMPILERS:
+            if keyword in schema and compile_keyword not in used_compilers:
+                used_compilers.add(compile_keyword)
+                checks.append(compile_keyword(self, schema))
+        if '$ref' in schema:
+            checks.append(self._compile_ref(schema['$ref']))
+
+        if len(checks) == 1:
+            return checks[0]
+
+        def _validate(value: Any) -> None:
+            for check in checks:
+                check(value)
+
+        return _validate
+
+    def _compile_ref(self, ref: str) -> _Validator:
+        if not ref.startswith('#'):
+            raise ValueError(f'Only local references are supported: {ref}')
+        if ref not in self.ref_validators:
+            # Register a forwarding validator first, so that a recursive
+            # reference to this schema compiles to it
+            compiled: List[_Validator] = []
+            self.ref_validators[ref] = lambda value: compiled[0](value)
+            target = self.root_schema
+            for part in ref[1:].split('/')[1:]:
+                part = part.replace('~1', '/').replace('~0', '~')
+                try:
+                    if isinstance(target, list):
+                        target = target[int(part)]
+                    else:
+                        target = target[part]
+                except (KeyError, IndexError, ValueError, TypeError):
+                    raise ValueError(f'Unresolvable reference: {ref}')
+            compiled.append(self.compile(target))
+        return self.ref_validators[ref]
+
+    ############################################################################
+    # Keywords for any type
+    ############################################################################
+
+    def _type(self, schema: Dict[str, Any]) -> _Validator:
+        types = schema['type']
+        types = [types] if isinstance(types, str) else list(types)
+        for type_name in types:
+            if type_name not in _PYTHON_TYPES:
+                raise ValueError(f'Invalid type in schema: {type_name}')
+        python_types = tuple(python_type for type_name in types
+                             for python_type in _PYTHON_TYPES[type_name])
+        is_numeric = 'number' in types or 'integer' in types
+        reject_bool = is_numeric and 'boolean' not in types
+        integer_only = 'integer' in types and 'number' not in types
+        expected = ' or '.join(types)
+
+        def _validate(value: Any) -> None:
+            if isinstance(value, python_types) and not (
+                    reject_bool and value.__class__ is bool) and not (
+                        integer_only and value.__class__ is float and
+                        not value.is_integer()):
+                return
+            raise SchemaError(f'{_describe(value)} is not of type {expected}')
+
+        return _validate
+
+    def _enum(self, schema: Dict[str, Any]) -> _Validator:
+        options = schema['enum']
+
+        def _validate(value: Any) -> None:
+            if not any(_json_equal(value, option) for option in options):
+                raise SchemaError(f'{_describe(value)} is not one of '
+                                  f'{json.dumps(options, ensure_ascii=False)}')
+
+        return _validate
+
+    def _const(self, schema: Dict[str, Any]) -> _Validator:
+        const = schema['const']
+
+        def _validate(value: Any) -> None:
+            if not _json_equal(value, const):
+                raise SchemaError(f'{_describe(value)} is not '
+                                  f'{json.dumps(const, ensure_ascii=False)}')
+
+        return _validate
+
+    def _all_of(self, schema: Dict[str, Any]) -> _Validator:
+        validators = [self.compile(subschema) for subschema in schema['allOf']]
+
+        def _validate(value: Any) -> None:
+            for validator in validators:
+                validator(value)
+
+        return _validate
+
+    def _any_of(self, schema: Dict[str, Any]) -> _Validator:
+        validators = [self.compile(subschema) for subschema in schema['anyOf']]
+
+        def _validate(value: Any) -> None:
+            for validator in validators:
+                try:
+                    validator(value)
+                    return
+                except SchemaError:
+                    pass
+            raise SchemaError(f'{_describe(value)} does not match any of the '
+                              'schemas in anyOf')
+
+        return _validate
+
+    def _one_of(self, schema: Dict[str, Any]) -> _Validator:
+        validators = [self.compile(subschema) for subschema in schema['oneOf']]
+
+        def _validate(value: Any) -> None:
+            num_matches = 0
+            for validator in validators:
+                try:
+                    validator(value)
+                    num_matches += 1
+                except SchemaError:
+                    pass
+            if num_matches != 1:
+                raise SchemaError(f'{_describe(value)} matches {num_matches} '
+                                  'of the schemas in oneOf instead of one')
+
+        return _validate
+
+    def _not(self, schema: Dict[str, Any]) -> _Validator:
+        validator = self.compile(schema['not'])
+
+        def _validate(value: Any) -> None:
+            try:
+                validator(value)
+            except SchemaError:
+                return
+            raise SchemaError(f'{_describe(value)} should not match the schema '
+                              'in not')
+
+        return _validate
+
+    def _if(self, schema: Dict[str, Any]) -> _Validator:
+        if_validator = self.compile(schema['if'])
+        then_validator = self.compile(schema.get('then', True))
+        else_validator = self.compile(schema.get('else', True))
+
+        def _validate(value: Any) -> None:
+            try:
+                if_validator(value)
+            except SchemaError:
+                else_validator(value)
+            else:
+                then_validator(value)
+
+        return _validate
+
+    ############################################################################
+    # Keywords for objects
+    ############################################################################
+
+    def _properties(self, schema: Dict[str, Any]) -> _Validator:
+        '''Compiles "properties", "patternProperties", and
+        "additionalProperties" together, since the additional properties are
+        the ones that match neither of the others.
+        '''
+        property_validators = {
+            key: self.compile(subschema)
+            for key, subschema in schema.get('properties', {}).items()
+        }
+        pattern_validators = [(re.compile(pattern), self.compile(subschema))
+                              for pattern, subschema in schema.get(
+                                  'patternProperties', {}).items()]
+        additional_schema = schema.get('additionalProperties', True)
+        additional_validator = (None if additional_schema is True else
+                                self.compile(additional_schema))
+
+        def _validate(value: Any) -> None:
+            if not isinstance(value, dict):
+                return
+            for key, item in value.items():
+                matched = False
+                try:
+                    if key in property_validators:
+                        matched = True
+                        property_validators[key](item)
+                    for pattern, validator in pattern_validators:
+                        if pattern.search(key):
+                            matched = True
+                            validator(item)
+                    if not matched and additional_validator is not None:
+                        if additional_schema is False:
+                            raise SchemaError(
+                                'Additional properties are not allowed')
+                        additional_validator(item)
+                except SchemaError as error:
+                    error.reversed_path.append(key)
+                    raise
+
+        return _validate
+
+    def _required(self, schema: Dict[str, Any]) -> _Validator:
+        required = schema['required']
+
+        def _validate(value: Any) -> None:
+            if not isinstance(value, dict):
+                return
+            for key in required:
+                if key not in value:
+                    raise SchemaError(f'"{key}" is a required property')
+
+        return _validate
+
+    def _property_names(self, schema: Dict[str, Any]) -> _Validator:
+        validator = self.compile(schema['propertyNames'])
+
+        def _validate(value: Any) -> None:
+            if not isinstance(value, dict):
+                return
+            for key in value:
+                try:
+                    validator(key)
+                except SchemaError as error:
+                    raise SchemaError(f'Invalid property name: {error.message}')
+
+        return _validate
+
+    def _dependencies(self, schema: Dict[str, Any]) -> _Validator:
+        '''Compiles "dependentRequired", "dependentSchemas", and
+        "dependencies" together. Each dependency in "dependencies" (from the
+        drafts before 2019-09) is either an array of required properties or a
+        schema.
+        '''
+        dependent_required = dict(schema.get('dependentRequired', {}))
+        dependent_schemas = dict(schema.get('dependentSchemas', {}))
+        for key, dependency in schema.get('dependencies', {}).items():
+            if isinstance(dependency, list):
+                dependent_required[key] = dependency
+            else:
+                dependent_schemas[key] = dependency
+        dependent_validators = {
+            key: self.compile(subschema)
+            for key, subschema in dependent_schemas.items()
+        }
+
+        def _validate(value: Any) -> None:
+            if not isinstance(value, dict):
+                return
+            for key, required in dependent_required.items():
+                if key not in value:
+                    continue
+                for required_key in required:
+                    if required_key not in value:
+                        raise SchemaError(f'"{required_key}" is a required '
+                                          f'property when "{key}" is present')
+            for key, validator in dependent_validators.items():
+                if key in value:
+                    validator(value)
+
+        return _validate
+
+    def _property_count(self, schema: Dict[str, Any]) -> _Validator:
+        min_properties = schema.get('minProperties', 0)
+        max_properties = schema.get('maxProperties', math.inf)
+
+        def _validate(value: Any) -> None:
+            if not isinstance(value, dict):
+                return
+            if len(value) < min_properties:
+                raise SchemaError(f'The object has fewer than {min_properties}'
+                                  ' properties')
+            if len(value) > max_properties:
+                raise SchemaError(f'The object has more than {max_properties} '
+                                  'properties')
+
+        return _validate
+
+    ############################################################################
+    # Keywords for arrays
+    ############################################################################
+
+    def _items(self, schema: Dict[str, Any]) -> _Validator:
+        '''Compiles "prefixItems" and "items" together. An array of schemas in
+        "items" (from the drafts before 2020-12) is treated as "prefixItems",
+        and "additionalItems" as "items" in that case.
+        '''
+        prefix_schemas = schema.get('prefixItems', [])
+        items_schema = schema.get('items', True)
+        if isinstance(items_schema, list):
+            prefix_schemas = items_schema
+            items_schema = schema.get('additionalItems', True)
+        prefix_validators = [
+            self.compile(subschema) for subschema in prefix_schemas
+        ]
+        items_validator = self.compile(items_schema)
+
+        def _validate(value: Any) -> None:
+            if not isinstance(value, list):
+                return
+            for i, item in enumerate(value):
+                try:
+                    if i < len(prefix_validators):
+                        prefix_validators[i](item)
+                    else:
+                        items_validator(item)
+                except SchemaError as error:
+                    error.reversed_path.append(i)
+                    raise
+
+        return _validate
+
+    def _item_count(self, schema: Dict[str, Any]) -> _Validator:
+        min_items = schema.get('minItems', 0)
+        max_items = schema.get('maxItems', math.inf)
+
+        def _validate(value: Any) -> None:
+            if not isinstance(value, list):
+                return
+            if len(value) < min_items:
+                raise SchemaError(f'The array has fewer than {min_items} items')
+            if len(value) > max_items:
+                raise SchemaError(f'The array has more than {max_items} items')
+
+        return _validate
+
+    def _contains(self, schema: Dict[str, Any]) -> _Validator:
+        '''Compiles "contains" with "minContains" and "maxContains", which
+        have no effect without it.
+        '''
+        validator = self.compile(schema['contains'])
+        min_contains = schema.get('minContains', 1)
+        max_contains = schema.get('maxContains', math.inf)
+
+        def _validate(value: Any) -> None:
+            if not isinstance(value, list):
+                return
+            num_matches = 0
+            for item in value:
+                try:
+                    validator(item)
+                    num_matches += 1
+                except SchemaError:
+                    pass
+            if num_matches < min_contains:
+                raise SchemaError(f'The array has fewer than {min_contains} '
+                                  'items matching the schema in contains')
+            if num_matches > max_contains:
+                raise SchemaError(f'The array has more than {max_contains} '
+                                  'items matching the schema in contains')
+
+        return _validate
+
+    def _unique_items(self, schema: Dict[str, Any]) -> _Validator:
+        if not schema['uniqueItems']:
+            return lambda value: None
+
+        def _validate(value: Any) -> None:
+            if not isinstance(value, list):
+                return
+            for i in range(len(value)):
+                for j in range(i):
+                    if _json_equal(value[i], value[j]):
+                        raise SchemaError(f'The items {j} and {i} are not '
+                                          'unique')
+
+        return _validate
+
+    ############################################################################
+    # Keywords for strings and numbers
+    ############################################################################
+
+    def _string_length(self, schema: Dict[str, Any]) -> _Validator:
+        min_length = schema.get('minLength', 0)
+        max_length = schema.get('maxLength', math.inf)
+
+        def _validate(value: Any) -> None:
+            if not isinstance(value, str):
+                return
+            if len(value) < min_length:
+                raise SchemaError(f'{_describe(value)} is shorter than '
+                                  f'{min_length} characters')
+            if len(value) > max_length:
+                raise SchemaError(f'{_describe(value)} is longer than '
+                                  f'{max_length} characters')
+
+        return _validate
+
+    def _pattern(self, schema: Dict[str, Any]) -> _Validator:
+        pattern = re.compile(schema['pattern'])
+
+        def _validate(value: Any) -> None:
+            if isinstance(value, str) and not pattern.search(value):
+                raise SchemaError(f'{_describe(value)} does not match '
+                                  f'{json.dumps(pattern.pattern)}')
+
+        return _validate
+
+    def _number_range(self, schema: Dict[str, Any]) -> _Validator:
+        minimum = schema.get('minimum', -math.inf)
+        maximum = schema.get('maximum', math.inf)
+        exclusive_minimum = schema.get('exclusiveMinimum', -math.inf)
+        exclusive_maximum = schema.get('exclusiveMaximum', math.inf)
+        # In draft 4, "exclusiveMinimum" and "exclusiveMaximum" are booleans
+        # that make "minimum" and "maximum" exclusive
+        if isinstance(exclusive_minimum, bool):
+            if exclusive_minimum:
+                exclusive_minimum, minimum = minimum, -math.inf
+            else:
+                exclusive_minimum = -math.inf
+        if isinstance(exclusive_maximum, bool):
+            if exclusive_maximum:
+                exclusive_maximum, maximum = maximum, math.inf
+            else:
+                exclusive_maximum = math.inf
+        multiple_of = schema.get('multipleOf')
+
+        def _validate(value: Any) -> None:
+            if not _is_number(value):
+                return
+            if value < minimum:
+                raise SchemaError(f'{value} is less than the minimum of '
+                                  f'{minimum}')
+            if value > maximum:
+                raise SchemaError(f'{value} is greater than the maximum of '
+                                  f'{maximum}')
+            if value <= exclusive_minimum:
+                raise SchemaError(f'{value} is less than or equal to the '
+                                  f'exclusive minimum of {exclusive_minimum}')
+            if value >= exclusive_maximum:
+                raise SchemaError(f'{value} is greater than or equal to the '
+                                  f'exclusive maximum of {exclusive_maximum}')
+            if multiple_of is not None:
+                quotient = value / multiple_of
+                if not (math.isfinite(quotient) and quotient.is_integer()):
+                    raise SchemaError(f'{value} is not a multiple of '
+                                      f'{multiple_of}')
+
+        return _validate
+
+
+_KeywordCompiler = Callable[[_SchemaCompiler, Dict[str, Any]], _Validator]
+
+# The keywords that start the compilation of a check, in the order the checks
+# run. Keywords that are compiled together (e.g. "properties" and
+# "additionalProperties") are listed once.
+_KEYWORD_COMPILERS: List[Tuple[str, _KeywordCompiler]] = [
+    ('type', _SchemaCompiler._type),
+    ('enum', _SchemaCompiler._enum),
+    ('const', _SchemaCompiler._const),
+    ('required', _SchemaCompiler._required),
+    ('minProperties', _SchemaCompiler._property_count),
+    ('maxProperties', _SchemaCompiler._property_count),
+    ('dependentRequired', _SchemaCompiler._dependencies),
+    ('dependentSchemas', _SchemaCompiler._dependencies),
+    ('dependencies', _SchemaCompiler._dependencies),
+    ('minItems', _SchemaCompiler._item_count),
+    ('maxItems', _SchemaCompiler._item_count),
+    ('uniqueItems', _SchemaCompiler._unique_items),
+    ('contains', _SchemaCompiler._contains),
+    ('minLength', _SchemaCompiler._string_length),
+    ('maxLength', _SchemaCompiler._string_length),
+    ('pattern', _SchemaCompiler._pattern),
+    ('minimum', _SchemaCompiler._number_range),
+    ('maximum', _SchemaCompiler._number_range),
+    ('exclusiveMinimum', _SchemaCompiler._number_range),
+    ('exclusiveMaximum', _SchemaCompiler._number_range),
+    ('multipleOf', _SchemaCompiler._number_range),
+    ('properties', _SchemaCompiler._properties),
+    ('patternProperties', _SchemaCompiler._properties),
+    ('additionalProperties', _SchemaCompiler._properties),
+    ('propertyNames', _SchemaCompiler._property_names),
+    ('prefixItems', _SchemaCompiler._items),
+    ('items', _SchemaCompiler._items),
+    ('allOf', _SchemaCompiler._all_of),
+    ('anyOf', _SchemaCompiler._any_of),
+    ('oneOf', _SchemaCompiler._one_of),
+    ('not', _SchemaCompiler._not),
+    ('if', _SchemaCompiler._if),
+]
+
+
+def _loads(text: str) -> Any:
+    '''Parse a JSON text with orjson if it is installed, which is much faster
+    than the json module on large texts. orjson is stricter than the json
+    module (e.g. it rejects NaN and integers over 64 bits), so the texts that
+    it rejects are parsed again with the json module.
+    '''
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(text)
+
+
+class JsonSchemaValidator:
+    '''Validates JSON texts against a JSON Schema that is compiled once.
+
+    The supported keywords are the validation keywords of JSON Schema (type,
+    enum, const, the object, array, string, and number constraints, including
+    the draft-4 boolean exclusiveMinimum and exclusiveMaximum), the
+    applicators (properties, patternProperties, additionalProperties,
+    propertyNames, dependentSchemas, dependencies, prefixItems, items,
+    additionalItems, contains, allOf, anyOf, oneOf, not, and if/then/else),
+    and local references ($ref). A schema with unevaluatedProperties,
+    unevaluatedItems, $dynamicRef, or $recursiveRef raises a ValueError.
+    Other keywords, such as "format", are ignored as annotations.
+    '''
+
+    def __init__(self, schema: Any):
+        '''
+        Compile the schema.
+
+        Args:
+            schema: The JSON Schema as a dict (or a boolean schema)
+        '''
+        self.schema = schema
+        self._validator = _SchemaCompiler(schema).compile(schema)
+
+    def validate(self, text: str) -> Optional[str]:
+        '''Return None if the text is valid JSON that matches the schema, and
+        the reason (with the path of the failing value) otherwise.
+        '''
+        try:
+            value = _loads(text)
+        except (json.JSONDecodeError, RecursionError) as error:
+            return f'Invalid JSON: {error}'
+        try:
+            self._validator(value)
+        except SchemaError as error:
+            return f'{error.path}: {error.message}'
+        except RecursionError:
+            return 'The JSON value is too deeply nested to validate'
+        return None
+
+
+@lru_cache(maxsize=32)
+def _compile_canonical_schema(canonical_schema: str) -> JsonSchemaValidator:
+    return JsonSchemaValidator(json.loads(canonical_schema))
+
+
+def compile_json_schema(schema: Any) -> JsonSchemaValidator:
+    '''Return the validator of the schema, which is compiled once and reused
+    by the calls with an equal schema.
+    '''
+    return _compile_canonical_schema(json.dumps(schema, sort_keys=True))
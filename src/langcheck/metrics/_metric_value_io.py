@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from langcheck.metrics.eval_clients._stats import EvalClientStats, RequestStats
+from langcheck.metrics.metric_value import (MetricValue,
+                                            MetricValueWithThreshold, _LazyList)
+
+# The key of the langcheck metadata in the schema of the saved table
+_METADATA_KEY = b'langcheck'
+_FORMAT_VERSION = 1
+
+
+def _import_pyarrow() -> Any:
+    try:
+        import pyarrow  # type: ignore[reportMissingImports]
+    except ModuleNotFoundError:
+        raise ModuleNotFoundError(
+            "No module named 'pyarrow'.\n"
+            "Since saving and loading MetricValues is an optional feature, "
+            "'pyarrow' is not installed by default along with langcheck. "
+            "Please run `pip install langcheck[arrow]`.")
+    return pyarrow
+
+
+class _ArrowList(_LazyList):
+    '''A column of a loaded file, which is converted to a list only when the
+    field of the MetricValue is accessed.
+    '''
+
+    def __init__(self, column: Any) -> None:
+        super().__init__()
+        self.column = column
+
+    def __len__(self) -> int:
+        return len(self.column)
+
+    def _to_list(self) -> list:
+        return self.column.to_pylist()
+
+    def to_series(self) -> Any:
+        return self.column.to_pandas()
+
+
+def _infer_format(path: str, format: Optional[str]) -> str:
+    if format is None:
+        format = 'parquet' if path.endswith('.parquet') else 'arrow'
+    if format not in ('arrow', 'parquet'):
+        raise ValueError(
+            f'Unsupported format: {format}. It should be "arrow" or '
+            '"parquet".')
+    return format
+
+
+def save_metric_value(metric_value: MetricValue,
+                      path: str,
+                      format: Optional[str] = None) -> None:
+    '''Save a MetricValue (with its threshold, if any) to an Arrow IPC or a
+    Parquet file. Each list is one column, and the fields that are None are
+    left out. See :meth:`~langcheck.metrics.metric_value.MetricValue.save`.
+    '''
+    pa = _import_pyarrow()
+    format = _infer_format(path, format)
+
+    columns: Dict[str, Any] = {}
+    metadata: Dict[str, Any] = {
+        'version': _FORMAT_VERSION,
+        'metric_name': metric_value.metric_name,
+        'language': metric_value.language,
+        'pairwise': metric_value.is_pairwise,
+    }
+
+    def add_column(name: str, values: Any) -> None:
+        if isinstance(values, _ArrowList):
+            columns[name] = values.column
+        elif values is not None:
+            columns[name] = pa.array(values)
+
+    # The fields are read as they are stored, so that the columns of a loaded
+    # MetricValue are saved without being converted to lists
+    stored_fields = metric_value.__dict__
+    add_column('prompt', stored_fields['prompts'])
+    if metric_value.is_pairwise:
+        generated_outputs_a, generated_outputs_b = stored_fields[
+            'generated_outputs']
+        add_column('generated_output_a', generated_outputs_a)
+        add_column('generated_output_b', generated_outputs_b)
+        # The sources of a pairwise metric are either None or a tuple
+        sources = stored_fields['sources']
+        metadata['pairwise_sources'] = sources is not None
+        if sources is not None:
+            add_column('source_a', sources[0])
+            add_column('source_b', sources[1])
+    else:
+        add_column('generated_output', stored_fields['generated_outputs'])
+        add_column('source', stored_fields['sources'])
+    add_column('reference_output', stored_fields['reference_outputs'])
+    add_column('explanation', stored_fields['explanations'])
+    add_column('metric_value', stored_fields['metric_values'])
+    add_column('timed_out', stored_fields.get('timed_out'))
+    add_column('latency', stored_fields.get('latencies'))
+
+    if isinstance(metric_value, MetricValueWithThreshold):
+        metadata['threshold'] = metric_value.threshold
+        metadata['threshold_op'] = metric_value.threshold_op
+    if metric_value.eval_client_stats is not None:
+        metadata['eval_client_stats'] = [
+            dataclasses.asdict(request)
+            for request in metric_value.eval_client_stats.requests
+        ]
+
+    table = pa.table(columns, metadata={_METADATA_KEY: json.dumps(metadata)})
+    if format == 'parquet':
+        import pyarrow.parquet as pq  # type: ignore[reportMissingImports]
+        pq.write_table(table, path)
+    else:
+        # Uncompressed, so that the file can be memory-mapped when loaded
+        with pa.OSFile(path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+
+def load_metric_value(path: str, format: Optional[str] = None) -> MetricValue:
+    '''Load a MetricValue saved by
+    :func:`~langcheck.metrics._metric_value_io.save_metric_value`. See
+    :meth:`~langcheck.metrics.metric_value.MetricValue.load`.
+    '''
+    pa = _import_pyarrow()
+    format = _infer_format(path, format)
+
+    if format == 'parquet':
+        import pyarrow.parquet as pq  # type: ignore[reportMissingImports]
+        table = pq.read_table(path, memory_map=True)
+    else:
+        # The buffers of the table point into the mapped file
+        table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+    schema_metadata = table.schema.metadata or {}
+    if _METADATA_KEY not in schema_metadata:
+        raise ValueError(f'{path} is not a MetricValue saved by langcheck.')
+    metadata = json.loads(schema_metadata[_METADATA_KEY])
+    if metadata['version'] > _FORMAT_VERSION:
+        raise ValueError(
+            f'{path} was saved by a newer version of langcheck (format '
+            f'version {metadata["version"]}).')
+
+    def column(name: str) -> Optional[_ArrowList]:
+        if name not in table.column_names:
+            return None
+        return _ArrowList(table.column(name))
+
+    values_column = table.column('metric_value')
+    lazy_fields: Dict[str, Any] = {
+        'metric_values': _ArrowList(values_column),
+        'prompts': column('prompt'),
+        'reference_outputs': column('reference_output'),
+        'explanations': column('explanation'),
+        'timed_out': column('timed_out'),
+        'latencies': column('latency'),
+    }
+    if metadata['pairwise']:
+        lazy_fields['generated_outputs'] = (column('generated_output_a'),
+                                            column('generated_output_b'))
+        lazy_fields['sources'] = ((column('source_a'), column('source_b'))
+                                  if metadata['pairwise_sources'] else None)
+    else:
+        lazy_fields['generated_outputs'] = column('generated_output')
+        lazy_fields['sources'] = column('source')
+
+    metric_value = MetricValue(metric_name=metadata['metric_name'],
+                               metric_values=[],
+                               prompts=None,
+                               generated_outputs=None,
+                               reference_outputs=None,
+                               sources=None,
+                               explanations=None,
+                               language=metadata['language'])
+    # The columns are converted to lists only when the fields are accessed, so
+    # that e.g. the threshold results and `to_df()` do not need the lists
+    for name, value in lazy_fields.items():
+        setattr(metric_value, name, value)
+    # The values array is read from the metric value column instead of being
+    # converted from the list. It points into the file without copying it if
+    # the values are floats (and not None) in a single chunk.
+    values = np.asarray(values_column.to_numpy(zero_copy_only=False),
+                        dtype=np.float64)
+    none_mask = values_column.is_null().to_numpy(zero_copy_only=False)
+    metric_value._set_arrays(values, none_mask)
+    if 'eval_client_stats' in metadata:
+        metric_value.eval_client_stats = EvalClientStats(requests=[
+            RequestStats(**request) for request in metadata['eval_client_stats']
+        ])
+
+    if 'threshold' in metadata:
+        return metric_value._with_threshold(metadata['threshold'],
+                                            metadata['threshold_op'])
+    return metric_value
@@ -0,0 +1,515 @@
+from __future__ import annotations
+
+import collections
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache, partial
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from nltk.stem import porter
+from rouge_score import scoring, tokenize
+from rouge_score.tokenizers import Tokenizer
+
+from langcheck.utils.progress_bar import tqdm_wrapper
+
+_NGRAM_ROUGE_TYPE_RE = re.compile(r'rouge([1-9])$')
+
+_porter_stemmer = porter.PorterStemmer()
+
+
+@lru_cache(maxsize=2**16)
+def _stem(token: str) -> str:
+    '''Porter-stems a token, memoized since the same tokens come up in most
+    texts.
+    '''
+    return _porter_stemmer.stem(token)
+
+
+class CachedStemmerTokenizer(Tokenizer):
+    '''The default tokenizer of `rouge_score` with the Porter stemmer
+    (`DefaultTokenizer(use_stemmer=True)`), except that the stem of each token
+    is memoized.
+    '''
+
+    def tokenize(self, text: str) -> List[str]:
+        text = tokenize.NON_ALPHANUM_RE.sub(' ', text.lower())
+        # Only stem words more than 3 characters long
+        tokens = [
+            _stem(token) if len(token) > 3 else token
+            for token in tokenize.SPACES_RE.split(text)
+        ]
+        return [
+            token for token in tokens if tokenize.VALID_TOKEN_RE.match(token)
+        ]
+
+
+class _TokenizedText:
+    '''The tokens of a text, as used by every ROUGE type.'''
+
+    def __init__(self, tokens: List[str], line_tokens: List[List[str]]):
+        # The tokens of the whole text, for ROUGE-N and ROUGE-L
+        self.tokens = tokens
+        # The tokens of each non-empty line, for ROUGE-Lsum
+        self.line_tokens = line_tokens
+        self._ngrams: Dict[int, collections.Counter] = {}
+
+    def ngrams(self, n: int) -> collections.Counter:
+        if n not in self._ngrams:
+            self._ngrams[n] = collections.Counter(
+                tuple(self.tokens[i:i + n])
+                for i in range(len(self.tokens) - n + 1))
+        return self._ngrams[n]
+
+
+class RougeEngine:
+    '''Computes several ROUGE types between pairs of texts in one pass. Each
+    text is tokenized once, and all the requested ROUGE-N, ROUGE-L and
+    ROUGE-Lsum scores are computed from the same tokens. The scores are
+    identical to `rouge_score.rouge_scorer.RougeScorer` with the same
+    tokenizer.
+    '''
+
+    def __init__(self, tokenizer: Optional[Tokenizer] = None):
+        '''
+        Initialize the engine.
+
+        Args:
+            tokenizer: The tokenizer used to split the texts into tokens. If
+                None, the default tokenizer of `rouge_score` with the Porter
+                stemmer is used.
+        '''
+        self.tokenizer = tokenizer or CachedStemmerTokenizer()
+
+    def score(self,
+              targets: List[str],
+              predictions: List[str],
+              rouge_types: List[str],
+              show_progress: bool = True) -> Dict[str, List[scoring.Score]]:
+        '''Computes the ROUGE scores between each target and prediction.
+
+        Args:
+            targets: The target texts
+            predictions: The predicted texts, one per target
+            rouge_types: The ROUGE types to compute, e.g. ['rouge1', 'rouge2',
+                'rougeL', 'rougeLsum']
+            show_progress: Whether to show a progress bar
+
+        Returns:
+            A dict mapping each ROUGE type to the list of scores of each pair
+        '''
+        for rouge_type in rouge_types:
+            is_lcs_type = rouge_type in ('rougeL', 'rougeLsum')
+            if not is_lcs_type and not _NGRAM_ROUGE_TYPE_RE.match(rouge_type):
+                raise ValueError(f'Invalid rouge type: {rouge_type}')
+        need_tokens = any(
+            rouge_type != 'rougeLsum' for rouge_type in rouge_types)
+        need_line_tokens = 'rougeLsum' in rouge_types
+
+        # The same texts (e.g. references) are often repeated
+        tokenized_texts: Dict[str, _TokenizedText] = {}
+
+        def _tokenized(text: str) -> _TokenizedText:
+            if text not in tokenized_texts:
+                tokenized_texts[text] = self._tokenize(text, need_tokens,
+                                                       need_line_tokens)
+            return tokenized_texts[text]
+
+        results: Dict[str, List[scoring.Score]] = {
+            rouge_type: [] for rouge_type in rouge_types
+        }
+        pairs = zip(targets, predictions)
+        if show_progress:
+            pairs = tqdm_wrapper(pairs, total=len(targets))
+        for target, prediction in pairs:
+            target_tokens = _tokenized(target)
+            prediction_tokens = _tokenized(prediction)
+            for rouge_type in rouge_types:
+                if rouge_type == 'rougeL':
+                    score = _score_lcs(target_tokens.tokens,
+                                       prediction_tokens.tokens)
+                elif rouge_type == 'rougeLsum':
+                    score = _summary_level_lcs(target_tokens.line_tokens,
+                                               prediction_tokens.line_tokens)
+                else:
+                    n = int(rouge_type[5:])
+                    score = _score_ngrams(target_tokens.ngrams(n),
+                                          prediction_tokens.ngrams(n))
+                results[rouge_type].append(score)
+        return results
+
+    def _tokenize(self, text: str, need_tokens: bool,
+                  need_line_tokens: bool) -> _TokenizedText:
+        # Sentences are separated by newlines for ROUGE-Lsum
+        lines = [line for line in text.split('\n') if len(line)]
+        line_tokens = []
+        if need_line_tokens:
+            line_tokens = [self.tokenizer.tokenize(line) for line in lines]
+        if not need_tokens:
+            tokens = []
+        elif need_line_tokens and lines == [text]:
+            tokens = line_tokens[0]
+        elif need_line_tokens and isinstance(self.tokenizer,
+                                             CachedStemmerTokenizer):
+            # Newlines are separators for this tokenizer, so the tokens of the
+            # text are the tokens of its lines
+            tokens = [token for tokens in line_tokens for token in tokens]
+        else:
+            tokens = self.tokenizer.tokenize(text)
+        return _TokenizedText(tokens, line_tokens)
+
+
+def _score_ngrams(target_ngrams: collections.Counter,
+                  prediction_ngrams: collections.Counter) -> scoring.Score:
+    intersection_ngrams_count = sum(
+        min(count, prediction_ngrams[ngram])
+        for ngram, count in target_ngrams.items())
+    target_ngrams_count = sum(target_ngrams.values())
+    prediction_ngrams_count = sum(prediction_ngrams.values())
+
+    precision = intersection_ngrams_count / max(prediction_ngrams_count, 1)
+    recall = intersection_ngrams_count / max(target_ngrams_count, 1)
+    return scoring.Score(precision=precision,
+                         recall=recall,
+                         fmeasure=scoring.fmeasure(precision, recall))
+
+
+def _lcs_length(a: List[str], b: List[str]) -> int:
+    '''Computes the length of the longest common subsequence of two token
+    lists with the bit-parallel algorithm of Hyyrö, which processes a whole
+    column of the dynamic programming table per token of `b`.
+    '''
+    match_masks: Dict[str, int] = {}
+    for i, token in enumerate(a):
+        match_masks[token] = match_masks.get(token, 0) | (1 << i)
+    all_ones = (1 << len(a)) - 1
+    v = all_ones
+    for token in b:
+        u = v & match_masks.get(token, 0)
+        v = ((v + u) | (v - u)) & all_ones
+    # int.bit_count() would need Python 3.10
+    return len(a) - bin(v).count('1')
+
+
+def _score_lcs(target_tokens: List[str],
+               prediction_tokens: List[str]) -> scoring.Score:
+    if not target_tokens or not prediction_tokens:
+        return scoring.Score(precision=0, recall=0, fmeasure=0)
+
+    lcs_length = _lcs_length(target_tokens, prediction_tokens)
+    precision = lcs_length / len(prediction_tokens)
+    recall = lcs_length / len(target_tokens)
+    return scoring.Score(precision=precision,
+                         recall=recall,
+                         fmeasure=scoring.fmeasure(precision, recall))
+
+
+def _lcs_indices(ref: List[str], can: List[str]) -> List[int]:
+    '''Returns the indices in `ref` of one of the longest common subsequences,
+    chosen in the same way as `rouge_score`.
+    '''
+    table = [[0] * (len(can) + 1) for _ in range(len(ref) + 1)]
+    for i, ref_token in enumerate(ref, 1):
+        row, prev_row = table[i], table[i - 1]
+        for j, can_token in enumerate(can, 1):
+            if ref_token == can_token:
+                row[j] = prev_row[j - 1] + 1
+            else:
+                row[j] = max(prev_row[j], row[j - 1])
+
+    i, j = len(ref), len(can)
+    indices = []
+    while i > 0 and j > 0:
+        if ref[i - 1] == can[j - 1]:
+            indices.append(i - 1)
+            i -= 1
+            j -= 1
+        elif table[i][j - 1] > table[i - 1][j]:
+            j -= 1
+        else:
+            i -= 1
+    return indices
+
+
+def _summary_level_lcs(ref_sents: List[List[str]],
+                       can_sents: List[List[str]]) -> scoring.Score:
+    '''Summary-level LCS, section 3.2 in the ROUGE paper, computed in the same
+    way as `rouge_score` (including its prevention of double counting).
+    '''
+    if not ref_sents or not can_sents:
+        return scoring.Score(precision=0, recall=0, fmeasure=0)
+
+    m = sum(map(len, ref_sents))
+    n = sum(map(len, can_sents))
+    if not n or not m:
+        return scoring.Score(precision=0, recall=0, fmeasure=0)
+
+    token_counts_ref: collections.Counter = collections.Counter()
+    token_counts_can: collections.Counter = collections.Counter()
+    for sent in ref_sents:
+        token_counts_ref.update(sent)
+    for sent in can_sents:
+        token_counts_can.update(sent)
+
+    hits = 0
+    for ref in ref_sents:
+        union_indices = set()
+        for can in can_sents:
+            union_indices.update(_lcs_indices(ref, can))
+        for token in (ref[i] for i in sorted(union_indices)):
+            if token_counts_can[token] > 0 and token_counts_ref[token] > 0:
+                hits += 1
+                token_counts_can[token] -= 1
+                token_counts_ref[token] -= 1
+
+    recall = hits / m
+    precision = hits / n
+    return scoring.Score(precision=precision,
+                         recall=recall,
+                         fmeasure=scoring.fmeasure(precision, recall))
+
+
+@dataclass
+class RougeCorpusScore:
+    '''The corpus-level aggregate of a ROUGE F1 score: its mean over all the
+    pairs, and the bootstrap confidence interval of the mean.
+    '''
+    mean: float
+    low: float
+    high: float
+    confidence_level: float
+    num_pairs: int
+
+
+@lru_cache(maxsize=None)
+def _default_engine() -> RougeEngine:
+    return RougeEngine()
+
+
+def _given_tokenizer(tokenizer: Tokenizer) -> Tokenizer:
+    return tokenizer
+
+
+# The engine of each worker process, created once by `_init_worker`
+_worker_engine: Optional[RougeEngine] = None
+
+
+def _init_worker(tokenizer_factory: Optional[Callable[[], Tokenizer]]) -> None:
+    global _worker_engine
+    _worker_engine = RougeEngine(
+        tokenizer_factory() if tokenizer_factory else None)
+
+
+# The F1 values of each ROUGE type for each pair of a chunk, the sum of the F1
+# values of each ROUGE type, and for each bootstrap replicate, the weighted sum
+# of the F1 values of each ROUGE type and the sum of the weights
+_ChunkResult = Tuple[Dict[str, List[float]], Dict[str, float],
+                     Dict[str, np.ndarray], np.ndarray]
+
+
+def _aggregate_chunk(chunk_index: int, f1_values: Dict[str, List[float]],
+                     num_bootstrap: int, seed: int) -> _ChunkResult:
+    '''Computes the share of a chunk of pairs in the corpus-level aggregates.
+
+    The bootstrap is a Poisson bootstrap: each pair gets a Poisson(1) weight in
+    each replicate instead of the replicates being resampled from the whole
+    corpus, so the replicates can be accumulated chunk by chunk. The weights
+    are drawn from a generator seeded by `seed` and the chunk index, so they
+    do not depend on which process scores the chunk.
+    '''
+    sums = {
+        rouge_type: float(sum(values))
+        for rouge_type, values in f1_values.items()
+    }
+    if not num_bootstrap:
+        return f1_values, sums, {}, np.zeros(0)
+
+    num_pairs = len(next(iter(f1_values.values()), []))
+    rng = np.random.default_rng([seed, chunk_index])
+    weights = rng.poisson(1.0, size=(num_bootstrap, num_pairs))
+    weighted_sums = {
+        rouge_type: weights @ np.asarray(values, dtype=float)
+        for rouge_type, values in f1_values.items()
+    }
+    return f1_values, sums, weighted_sums, weights.sum(axis=1)
+
+
+def _f1_values(
+        scores: Dict[str, List[scoring.Score]]) -> Dict[str, List[float]]:
+    return {
+        rouge_type: [score.fmeasure for score in rouge_scores]
+        for rouge_type, rouge_scores in scores.items()
+    }
+
+
+def _score_chunk_in_worker(chunk_index: int, generated_outputs: List[str],
+                           reference_outputs: List[str], rouge_types: List[str],
+                           num_bootstrap: int, seed: int) -> _ChunkResult:
+    assert _worker_engine is not None
+    # The generated outputs are the targets, as in the original metrics
+    f1_values = _f1_values(
+        _worker_engine.score(generated_outputs,
+                             reference_outputs,
+                             rouge_types,
+                             show_progress=False))
+    return _aggregate_chunk(chunk_index, f1_values, num_bootstrap, seed)
+
+
+def _compute_rouge(
+        generated_outputs: List[str], reference_outputs: List[str],
+        rouge_types: List[str], tokenizer: Optional[Tokenizer],
+        tokenizer_factory: Optional[Callable[[], Tokenizer]], num_workers: int,
+        chunk_size: int, num_bootstrap: int,
+        seed: int) -> Tuple[Dict[str, List[float]], List[_ChunkResult]]:
+    starts = range(0, len(generated_outputs), chunk_size)
+    if num_workers <= 1:
+        if tokenizer is not None:
+            engine = RougeEngine(tokenizer)
+        elif tokenizer_factory is not None:
+            engine = RougeEngine(tokenizer_factory())
+        else:
+            engine = _default_engine()
+        # The generated outputs are the targets, as in the original metrics
+        f1_values = _f1_values(
+            engine.score(generated_outputs, reference_outputs, rouge_types))
+        if not num_bootstrap:
+            return f1_values, []
+        # The bootstrap is aggregated with the same chunks as the workers
+        chunk_results = [
+            _aggregate_chunk(
+                chunk_index, {
+                    rouge_type: values[start:start + chunk_size]
+                    for rouge_type, values in f1_values.items()
+                }, num_bootstrap, seed)
+            for chunk_index, start in enumerate(starts)
+        ]
+        return f1_values, chunk_results
+
+    if tokenizer is not None:
+        # The tokenizer is pickled to each worker
+        tokenizer_factory = partial(_given_tokenizer, tokenizer)
+    with ProcessPoolExecutor(max_workers=num_workers,
+                             initializer=_init_worker,
+                             initargs=(tokenizer_factory,)) as executor:
+        futures = [
+            executor.submit(_score_chunk_in_worker, chunk_index,
+                            generated_outputs[start:start + chunk_size],
+                            reference_outputs[start:start + chunk_size],
+                            rouge_types, num_bootstrap, seed)
+            for chunk_index, start in enumerate(starts)
+        ]
+        chunk_results = [
+            future.result() for future in tqdm_wrapper(
+                futures, desc='Computing ROUGE', total=len(futures))
+        ]
+
+    all_f1_values: Dict[str, List[float]] = {
+        rouge_type: [] for rouge_type in rouge_types
+    }
+    for chunk_f1_values, _, _, _ in chunk_results:
+        for rouge_type in rouge_types:
+            all_f1_values[rouge_type].extend(chunk_f1_values[rouge_type])
+    return all_f1_values, chunk_results
+
+
+def rouge_f1_scores(generated_outputs: List[str],
+                    reference_outputs: List[str],
+                    rouge_types: List[str],
+                    tokenizer: Optional[Tokenizer] = None,
+                    *,
+                    tokenizer_factory: Optional[Callable[[], Tokenizer]] = None,
+                    num_workers: int = 1,
+                    chunk_size: int = 1000) -> Dict[str, List[float]]:
+    '''Computes the F1 values of several ROUGE types between the generated
+    outputs and the reference outputs in one pass.
+
+    Args:
+        generated_outputs: A list of model generated outputs to evaluate
+        reference_outputs: A list of reference outputs
+        rouge_types: The ROUGE types to compute, e.g. ['rouge1', 'rougeLsum']
+        tokenizer: The tokenizer. If None, the tokenizer is created with
+            `tokenizer_factory`.
+        tokenizer_factory: The function creating the tokenizer, which is called
+            once in each worker process. If None (and `tokenizer` is None), the
+            default tokenizer of `rouge_score` with the (memoized) Porter
+            stemmer is used.
+        num_workers: The number of worker processes. If 1, the scores are
+            computed in the current process.
+        chunk_size: The number of pairs scored by a worker process at once
+
+    Returns:
+        A dict mapping each ROUGE type to the list of F1 values
+    '''
+    f1_values, _ = _compute_rouge(generated_outputs, reference_outputs,
+                                  rouge_types, tokenizer, tokenizer_factory,
+                                  num_workers, chunk_size, 0, 0)
+    return f1_values
+
+
+def rouge_corpus_f1_scores(
+    generated_outputs: List[str],
+    reference_outputs: List[str],
+    rouge_types: List[str],
+    tokenizer: Optional[Tokenizer] = None,
+    *,
+    tokenizer_factory: Optional[Callable[[], Tokenizer]] = None,
+    num_workers: int = 1,
+    chunk_size: int = 1000,
+    num_bootstrap: int = 1000,
+    confidence_level: float = 0.95,
+    seed: int = 0
+) -> Tuple[Dict[str, List[float]], Dict[str, RougeCorpusScore]]:
+    '''Computes the F1 values of several ROUGE types like
+    :func:`rouge_f1_scores`, along with their corpus-level means and bootstrap
+    confidence intervals. The bootstrap replicates are accumulated in the
+    worker processes, chunk by chunk (see :func:`_aggregate_chunk`), so only
+    their sums are sent back. For a given `seed` and `chunk_size`, the
+    confidence intervals do not depend on `num_workers`. With no pairs, the
+    means and the confidence intervals are NaN.
+
+    Args:
+        num_bootstrap: The number of bootstrap replicates
+        confidence_level: The confidence level of the intervals
+        seed: The seed of the bootstrap weights
+
+    Returns:
+        A dict mapping each ROUGE type to the list of F1 values, and a dict
+        mapping each ROUGE type to its corpus-level aggregate
+    '''
+    assert num_bootstrap > 0, 'num_bootstrap should be positive.'
+    assert 0 < confidence_level < 1, 'confidence_level should be in (0, 1).'
+    if not generated_outputs:
+        nan = float('nan')
+        empty_aggregate = RougeCorpusScore(mean=nan,
+                                           low=nan,
+                                           high=nan,
+                                           confidence_level=confidence_level,
+                                           num_pairs=0)
+        empty_f1_values = {rouge_type: [] for rouge_type in rouge_types}
+        aggregates = {rouge_type: empty_aggregate for rouge_type in rouge_types}
+        return empty_f1_values, aggregates
+    f1_values, chunk_results = _compute_rouge(generated_outputs,
+                                              reference_outputs, rouge_types,
+                                              tokenizer, tokenizer_factory,
+                                              num_workers, chunk_size,
+                                              num_bootstrap, seed)
+
+    num_pairs = len(generated_outputs)
+    total_weights = sum(result[3] for result in chunk_results)
+    aggregates = {}
+    for rouge_type in rouge_types:
+        total = sum(result[1][rouge_type] for result in chunk_results)
+        weighted_sums = sum(result[2][rouge_type] for result in chunk_results)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # A replicate where every weight is 0 has no mean
+            replicate_means = weighted_sums / total_weights
+        alpha = (1 - confidence_level) / 2
+        low, high = np.nanquantile(replicate_means, [alpha, 1 - alpha])
+        aggregates[rouge_type] = RougeCorpusScore(
+            mean=total / num_pairs,
+            low=float(low),
+            high=float(high),
+            confidence_level=confidence_level,
+            num_pairs=num_pairs)
+    return f1_values, aggregates
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+from itertools import chain
+from typing import Any, Callable, List, Optional, Sequence
+
+import numpy as np
+
+from langcheck.metrics.metric_value import MetricValue, MetricValueWithThreshold
+
+# A function that returns a list field of a MetricValue
+_ListGetter = Callable[[MetricValue], Optional[List[Any]]]
+
+
+def _check_compatible(metric_values: Sequence[MetricValue]) -> None:
+    '''Raise a ValueError if the shards are not of the same metric.'''
+    if not metric_values:
+        raise ValueError('At least one MetricValue is required.')
+    first = metric_values[0]
+    for metric_value in metric_values[1:]:
+        if (metric_value.metric_name != first.metric_name or
+                metric_value.language != first.language or
+                metric_value.is_pairwise != first.is_pairwise):
+            raise ValueError(
+                'Only the MetricValues of the same metric can be combined, but '
+                f'got "{first.metric_name}" ({first.language}) and '
+                f'"{metric_value.metric_name}" ({metric_value.language}).')
+
+
+def _threshold(metric_value: MetricValue) -> Optional[tuple[Any, str]]:
+    if isinstance(metric_value, MetricValueWithThreshold):
+        return metric_value.threshold, metric_value.threshold_op
+    return None
+
+
+def _single_list(
+    values: Optional[List[str] |
+                     tuple[Optional[List[str]], Optional[List[str]]]]
+) -> Optional[List[str]]:
+    '''Return the generated outputs or the sources of a MetricValue that is
+    not pairwise.
+    '''
+    assert not isinstance(values, tuple)
+    return values
+
+
+def _pairwise_lists(
+    values: Optional[List[str] |
+                     tuple[Optional[List[str]], Optional[List[str]]]]
+) -> tuple[Optional[List[str]], Optional[List[str]]]:
+    '''Return the pair of generated outputs or sources of a pairwise
+    MetricValue. The sources of a pairwise MetricValue may be None.
+    '''
+    if values is None:
+        return None, None
+    assert isinstance(values, tuple)
+    return values
+
+
+def _combine(metric_values: Sequence[MetricValue],
+             order: Optional[np.ndarray]) -> MetricValue:
+    '''Concatenate the shards, and then reorder the rows by `order` if given.
+    '''
+    _check_compatible(metric_values)
+    thresholds = {_threshold(metric_value) for metric_value in metric_values}
+    if len(thresholds) > 1:
+        raise ValueError(
+            'The MetricValues need to have the same threshold (or no '
+            'threshold) to be combined.')
+    lengths = [
+        len(metric_value.metric_values) for metric_value in metric_values
+    ]
+
+    def reorder(values: List[Any]) -> List[Any]:
+        if order is None:
+            return values
+        return [values[i] for i in order.tolist()]
+
+    def combine_lists(field_name: str,
+                      get: _ListGetter,
+                      fill_value: Any = None,
+                      allow_missing: bool = False) -> Optional[List[Any]]:
+        lists = [get(metric_value) for metric_value in metric_values]
+        if all(values is None for values in lists):
+            return None
+        if any(values is None for values in lists):
+            if not allow_missing:
+                raise ValueError(
+                    f'The {field_name} of some of the MetricValues are None.')
+        filled_lists = [
+            values if values is not None else [fill_value] * length
+            for values, length in zip(lists, lengths)
+        ]
+        return reorder(list(chain.from_iterable(filled_lists)))
+
+    def combine_required_lists(field_name: str, get: _ListGetter) -> List[Any]:
+        combined_list = combine_lists(field_name, get)
+        if combined_list is None:
+            raise ValueError(
+                f'The {field_name} of the MetricValues are all None.')
+        return combined_list
+
+    if metric_values[0].is_pairwise:
+        generated_outputs = (
+            combine_required_lists(
+                'generated outputs',
+                lambda mv: _pairwise_lists(mv.generated_outputs)[0]),
+            combine_required_lists(
+                'generated outputs',
+                lambda mv: _pairwise_lists(mv.generated_outputs)[1]))
+        if all(metric_value.sources is None for metric_value in metric_values):
+            sources = None
+        else:
+            sources = (combine_lists('sources',
+                                     lambda mv: _pairwise_lists(mv.sources)[0]),
+                       combine_lists('sources',
+                                     lambda mv: _pairwise_lists(mv.sources)[1]))
+    else:
+        generated_outputs = combine_lists(
+            'generated outputs', lambda mv: _single_list(mv.generated_outputs))
+        sources = combine_lists('sources', lambda mv: _single_list(mv.sources))
+
+    combined = MetricValue(
+        metric_name=metric_values[0].metric_name,
+        metric_values=combine_required_lists('metric values',
+                                             lambda mv: mv.metric_values),
+        prompts=combine_lists('prompts', lambda mv: mv.prompts),
+        generated_outputs=generated_outputs,
+        reference_outputs=combine_lists('reference outputs',
+                                        lambda mv: mv.reference_outputs),
+        sources=sources,
+        explanations=combine_lists('explanations',
+                                   lambda mv: mv.explanations,
+                                   allow_missing=True),
+        language=metric_values[0].language)
+    combined.timed_out = combine_lists('timed_out',
+                                       lambda mv: mv.timed_out,
+                                       fill_value=False,
+                                       allow_missing=True)
+    combined.latencies = combine_lists('latencies',
+                                       lambda mv: mv.latencies,
+                                       allow_missing=True)
+    stats = [
+        metric_value.eval_client_stats
+        for metric_value in metric_values
+        if metric_value.eval_client_stats is not None
+    ]
+    if stats:
+        from langcheck.metrics.eval_clients._stats import EvalClientStats
+        combined.eval_client_stats = EvalClientStats(
+            requests=list(chain.from_iterable(stat.requests for stat in stats)))
+
+    # Reuse the arrays of the shards instead of converting the combined list
+    def combine_arrays(arrays: List[np.ndarray]) -> np.ndarray:
+        combined_array = np.concatenate(arrays)
+        return combined_array if order is None else combined_array[order]
+
+    combined._set_arrays(
+        combine_arrays(
+            [metric_value.values_array for metric_value in metric_values]),
+        combine_arrays(
+            [metric_value.none_mask for metric_value in metric_values]))
+
+    threshold = thresholds.pop()
+    if threshold is None:
+        return combined
+    # The threshold results of the shards (which all have the threshold) are
+    # reused as well
+    threshold_array = combine_arrays([
+        metric_value.threshold_array
+        for metric_value in metric_values
+        if isinstance(metric_value, MetricValueWithThreshold)
+    ])
+    return combined._with_threshold(*threshold, threshold_array=threshold_array)
+
+
+def concat_metric_values(metric_values: Sequence[MetricValue]) -> MetricValue:
+    '''Concatenate the MetricValues of shards in the given order. See
+    :meth:`~langcheck.metrics.metric_value.MetricValue.concat`.
+    '''
+    return _combine(metric_values, order=None)
+
+
+def merge_metric_values(metric_values: Sequence[MetricValue],
+                        shard_indices: Sequence[Sequence[int]]) -> MetricValue:
+    '''Merge the MetricValues of shards into the original row order. See
+    :meth:`~langcheck.metrics.metric_value.MetricValue.merge`.
+    '''
+    if len(shard_indices) != len(metric_values):
+        raise ValueError(
+            f'Got {len(shard_indices)} shard indices for {len(metric_values)} '
+            'MetricValues.')
+    indices_arrays = []
+    for metric_value, indices in zip(metric_values, shard_indices):
+        indices_array = np.asarray(indices, dtype=np.int64).reshape(-1)
+        if len(indices_array) != len(metric_value.metric_values):
+            raise ValueError(
+                f'Got {len(indices_array)} indices for a shard with '
+                f'{len(metric_value.metric_values)} rows.')
+        indices_arrays.append(indices_array)
+    row_indices = (np.concatenate(indices_arrays)
+                   if indices_arrays else np.empty(0, dtype=np.int64))
+    # The position of each original row in the concatenated shards
+    order = np.argsort(row_indices, kind='stable')
+    if not np.array_equal(row_indices[order], np.arange(len(row_indices))):
+        raise ValueError(
+            'The shard indices should cover each row index from 0 to the '
+            'total number of rows exactly once.')
+    return _combine(metric_values, order=order)
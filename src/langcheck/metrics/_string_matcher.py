@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from collections import deque
+from functools import lru_cache
+
+# Up to this many strings, searching the text for each string with `in` (which
+# runs in C) is faster than scanning it once with the automaton (which runs in
+# Python), e.g. 18us vs 187us for 16 strings in a 1.5KB text
+_MAX_STRINGS_FOR_SUBSTRING_SEARCH = 128
+
+
+class StringMatcher:
+    '''Finds which of a fixed set of strings occur in a text. A large set of
+    strings is compiled once into a trie with failure links (the Aho-Corasick
+    algorithm), so that each text is scanned once regardless of the number of
+    strings. A small set of strings is searched for one at a time with `in`.
+
+    Ref:
+        https://en.wikipedia.org/wiki/Aho%E2%80%93Corasick_algorithm
+    '''
+
+    def __init__(self, strings: tuple[str, ...], case_sensitive: bool = True):
+        '''
+        Compile the strings into a matcher.
+
+        Args:
+            strings: The strings to find
+            case_sensitive: Whether to match case sensitively or not
+        '''
+        self.strings = strings
+        self.case_sensitive = case_sensitive
+        # The strings as they are searched for in the (lowercased) texts
+        self._search_strings = strings
+        if not case_sensitive:
+            self._search_strings = tuple(string.lower() for string in strings)
+        self._use_automaton = len(strings) > _MAX_STRINGS_FOR_SUBSTRING_SEARCH
+        if self._use_automaton:
+            self._build_automaton()
+
+    def _build_automaton(self) -> None:
+        # The transitions, failure link, and indices of the strings that end
+        # at each node of the trie. Node 0 is the root.
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._outputs: list[tuple[int, ...]] = [()]
+        # The empty string occurs in every text
+        self._always_matched = frozenset(
+            i for i, string in enumerate(self._search_strings) if not string)
+
+        for i, string in enumerate(self._search_strings):
+            node = 0
+            for char in string:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._outputs.append(())
+                node = next_node
+            if node:
+                self._outputs[node] += (i,)
+
+        # Compute the failure links in breadth-first order, so that the link
+        # of each node's parent is known before the node itself
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                # A node also matches every string matched by its failure link
+                self._outputs[child] += self._outputs[self._fail[child]]
+
+    def find(self, text: str) -> set[int]:
+        '''Return the indices of the strings that occur in the text.
+        '''
+        if not self.case_sensitive:
+            text = text.lower()
+        if not self._use_automaton:
+            return {
+                i for i, string in enumerate(self._search_strings)
+                if string in text
+            }
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        matched = set(self._always_matched)
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if outputs[node]:
+                matched.update(outputs[node])
+        return matched
+
+
+@lru_cache(maxsize=32)
+def compile_string_matcher(strings: tuple[str, ...],
+                           case_sensitive: bool) -> StringMatcher:
+    '''Return the matcher of the strings, which is compiled once and reused by
+    the calls with the same strings.
+    '''
+    return StringMatcher(strings, case_sensitive)
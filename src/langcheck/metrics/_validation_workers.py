@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+import time
+from multiprocessing.connection import Connection, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langcheck.metrics._deadline import deadline_exceeded, time_remaining
+from langcheck.utils.progress_bar import progress_bar
+
+# The result of validating one output: 1 if valid, 0 if invalid, and None if
+# the validation timed out, and the time the validation took (None if it timed
+# out)
+_ValidationResult = Tuple[Optional[int], Optional[float]]
+
+
+def validate_output(valid_fn: Callable[[str], bool],
+                    output: str) -> Tuple[int, float]:
+    '''Validate one output, treating exceptions as failures, and measure how
+    long the validation took.
+    '''
+    start_time = time.perf_counter()
+    try:
+        is_valid = 1 if valid_fn(output) else 0
+    except Exception:
+        is_valid = 0
+    return is_valid, time.perf_counter() - start_time
+
+
+def _worker_loop(conn: Connection, valid_fn: Callable[[str], bool]) -> None:
+    '''Validate the outputs sent through the connection one at a time, until
+    None is sent or the connection is closed.
+    '''
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        index, output = task
+        try:
+            conn.send((index, *validate_output(valid_fn, output)))
+        except OSError:
+            # The validation timed out and the connection was closed
+            return
+
+
+class _Worker:
+    '''A thread or a process that runs `_worker_loop`, and the connection used
+    to send it outputs and receive the results.
+    '''
+
+    def __init__(self, valid_fn: Callable[[str], bool], executor: str):
+        self.conn, worker_conn = multiprocessing.Pipe()
+        self.index: Optional[int] = None
+        self.start_time = 0.0
+        if executor == 'process':
+            self._runner = multiprocessing.Process(target=_worker_loop,
+                                                   args=(worker_conn, valid_fn),
+                                                   daemon=True)
+        else:
+            self._runner = threading.Thread(target=_worker_loop,
+                                            args=(worker_conn, valid_fn),
+                                            daemon=True)
+        self._runner.start()
+
+    def submit(self, index: int, output: str) -> None:
+        self.index = index
+        self.start_time = time.monotonic()
+        self.conn.send((index, output))
+
+    def stop(self) -> None:
+        '''Stop the worker after its current validation (if any).'''
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.conn.close()
+
+    def abandon(self) -> None:
+        '''Stop a worker whose validation timed out. A process is terminated,
+        while a thread cannot be interrupted, so it is left running in the
+        background (as a daemon thread) and its result is discarded.
+        '''
+        if isinstance(self._runner, multiprocessing.Process):
+            self._runner.terminate()
+            self._runner.join()
+        self.conn.close()
+
+
+def run_validation_fn(
+        outputs: List[str],
+        valid_fn: Callable[[str], bool],
+        executor: str,
+        max_workers: Optional[int] = None,
+        timeout: Optional[float] = None) -> List[_ValidationResult]:
+    '''Validate the outputs on a pool of threads or processes, with an optional
+    per-output timeout that starts when a worker picks up the output. A worker
+    whose validation times out is replaced by a new one, so a hanging
+    validation does not hold up the other outputs. The validation of the
+    outputs that are still pending when the active
+    :func:`~langcheck.metrics.deadline` expires is cancelled as well.
+
+    Args:
+        outputs: The outputs to validate
+        valid_fn: The validation function. It needs to be picklable if the
+            executor is 'process' and the processes are spawned.
+        executor: 'thread' or 'process'
+        max_workers: The number of workers. If None, the number of CPUs is used
+            for processes, and 4 more than that for threads.
+        timeout: The maximum number of seconds to validate each output, or None
+            for no limit
+
+    Returns:
+        The validation result and the latency of each output
+    '''
+    assert executor in ('thread', 'process'), (
+        'The executor should be either "thread" or "process".')
+    if not outputs:
+        # No workers are started if there is nothing to validate
+        return []
+    if max_workers is None:
+        num_cpus = os.cpu_count() or 1
+        if executor == 'process':
+            max_workers = num_cpus
+        else:
+            max_workers = min(32, num_cpus + 4)
+    num_workers = max(1, min(max_workers, len(outputs)))
+
+    results: List[_ValidationResult] = [(None, None)] * len(outputs)
+    idle_workers = [_Worker(valid_fn, executor) for _ in range(num_workers)]
+    busy_workers: Dict[Connection, _Worker] = {}
+    next_index = 0
+    # The progress bar is updated as the results arrive (in any order)
+    progress = progress_bar(desc='Validating outputs', total=len(outputs))
+    try:
+        while next_index < len(outputs) or busy_workers:
+            if deadline_exceeded():
+                # The pending outputs time out
+                break
+            while idle_workers and next_index < len(outputs):
+                worker = idle_workers.pop()
+                worker.submit(next_index, outputs[next_index])
+                busy_workers[worker.conn] = worker
+                next_index += 1
+
+            wait_time = time_remaining()
+            if timeout is not None:
+                earliest_start = min(
+                    worker.start_time for worker in busy_workers.values())
+                time_left = max(0.0,
+                                earliest_start + timeout - time.monotonic())
+                wait_time = (time_left if wait_time is None else min(
+                    wait_time, time_left))
+            for conn in wait(list(busy_workers), wait_time):
+                worker = busy_workers.pop(conn)  # type: ignore
+                try:
+                    index, is_valid, latency = worker.conn.recv()
+                except EOFError:
+                    # The worker process died (e.g. killed by a segfault)
+                    worker.abandon()
+                    idle_workers.append(_Worker(valid_fn, executor))
+                    results[worker.index] = (0, None)  # type: ignore
+                else:
+                    results[index] = (is_valid, latency)
+                    idle_workers.append(worker)
+                progress.update(1)
+
+            if timeout is not None:
+                now = time.monotonic()
+                for conn, worker in list(busy_workers.items()):
+                    if now - worker.start_time >= timeout:
+                        # The output keeps its (None, None) result
+                        del busy_workers[conn]
+                        worker.abandon()
+                        idle_workers.append(_Worker(valid_fn, executor))
+                        progress.update(1)
+    finally:
+        progress.close()
+        for worker in idle_workers:
+            worker.stop()
+        for worker in busy_workers.values():
+            worker.abandon()
+    return results
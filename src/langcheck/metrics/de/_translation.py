@@ -3,6 +3,8 @@ from math import floor
 from nltk.tokenize import sent_tokenize
 from transformers.pipelines import pipeline
 
+from langcheck.profiling import profile_stage
+
 
 class Translate:
     '''Translation class based on HuggingFace's translation pipeline.'''
@@ -37,7 +39,8 @@ class Translate:
             # NB: this comes from a few 100 tests, but it is not a science
             blocks = floor(2 * tokenization.input_ids.shape[1] /
                            self._max_length)
-            sentences = sent_tokenize(texts)
+            with profile_stage('Translate.sent_tokenize', len(texts)):
+                sentences = sent_tokenize(texts)
             # Split sentences into a number of blocks, e.g., 2 blocks = 2 groups
             len_block = floor(len(sentences) / blocks) + 1
             sentences_list = []
@@ -64,4 +67,5 @@ class Translate:
         Returns:
             The translated text
         '''
-        return self._translate(text)
+        with profile_stage('Translate', len(text)):
+            return self._translate(text)
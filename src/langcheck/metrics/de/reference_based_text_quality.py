@@ -2,24 +2,28 @@ from __future__ import annotations
 
 from typing import List, Optional
 
-from rouge_score import rouge_scorer
-
+from langcheck.metrics._deadline import attach_timed_out
+from langcheck.metrics._rouge import rouge_f1_scores
 from langcheck.metrics._validation import validate_parameters_reference_based
 from langcheck.metrics.de._tokenizers import DeTokenizer
 from langcheck.metrics.eval_clients import EvalClient
+from langcheck.metrics.eval_clients._stats import attach_eval_client_stats
 from langcheck.metrics.metric_value import MetricValue
 from langcheck.metrics.scorer.hf_models import \
     SentenceTransformerSimilarityScorer
-from langcheck.utils.progess_bar import tqdm_wrapper
+from langcheck.utils.progress_bar import tqdm_wrapper
 
 LANG = "de"
 
 
+@attach_eval_client_stats
+@attach_timed_out
 def semantic_similarity(
         generated_outputs: List[str] | str,
         reference_outputs: List[str] | str,
         prompts: Optional[List[str] | str] = None,
-        eval_model: str | EvalClient = 'local') -> MetricValue[float]:
+        eval_model: str | EvalClient = 'local',
+        local_chunk_pooling: Optional[str] = None) -> MetricValue[float]:
     """Calculates the semantic similarities between the generated outputs and
     the reference outputs. The similarities are computed as the cosine
     similarities between the generated and reference embeddings. This metric
@@ -48,6 +52,11 @@ def semantic_similarity(
             optional metadata and not used to calculate the metric.
         eval_model: The type of model to use ('local' or the EvalClient instance
             used for the evaluation). default 'local'
+        local_chunk_pooling: Only used if eval_model is 'local'. If "mean" or
+            "max", outputs longer than the maximum sequence length of the model
+            are split into windows of tokens, and the window embeddings are
+            pooled (by mean or max) instead of truncating the outputs. If None,
+            the outputs are truncated. default None
 
     Returns:
         An :class:`~langcheck.metrics.metric_value.MetricValue` object
@@ -60,7 +69,8 @@ def semantic_similarity(
         generated_outputs, reference_outputs, prompts)
 
     if eval_model == 'local':
-        scorer = SentenceTransformerSimilarityScorer(language=LANG)
+        scorer = SentenceTransformerSimilarityScorer(
+            language=LANG, chunk_pooling=local_chunk_pooling)
     else:  # EvalClient
         assert isinstance(
             eval_model, EvalClient
@@ -85,6 +95,8 @@ def rouge1(
     generated_outputs: List[str] | str,
     reference_outputs: List[str] | str,
     prompts: Optional[List[str] | str] = None,
+    *,
+    num_workers: int = 1,
 ) -> MetricValue[float]:
     """Calculates the F1 metrics of the ROUGE-1 scores between the generated
     outputs and the reference outputs. It evaluates the overlap of unigrams
@@ -100,6 +112,9 @@ def rouge1(
         reference_outputs: The reference output(s)
         prompts: The prompts used to generate the output(s). Prompts are
             optional metadata and not used to calculate the metric.
+        num_workers: The number of worker processes computing the scores in
+            chunks. Each worker creates its own tokenizer. default 1 (the
+            scores are computed in the current process)
 
     Returns:
         An :class:`~langcheck.metrics.metric_value.MetricValue` object
@@ -111,7 +126,10 @@ def rouge1(
     ) = validate_parameters_reference_based(  # NOQA: E501
         generated_outputs, reference_outputs, prompts)
 
-    scores = _rouge(generated_outputs, reference_outputs, "rouge1")
+    scores = _rouge(generated_outputs,
+                    reference_outputs,
+                    "rouge1",
+                    num_workers=num_workers)
     return MetricValue(
         metric_name="rouge1",
         prompts=prompts,
@@ -128,6 +146,8 @@ def rouge2(
     generated_outputs: List[str] | str,
     reference_outputs: List[str] | str,
     prompts: Optional[List[str] | str] = None,
+    *,
+    num_workers: int = 1,
 ) -> MetricValue[float]:
     """Calculates the F1 metrics of the ROUGE-2 scores between the generated
     outputs and the reference outputs. It evaluates the overlap of bigrams
@@ -143,6 +163,9 @@ def rouge2(
         reference_outputs: The reference output(s)
         prompts: The prompts used to generate the output(s). Prompts are
             optional metadata and not used to calculate the metric.
+        num_workers: The number of worker processes computing the scores in
+            chunks. Each worker creates its own tokenizer. default 1 (the
+            scores are computed in the current process)
 
     Returns:
         An :class:`~langcheck.metrics.metric_value.MetricValue` object
@@ -154,7 +177,10 @@ def rouge2(
     ) = validate_parameters_reference_based(  # NOQA: E501
         generated_outputs, reference_outputs, prompts)
 
-    scores = _rouge(generated_outputs, reference_outputs, "rouge2")
+    scores = _rouge(generated_outputs,
+                    reference_outputs,
+                    "rouge2",
+                    num_workers=num_workers)
     return MetricValue(
         metric_name="rouge2",
         prompts=prompts,
@@ -171,6 +197,8 @@ def rougeL(
     generated_outputs: List[str] | str,
     reference_outputs: List[str] | str,
     prompts: Optional[List[str] | str] = None,
+    *,
+    num_workers: int = 1,
 ) -> MetricValue[float]:
     """Calculates the F1 metrics of the ROUGE-L scores between the generated
     outputs and the reference outputs. It evaluates the longest common
@@ -186,6 +214,9 @@ def rougeL(
         reference_outputs: The reference output(s)
         prompts: The prompts used to generate the output(s). Prompts are
             optional metadata and not used to calculate the metric.
+        num_workers: The number of worker processes computing the scores in
+            chunks. Each worker creates its own tokenizer. default 1 (the
+            scores are computed in the current process)
 
     Returns:
         An :class:`~langcheck.metrics.metric_value.MetricValue` object
@@ -207,7 +238,10 @@ def rougeL(
     # Python wrapper around original perl script implementation.
     #
     # [1] https://github.com/google-research/google-research/tree/master/rouge#two-flavors-of-rouge-l # NOQA: E501
-    scores = _rouge(generated_outputs, reference_outputs, "rougeLsum")
+    scores = _rouge(generated_outputs,
+                    reference_outputs,
+                    "rougeLsum",
+                    num_workers=num_workers)
     return MetricValue(
         metric_name="rougeL",
         prompts=prompts,
@@ -220,8 +254,11 @@ def rougeL(
     )
 
 
-def _rouge(generated_outputs: List[str], reference_outputs: List[str],
-           rouge_type: str) -> List[float]:
+def _rouge(generated_outputs: List[str],
+           reference_outputs: List[str],
+           rouge_type: str,
+           *,
+           num_workers: int = 1) -> List[float]:
     """Helper function for computing the rouge1, rouge2, and rougeL metrics.
     This uses Google Research's implementation of ROUGE:
     https://github.com/google-research/google-research/tree/master/rouge
@@ -230,19 +267,14 @@ def _rouge(generated_outputs: List[str], reference_outputs: List[str],
         generated_outputs: A list of model generated outputs to evaluate
         reference_outputs: A list of reference outputs
         rouge_type: rouge1, rouge2, or rougeLsum
+        num_workers: The number of worker processes
 
     Returns:
         A list of F1 values of the ROUGE scores
     """
     assert rouge_type in ["rouge1", "rouge2", "rougeLsum"]
 
-    tokenizer = DeTokenizer()
-    scorer = rouge_scorer.RougeScorer([rouge_type],
-                                      use_stemmer=True,
-                                      tokenizer=tokenizer)
-    scores = []
-    for gen, ref in tqdm_wrapper(zip(generated_outputs, reference_outputs),
-                                 total=len(generated_outputs)):
-        score = scorer.score(gen, ref)
-        scores.append(score[rouge_type].fmeasure)
-    return scores
+    return rouge_f1_scores(generated_outputs,
+                           reference_outputs, [rouge_type],
+                           tokenizer_factory=DeTokenizer,
+                           num_workers=num_workers)[rouge_type]
@@ -2,14 +2,16 @@ from __future__ import annotations
 
 from typing import List, Optional, Tuple
 
+from langcheck.metrics._deadline import attach_timed_out
 from langcheck.metrics._validation import (
     validate_parameters_context_relevance, validate_parameters_source_based)
 from langcheck.metrics.de._translation import Translate
 from langcheck.metrics.en.source_based_text_quality import \
     factual_consistency as en_factual_consistency
 from langcheck.metrics.eval_clients import EvalClient
+from langcheck.metrics.eval_clients._stats import attach_eval_client_stats
 from langcheck.metrics.metric_value import MetricValue
-from langcheck.utils.progess_bar import tqdm_wrapper
+from langcheck.utils.progress_bar import tqdm_wrapper
 
 from ..prompts._utils import get_template
 
@@ -18,6 +20,8 @@ _factual_consistency_translation_model_path = 'Helsinki-NLP/opus-mt-de-en'
 LANG = 'de'
 
 
+@attach_eval_client_stats
+@attach_timed_out
 def factual_consistency(
         generated_outputs: List[str] | str,
         sources: List[str] | str,
@@ -146,6 +150,8 @@ def _factual_consistency_eval_client(
     return scores, explanations
 
 
+@attach_eval_client_stats
+@attach_timed_out
 def context_relevance(sources: List[str] | str, prompts: List[str] | str,
                       eval_model: EvalClient) -> MetricValue[Optional[float]]:
     '''Calculates the relevance of the sources to the prompts. This metric takes
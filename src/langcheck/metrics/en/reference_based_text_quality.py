@@ -2,21 +2,25 @@ from __future__ import annotations
 
 from typing import List, Optional
 
-from rouge_score import rouge_scorer
-
+from langcheck.metrics._deadline import attach_timed_out
+from langcheck.metrics._rouge import rouge_f1_scores
 from langcheck.metrics._validation import validate_parameters_reference_based
 from langcheck.metrics.eval_clients import EvalClient
+from langcheck.metrics.eval_clients._stats import attach_eval_client_stats
 from langcheck.metrics.metric_value import MetricValue
 from langcheck.metrics.scorer.hf_models import \
     SentenceTransformerSimilarityScorer
-from langcheck.utils.progess_bar import tqdm_wrapper
+from langcheck.utils.progress_bar import tqdm_wrapper
 
 
+@attach_eval_client_stats
+@attach_timed_out
 def semantic_similarity(
         generated_outputs: List[str] | str,
         reference_outputs: List[str] | str,
         prompts: Optional[List[str] | str] = None,
-        eval_model: str | EvalClient = 'local') -> MetricValue[float]:
+        eval_model: str | EvalClient = 'local',
+        local_chunk_pooling: Optional[str] = None) -> MetricValue[float]:
     '''Calculates the semantic similarities between the generated outputs and
     the reference outputs. The similarities are computed as the cosine
     similarities between the generated and reference embeddings. This metric
@@ -45,6 +49,11 @@ def semantic_similarity(
             optional metadata and not used to calculate the metric.
         eval_model: The type of model to use ('local' or the EvalClient instance
             used for the evaluation). default 'local'
+        local_chunk_pooling: Only used if eval_model is 'local'. If "mean" or
+            "max", outputs longer than the maximum sequence length of the model
+            are split into windows of tokens, and the window embeddings are
+            pooled (by mean or max) instead of truncating the outputs. If None,
+            the outputs are truncated. default None
 
     Returns:
         An :class:`~langcheck.metrics.metric_value.MetricValue` object
@@ -52,7 +61,8 @@ def semantic_similarity(
     generated_outputs, reference_outputs, prompts = validate_parameters_reference_based(  # NOQA: E501
         generated_outputs, reference_outputs, prompts)
     if eval_model == 'local':
-        scorer = SentenceTransformerSimilarityScorer(language='en')
+        scorer = SentenceTransformerSimilarityScorer(
+            language='en', chunk_pooling=local_chunk_pooling)
     else:  # EvalClient
         assert isinstance(
             eval_model, EvalClient
@@ -72,7 +82,9 @@ def semantic_similarity(
 
 def rouge1(generated_outputs: List[str] | str,
            reference_outputs: List[str] | str,
-           prompts: Optional[List[str] | str] = None) -> MetricValue[float]:
+           prompts: Optional[List[str] | str] = None,
+           *,
+           num_workers: int = 1) -> MetricValue[float]:
     '''Calculates the F1 metrics of the ROUGE-1 scores between the generated
     outputs and the reference outputs. It evaluates the overlap of unigrams
     (single tokens) between the generated outputs and the reference outputs.
@@ -87,6 +99,9 @@ def rouge1(generated_outputs: List[str] | str,
         reference_outputs: The reference output(s)
         prompts: The prompts used to generate the output(s). Prompts are
             optional metadata and not used to calculate the metric.
+        num_workers: The number of worker processes computing the scores in
+            chunks. Each worker creates its own tokenizer. default 1 (the
+            scores are computed in the current process)
 
     Returns:
         An :class:`~langcheck.metrics.metric_value.MetricValue` object
@@ -94,7 +109,10 @@ def rouge1(generated_outputs: List[str] | str,
     generated_outputs, reference_outputs, prompts = validate_parameters_reference_based(  # NOQA: E501
         generated_outputs, reference_outputs, prompts)
 
-    scores = _rouge(generated_outputs, reference_outputs, 'rouge1')
+    scores = _rouge(generated_outputs,
+                    reference_outputs,
+                    'rouge1',
+                    num_workers=num_workers)
     return MetricValue(metric_name='rouge1',
                        prompts=prompts,
                        generated_outputs=generated_outputs,
@@ -107,7 +125,9 @@ def rouge1(generated_outputs: List[str] | str,
 
 def rouge2(generated_outputs: List[str] | str,
            reference_outputs: List[str] | str,
-           prompts: Optional[List[str] | str] = None) -> MetricValue[float]:
+           prompts: Optional[List[str] | str] = None,
+           *,
+           num_workers: int = 1) -> MetricValue[float]:
     '''Calculates the F1 metrics of the ROUGE-2 scores between the generated
     outputs and the reference outputs. It evaluates the overlap of bigrams
     (two adjacent tokens) between the generated outputs and the reference
@@ -122,6 +142,9 @@ def rouge2(generated_outputs: List[str] | str,
         reference_outputs: The reference output(s)
         prompts: The prompts used to generate the output(s). Prompts are
             optional metadata and not used to calculate the metric.
+        num_workers: The number of worker processes computing the scores in
+            chunks. Each worker creates its own tokenizer. default 1 (the
+            scores are computed in the current process)
 
     Returns:
         An :class:`~langcheck.metrics.metric_value.MetricValue` object
@@ -129,7 +152,10 @@ def rouge2(generated_outputs: List[str] | str,
     generated_outputs, reference_outputs, prompts = validate_parameters_reference_based(  # NOQA: E501
         generated_outputs, reference_outputs, prompts)
 
-    scores = _rouge(generated_outputs, reference_outputs, 'rouge2')
+    scores = _rouge(generated_outputs,
+                    reference_outputs,
+                    'rouge2',
+                    num_workers=num_workers)
     return MetricValue(metric_name='rouge2',
                        prompts=prompts,
                        generated_outputs=generated_outputs,
@@ -142,7 +168,9 @@ def rouge2(generated_outputs: List[str] | str,
 
 def rougeL(generated_outputs: List[str] | str,
            reference_outputs: List[str] | str,
-           prompts: Optional[List[str] | str] = None) -> MetricValue[float]:
+           prompts: Optional[List[str] | str] = None,
+           *,
+           num_workers: int = 1) -> MetricValue[float]:
     '''Calculates the F1 metrics of the ROUGE-L scores between the generated
     outputs and the reference outputs. It evaluates the longest common
     subsequence (LCS) between the generated outputs and the reference outputs.
@@ -157,6 +185,9 @@ def rougeL(generated_outputs: List[str] | str,
         reference_outputs: The reference output(s)
         prompts: The prompts used to generate the output(s). Prompts are
             optional metadata and not used to calculate the metric.
+        num_workers: The number of worker processes computing the scores in
+            chunks. Each worker creates its own tokenizer. default 1 (the
+            scores are computed in the current process)
 
     Returns:
         An :class:`~langcheck.metrics.metric_value.MetricValue` object
@@ -174,7 +205,10 @@ def rougeL(generated_outputs: List[str] | str,
     # Python wrapper around original perl script implementation.
     #
     # [1] https://github.com/google-research/google-research/tree/master/rouge#two-flavors-of-rouge-l # NOQA: E501
-    scores = _rouge(generated_outputs, reference_outputs, 'rougeLsum')
+    scores = _rouge(generated_outputs,
+                    reference_outputs,
+                    'rougeLsum',
+                    num_workers=num_workers)
     return MetricValue(metric_name='rougeL',
                        prompts=prompts,
                        generated_outputs=generated_outputs,
@@ -185,8 +219,11 @@ def rougeL(generated_outputs: List[str] | str,
                        language='en')
 
 
-def _rouge(generated_outputs: List[str], reference_outputs: List[str],
-           rouge_type: str) -> List[float]:
+def _rouge(generated_outputs: List[str],
+           reference_outputs: List[str],
+           rouge_type: str,
+           *,
+           num_workers: int = 1) -> List[float]:
     '''Helper function for computing the rouge1, rouge2, and rougeL metrics.
     This uses Google Research's implementation of ROUGE:
     https://github.com/google-research/google-research/tree/master/rouge
@@ -195,15 +232,12 @@ def _rouge(generated_outputs: List[str], reference_outputs: List[str],
         generated_outputs: A list of model generated outputs to evaluate
         reference_outputs: A list of reference outputs
         rouge_type: rouge1, rouge2, or rougeLsum
+        num_workers: The number of worker processes
 
     Returns:
         A list of F1 values of the ROUGE scores
     '''
     assert rouge_type in ["rouge1", "rouge2", "rougeLsum"]
-    scorer = rouge_scorer.RougeScorer([rouge_type], use_stemmer=True)
-    scores = []
-    for gen, ref in tqdm_wrapper(zip(generated_outputs, reference_outputs),
-                                 total=len(generated_outputs)):
-        score = scorer.score(gen, ref)
-        scores.append(score[rouge_type].fmeasure)
-    return scores
+    return rouge_f1_scores(generated_outputs,
+                           reference_outputs, [rouge_type],
+                           num_workers=num_workers)[rouge_type]
@@ -2,21 +2,26 @@ from __future__ import annotations
 
 from typing import List, Optional, Tuple
 
+from langcheck.metrics._deadline import attach_timed_out
 from langcheck.metrics._validation import (validate_parameters_answer_relevance,
                                            validate_parameters_reference_free)
-from langcheck.metrics.en.reference_based_text_quality import \
-    semantic_similarity
 from langcheck.metrics.eval_clients import EvalClient
+from langcheck.metrics.eval_clients._stats import attach_eval_client_stats
 from langcheck.metrics.metric_value import MetricValue
+from langcheck.metrics.readability import (_en_flesch_kincaid_grade,
+                                           _en_flesch_reading_ease)
 from langcheck.metrics.scorer.detoxify_models import DetoxifyScorer
-from langcheck.metrics.scorer.hf_models import \
-    AutoModelForSequenceClassificationScorer
-from langcheck.stats import compute_stats
-from langcheck.utils.progess_bar import tqdm_wrapper
+from langcheck.metrics.scorer.hf_models import (
+    AutoModelForSequenceClassificationScorer,
+    SentenceTransformerSimilarityScorer)
+from langcheck.stats import compute_stats_batch
+from langcheck.utils.progress_bar import tqdm_wrapper
 
 from ..prompts._utils import get_template
 
 
+@attach_eval_client_stats
+@attach_timed_out
 def sentiment(
     generated_outputs: List[str] | str,
     prompts: Optional[List[str] | str] = None,
@@ -145,6 +150,8 @@ def _sentiment_eval_client(
     return scores, explanations
 
 
+@attach_eval_client_stats
+@attach_timed_out
 def fluency(
     generated_outputs: List[str] | str,
     prompts: Optional[List[str] | str] = None,
@@ -271,6 +278,8 @@ def _fluency_eval_client(
     return scores, explanations
 
 
+@attach_eval_client_stats
+@attach_timed_out
 def toxicity(
     generated_outputs: List[str] | str,
     prompts: Optional[List[str] | str] = None,
@@ -415,14 +424,8 @@ def flesch_reading_ease(
     generated_outputs, prompts = validate_parameters_reference_free(
         generated_outputs, prompts)
 
-    output_stats = [
-        compute_stats(output)
-        for output in tqdm_wrapper(generated_outputs, desc='Computing stats')
-    ]
-    scores = [
-        206.835 - 1.015 * (stat.num_words / stat.num_sentences) - 84.6 *
-        (stat.num_syllables / stat.num_words) for stat in output_stats
-    ]
+    output_stats = compute_stats_batch(generated_outputs)
+    scores = [_en_flesch_reading_ease(stat) for stat in output_stats]
     return MetricValue(metric_name='flesch_reading_ease',
                        prompts=prompts,
                        generated_outputs=generated_outputs,
@@ -458,14 +461,8 @@ def flesch_kincaid_grade(
     generated_outputs, prompts = validate_parameters_reference_free(
         generated_outputs, prompts)
 
-    output_stats = [
-        compute_stats(output)
-        for output in tqdm_wrapper(generated_outputs, desc='Computing stats')
-    ]
-    scores = [
-        0.39 * (stat.num_words / stat.num_sentences) + 11.8 *
-        (stat.num_syllables / stat.num_words) - 15.59 for stat in output_stats
-    ]
+    output_stats = compute_stats_batch(generated_outputs)
+    scores = [_en_flesch_kincaid_grade(stat) for stat in output_stats]
     return MetricValue(metric_name='flesch_kincaid_grade',
                        prompts=prompts,
                        generated_outputs=generated_outputs,
@@ -476,12 +473,16 @@ def flesch_kincaid_grade(
                        language='en')
 
 
+@attach_eval_client_stats
+@attach_timed_out
 def ai_disclaimer_similarity(
-        generated_outputs: List[str] | str,
-        prompts: Optional[List[str] | str] = None,
-        ai_disclaimer_phrase: str = (
-            "I don't have personal opinions, emotions, or consciousness."),
-        eval_model: str | EvalClient = 'local') -> MetricValue[float]:
+    generated_outputs: List[str] | str,
+    prompts: Optional[List[str] | str] = None,
+    ai_disclaimer_phrase: str = (
+        "I don't have personal opinions, emotions, or consciousness."),
+    eval_model: str | EvalClient = 'local',
+    ai_disclaimer_phrases: Optional[List[str]] = None
+) -> MetricValue[Optional[float]]:
     '''Calculates the degree to which the LLM's output contains a disclaimer
     that it is an AI. This is calculated by computing the semantic similarity
     between the generated outputs and a reference AI disclaimer phrase; by
@@ -499,6 +500,11 @@ def ai_disclaimer_similarity(
             have personal opinions, emotions, or consciousness."
         eval_model: The type of model to use ('local' or the EvalClient instance
             used for the evaluation). default 'local'
+        ai_disclaimer_phrases: A bank of reference AI disclaimer phrases to use
+            instead of `ai_disclaimer_phrase`. Each output is scored by its
+            highest similarity to any of the phrases. The bank is embedded
+            once and cached across calls, so the cost barely grows with the
+            number of phrases.
 
     Returns:
         An :class:`~langcheck.metrics.metric_value.MetricValue` object
@@ -506,20 +512,48 @@ def ai_disclaimer_similarity(
     generated_outputs, prompts = validate_parameters_reference_free(
         generated_outputs, prompts)
 
-    ai_disclaimer_phrase_list = [ai_disclaimer_phrase] * len(generated_outputs)
-    semantic_similarity_values = semantic_similarity(generated_outputs,
-                                                     ai_disclaimer_phrase_list,
-                                                     prompts, eval_model)
+    scores = _phrase_bank_similarity(
+        generated_outputs, ai_disclaimer_phrases or [ai_disclaimer_phrase],
+        eval_model, 'en')
     return MetricValue(metric_name='ai_disclaimer_similarity',
                        prompts=prompts,
                        generated_outputs=generated_outputs,
                        reference_outputs=None,
                        sources=None,
                        explanations=None,
-                       metric_values=semantic_similarity_values.metric_values,
+                       metric_values=scores,
                        language='en')
 
 
+def _phrase_bank_similarity(generated_outputs: List[str], phrases: List[str],
+                            eval_model: str | EvalClient,
+                            language: str) -> List[Optional[float]]:
+    '''Scores each generated output by its highest semantic similarity to the
+    phrases, with the embedding model of `semantic_similarity()` for the
+    language.
+
+    Args:
+        generated_outputs: The model generated outputs to evaluate
+        phrases: The bank of reference phrases
+        eval_model: The type of model to use ('local' or the EvalClient instance
+            used for the evaluation)
+        language: The language of the local embedding model
+
+    Returns:
+        A list of scores
+    '''
+    if eval_model == 'local':
+        scorer = SentenceTransformerSimilarityScorer(language=language)
+    else:  # EvalClient
+        assert isinstance(
+            eval_model, EvalClient
+        ), 'An EvalClient must be provided for non-local model types.'
+        scorer = eval_model.similarity_scorer()
+    return scorer.max_similarity(generated_outputs, phrases)
+
+
+@attach_eval_client_stats
+@attach_timed_out
 def answer_relevance(generated_outputs: List[str] | str,
                      prompts: List[str] | str,
                      eval_model: EvalClient) -> MetricValue[Optional[float]]:
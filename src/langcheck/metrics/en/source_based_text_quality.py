@@ -1,33 +1,35 @@
 from __future__ import annotations
 
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 import nltk
-import torch
-import torch.nn as nn
-from transformers.models.auto.configuration_auto import AutoConfig
-from transformers.models.auto.modeling_auto import AutoModelForSeq2SeqLM
-from transformers.models.auto.tokenization_auto import AutoTokenizer
 
+from langcheck.metrics._deadline import (attach_timed_out, collect_timed_out,
+                                         merge_timed_out, record_timed_out)
 from langcheck.metrics._validation import (
     validate_parameters_context_relevance, validate_parameters_source_based)
 from langcheck.metrics.eval_clients import EvalClient
+from langcheck.metrics.eval_clients._stats import attach_eval_client_stats
 from langcheck.metrics.metric_value import MetricValue
-from langcheck.utils.progess_bar import tqdm_wrapper
+from langcheck.metrics.scorer.unieval_models import \
+    UniEvalFactualConsistencyScorer
+from langcheck.utils.progress_bar import tqdm_wrapper
 
 from ..prompts._utils import get_template
 
-_factual_consistency_model_path = 'MingZhong/unieval-fact'
-_factual_consistency_config = None
-_factual_consistency_tokenizer = None
-_factual_consistency_model = None
-
 
+@attach_eval_client_stats
+@attach_timed_out
 def factual_consistency(
         generated_outputs: List[str] | str,
         sources: List[str] | str,
         prompts: Optional[List[str] | str] = None,
-        eval_model: str | EvalClient = 'local') -> MetricValue[Optional[float]]:
+        eval_model: str | EvalClient = 'local',
+        local_overflow_strategy: str = 'truncate',
+        local_device: str = 'cpu',
+        local_batch_size: int = 8,
+        local_top_k_chunks: Optional[int] = None,
+        local_chunk_sentences: int = 3) -> MetricValue[Optional[float]]:
     '''Calculates the factual consistency between the generated outputs and
     the sources. This metric takes on float values between [0, 1], where 0
     means that the output is not at all consistent with the source text, and 1
@@ -52,6 +54,24 @@ def factual_consistency(
             optional metadata and not used to calculate the metric.
         eval_model: The type of model to use ('local' or the EvalClient instance
             used for the evaluation). default 'local'
+        local_overflow_strategy: The strategy to handle the inputs that are too
+            long for the local model. The value should be either "raise",
+            "truncate" or "nullify". default 'truncate'
+        local_device: The device on which the local model is run, e.g. 'cuda'.
+            default 'cpu'
+        local_batch_size: The number of generated sentences scored in one
+            forward pass of the local model. default 8
+        local_top_k_chunks: If set, the local model checks each generated
+            sentence against only the `local_top_k_chunks` chunks of the source
+            that are the most similar to it (according to the 'en'
+            semantic_similarity model), instead of the whole source truncated
+            to the model's maximum input length. The highest score of those
+            chunks is the score of the sentence. This is useful for long
+            sources, since the cost grows with the number of generated
+            sentences times `local_top_k_chunks` rather than with the length of
+            the sources. default None
+        local_chunk_sentences: The number of consecutive source sentences in
+            each chunk when `local_top_k_chunks` is set. default 3
 
     Returns:
         An MetricValue object
@@ -60,7 +80,11 @@ def factual_consistency(
         generated_outputs, sources, prompts)
 
     if eval_model == 'local':
-        scores = _factual_consistency_local(generated_outputs, sources)
+        scores = _factual_consistency_local(generated_outputs, sources,
+                                            local_overflow_strategy,
+                                            local_device, local_batch_size,
+                                            local_top_k_chunks,
+                                            local_chunk_sentences)
         explanations = None
     else:  # EvalClient
         assert isinstance(
@@ -79,8 +103,14 @@ def factual_consistency(
                        language='en')
 
 
-def _factual_consistency_local(generated_outputs: List[str],
-                               sources: List[str]) -> List[float]:
+def _factual_consistency_local(
+        generated_outputs: List[str],
+        sources: List[str],
+        overflow_strategy: str = 'truncate',
+        device: str = 'cpu',
+        batch_size: int = 8,
+        top_k_chunks: Optional[int] = None,
+        chunk_sentences: int = 3) -> List[Optional[float]]:
     '''Calculates the factual consistency between each generated sentence and
     its corresponding source text. The factual consistency score for one
     generated output is computed as the average of the per-sentence
@@ -94,6 +124,14 @@ def _factual_consistency_local(generated_outputs: List[str],
     Args:
         generated_outputs: The model generated output(s) to evaluate
         sources: The source text(s), one string per generated output
+        overflow_strategy: The strategy to handle inputs that are too long for
+            the model ('truncate', 'raise' or 'nullify')
+        device: The device on which the model is run
+        batch_size: The number of inputs scored in one forward pass
+        top_k_chunks: If set, each source is split into chunks, and each
+            generated sentence is only scored against the `top_k_chunks`
+            chunks that are the most similar to it, taking the highest score
+        chunk_sentences: The number of source sentences in each chunk
 
     Returns:
         A list of scores
@@ -119,76 +157,159 @@ def _factual_consistency_local(generated_outputs: List[str],
         gen_sentences_list += gen_sentences
         srcs_list += [src] * len(gen_sentences)
 
-    global _factual_consistency_config, _factual_consistency_tokenizer, \
-        _factual_consistency_model
-    if _factual_consistency_config is None:
-        _factual_consistency_config = AutoConfig.from_pretrained(
-            _factual_consistency_model_path)
-    if _factual_consistency_tokenizer is None:
-        _factual_consistency_tokenizer = AutoTokenizer.from_pretrained(
-            _factual_consistency_model_path)
-    if _factual_consistency_model is None:
-        _factual_consistency_model = AutoModelForSeq2SeqLM.from_pretrained(
-            _factual_consistency_model_path, config=_factual_consistency_config)
-        _factual_consistency_model.eval()
-
-    pos_id = _factual_consistency_tokenizer('Yes')['input_ids'][0]
-    neg_id = _factual_consistency_tokenizer('No')['input_ids'][0]
-    softmax = nn.Softmax(dim=1)
-
-    model_input_list = []
-    for src, gen in zip(srcs_list, gen_sentences_list):
-        model_input = (
-            f'question: Is this claim consistent with the document? </s> '
-            f'claim: {gen} </s> '
-            f'document: {src}')
-
-        model_input_list.append(model_input)
-
-    # Specifying the targets is required to run the model, but has no effect on
-    # the score
-    target_list = ["No" for _ in range(len(model_input_list))]
-
-    batch_size = 8
-    score_list = []
-    for i in tqdm_wrapper(range(0, len(model_input_list), batch_size),
-                          total=(len(model_input_list) + batch_size - 1) //
-                          batch_size):
-        inputs = model_input_list[i:i + batch_size]
-        targets = target_list[i:i + batch_size]
-
-        with torch.no_grad():
-            encoded_inputs = _factual_consistency_tokenizer(inputs,
-                                                            truncation=True,
-                                                            padding=True,
-                                                            return_tensors='pt')
-            encoded_targets = _factual_consistency_tokenizer(
-                targets, truncation=True, padding=True, return_tensors='pt')
-            inputs_tokens = encoded_inputs['input_ids']
-            inputs_mask = encoded_inputs['attention_mask']
-            targets_tokens = encoded_targets['input_ids'][:, 0].unsqueeze(-1)
-
-            outputs = _factual_consistency_model(input_ids=inputs_tokens,
-                                                 attention_mask=inputs_mask,
-                                                 labels=targets_tokens)
-            logits = outputs.logits.view(
-                -1, _factual_consistency_model.config.vocab_size)
-            pos_score = softmax(logits)[:, pos_id]
-            neg_score = softmax(logits)[:, neg_id]
-            score_list += [
-                x.item() for x in pos_score / (pos_score + neg_score)
-            ]
-
-    # The score for each output is the average of the scores of its sentences
-    score_per_output = []
-    start_idx = 0
-    for num in tqdm_wrapper(num_sentences_list, desc='Calculating scores'):
-        scores_for_output = score_list[start_idx:start_idx + num]
-        score_per_output.append(sum(scores_for_output) / num)
-        start_idx += num
+    if top_k_chunks is None:
+        chunks_per_sentence = [[src] for src in srcs_list]
+    else:
+        chunks_per_sentence = _top_k_source_chunks(gen_sentences_list,
+                                                   srcs_list, top_k_chunks,
+                                                   chunk_sentences)
+
+    scorer = UniEvalFactualConsistencyScorer(
+        language='en',
+        device=device,
+        batch_size=batch_size,
+        overflow_strategy=overflow_strategy)
+    with collect_timed_out() as records:
+        chunk_scores = scorer.score([
+            (gen_sentence, chunk) for gen_sentence, chunks in zip(
+                gen_sentences_list, chunks_per_sentence) for chunk in chunks
+        ])
+    chunk_timed_out = merge_timed_out(records, chunk_scores)
+
+    # The score for each sentence is the score of its most consistent chunk,
+    # and the score for each output is the average of the scores of its
+    # sentences. The outputs with a sentence that could not be scored (because
+    # it was too long or was not scored before the deadline) are None.
+    score_list, sentence_timed_out = _aggregate_scores(
+        chunk_scores, chunk_timed_out,
+        [len(chunks) for chunks in chunks_per_sentence], max)
+    score_per_output, timed_out = _aggregate_scores(
+        score_list, sentence_timed_out, num_sentences_list,
+        lambda scores: sum(scores) / len(scores))
+    if timed_out is not None:
+        record_timed_out(timed_out)
     return score_per_output
 
 
+def _aggregate_scores(
+    scores: List[Optional[float]], timed_out: Optional[List[bool]],
+    group_sizes: List[int], aggregate_fn: Callable[[List[float]], float]
+) -> Tuple[List[Optional[float]], Optional[List[bool]]]:
+    '''Aggregates consecutive groups of scores. A group with a score that is
+    None is aggregated to None, and it is timed out if one of its scores timed
+    out.
+
+    Args:
+        scores: The scores to aggregate
+        timed_out: Whether each score timed out, or None if none did
+        group_sizes: The number of scores in each group
+        aggregate_fn: The function aggregating the scores of a group
+
+    Returns:
+        The aggregated score and whether it timed out, for each group
+    '''
+    aggregated_scores: List[Optional[float]] = []
+    aggregated_timed_out = []
+    start_idx = 0
+    for size in group_sizes:
+        group_scores = scores[start_idx:start_idx + size]
+        aggregated_timed_out.append(timed_out is not None and
+                                    any(timed_out[start_idx:start_idx + size]))
+        if any(score is None for score in group_scores):
+            aggregated_scores.append(None)
+        else:
+            aggregated_scores.append(aggregate_fn(group_scores))  # type: ignore
+        start_idx += size
+    return aggregated_scores, (aggregated_timed_out
+                               if any(aggregated_timed_out) else None)
+
+
+def _top_k_source_chunks(gen_sentences: List[str], sources: List[str],
+                         top_k: int, chunk_sentences: int) -> List[List[str]]:
+    '''Splits each unique source into chunks of `chunk_sentences` consecutive
+    sentences, and returns the `top_k` chunks of its source that are the most
+    similar to each generated sentence, in the order of the source.
+
+    Args:
+        gen_sentences: The generated sentences
+        sources: The source text of each generated sentence
+        top_k: The number of chunks to keep for each generated sentence
+        chunk_sentences: The number of sentences in each chunk
+
+    Returns:
+        The list of chunks for each generated sentence
+    '''
+    source_chunks = {}
+    for source in dict.fromkeys(sources):
+        source_sentences = nltk.tokenize.sent_tokenize(source)
+        source_chunks[source] = [
+            ' '.join(source_sentences[i:i + chunk_sentences])
+            for i in range(0, len(source_sentences), chunk_sentences)
+        ] or [source]
+    return _retrieve_chunks(gen_sentences, sources, source_chunks, top_k)
+
+
+def _retrieve_chunks(gen_sentences: List[str], sources: List[str],
+                     source_chunks: Dict[str, List[str]],
+                     top_k: int) -> List[List[str]]:
+    '''Returns the `top_k` chunks of its source that are the most similar to
+    each generated sentence, in the order of the source. The chunks of each
+    unique source are embedded once with the English semantic similarity
+    model, and the chunks of a source are compared with all of its generated
+    sentences at once.
+
+    Args:
+        gen_sentences: The generated sentences
+        sources: The source text of each generated sentence
+        source_chunks: The chunks of each unique source
+        top_k: The number of chunks to keep for each generated sentence
+
+    Returns:
+        The list of chunks for each generated sentence
+    '''
+    from langcheck.metrics.model_manager import manager
+    model = manager.fetch_model(language='en', metric='semantic_similarity')
+
+    # Only the sources with more than `top_k` chunks need to be pruned
+    sentence_indices: Dict[str, List[int]] = {}
+    for i, source in enumerate(sources):
+        if len(source_chunks[source]) > top_k:
+            sentence_indices.setdefault(source, []).append(i)
+    chunks_per_sentence = [source_chunks[source] for source in sources]
+    if not sentence_indices:
+        return chunks_per_sentence
+
+    pruned_sources = list(sentence_indices)
+    chunk_embeddings = model.encode(  # type: ignore
+        [chunk for source in pruned_sources for chunk in source_chunks[source]],
+        convert_to_tensor=True,
+        normalize_embeddings=True)
+    sentence_embeddings = model.encode(  # type: ignore
+        [
+            gen_sentences[i]
+            for source in pruned_sources
+            for i in sentence_indices[source]
+        ],
+        convert_to_tensor=True,
+        normalize_embeddings=True)
+
+    chunk_start = sentence_start = 0
+    for source in pruned_sources:
+        chunks = source_chunks[source]
+        indices = sentence_indices[source]
+        similarities = sentence_embeddings[sentence_start:sentence_start +
+                                           len(indices)] @ chunk_embeddings[
+                                               chunk_start:chunk_start +
+                                               len(chunks)].T
+        top_k_indices = similarities.topk(
+            top_k, dim=-1).indices.sort(dim=-1).values.tolist()
+        for i, chunk_indices in zip(indices, top_k_indices):
+            chunks_per_sentence[i] = [chunks[j] for j in chunk_indices]
+        chunk_start += len(chunks)
+        sentence_start += len(indices)
+    return chunks_per_sentence
+
+
 def _factual_consistency_eval_client(
     generated_outputs: List[str], sources: List[str], eval_client: EvalClient
 ) -> Tuple[List[Optional[float]], List[Optional[str]]]:
@@ -234,6 +355,8 @@ def _factual_consistency_eval_client(
     return scores, explanations
 
 
+@attach_eval_client_stats
+@attach_timed_out
 def context_relevance(sources: List[str] | str, prompts: List[str] | str,
                       eval_model: EvalClient) -> MetricValue[Optional[float]]:
     '''Calculates the relevance of the sources to the prompts. This metric takes
@@ -1,9 +1,20 @@
 from langcheck.metrics.eval_clients._base import EvalClient
+from langcheck.metrics.eval_clients._causal_lm import CausalLMEvalClient
 from langcheck.metrics.eval_clients._openai import (AzureOpenAIEvalClient,
                                                     OpenAIEvalClient)
+from langcheck.metrics.eval_clients._openai_compatible import \
+    OpenAICompatibleEvalClient
+from langcheck.metrics.eval_clients._stats import (EvalClientStats,
+                                                   RequestStats,
+                                                   collect_eval_client_stats)
 
 __all__ = [
     'AzureOpenAIEvalClient',
+    'CausalLMEvalClient',
     'EvalClient',
+    'EvalClientStats',
+    'OpenAICompatibleEvalClient',
     'OpenAIEvalClient',
+    'RequestStats',
+    'collect_eval_client_stats',
 ]
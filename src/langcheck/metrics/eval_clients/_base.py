@@ -1,8 +1,18 @@
 from __future__ import annotations
 
-from typing import Iterable
+from contextlib import nullcontext
+from typing import Callable, Hashable, Iterable, Sequence, TypeVar
 
+from .._deadline import (collect_timed_out, deadline, merge_timed_out,
+                         record_timed_out, time_remaining)
 from ..scorer._base import BaseSimilarityScorer
+from ._stats import RequestStats, record_request
+
+_T = TypeVar('_T', bound=Hashable)
+
+# The share of the remaining time budget that the first stage of get_score can
+# use. The second stage sends shorter prompts and receives shorter responses.
+_TEXT_RESPONSE_TIME_SHARE = 0.75
 
 
 class EvalClient:
@@ -10,6 +20,9 @@ class EvalClient:
     Most of metrics that uses external APIs such as OpenAI API calls the
     functions defined in this class to do the evaluation.
     '''
+    # Functions called with the RequestStats of every request sent by the
+    # client. Concrete subclasses set this in their constructors.
+    _stats_callbacks: Sequence[Callable[[RequestStats], None]] = ()
 
     def get_text_responses(
             self,
@@ -98,14 +111,54 @@ class EvalClient:
         '''
         if isinstance(prompts, str):
             prompts = [prompts]
-        unstructured_assessment_result = self.get_text_responses(
-            prompts, tqdm_description=intermediate_tqdm_description)
-        scores = self.get_float_score(metric_name,
-                                      language,
-                                      unstructured_assessment_result,
-                                      score_map,
-                                      tqdm_description=score_tqdm_description)
-        return scores, unstructured_assessment_result
+        # Identical prompts (e.g. duplicate rows in the dataset) are only sent
+        # once, and so are identical unstructured assessments in the second
+        # stage. The results are then fanned back out to every row.
+        unique_prompts, prompt_indices = _deduplicate(prompts)
+        # If there is a deadline, part of the remaining time is left for the
+        # second stage so that the rows whose first stage finished in time can
+        # still be scored
+        remaining = time_remaining()
+        with collect_timed_out() as text_response_records, (deadline(
+                remaining * _TEXT_RESPONSE_TIME_SHARE) if remaining is not None
+                                                            else nullcontext()):
+            unstructured_assessment_result = self.get_text_responses(
+                unique_prompts, tqdm_description=intermediate_tqdm_description)
+        unique_assessments, assessment_indices = _deduplicate(
+            unstructured_assessment_result)
+        with collect_timed_out() as float_score_records:
+            unique_scores = self.get_float_score(
+                metric_name,
+                language,
+                unique_assessments,
+                score_map,
+                tqdm_description=score_tqdm_description)
+        scores = [unique_scores[assessment_indices[i]] for i in prompt_indices]
+
+        # A row timed out if its request timed out in either stage
+        text_response_timed_out = merge_timed_out(
+            text_response_records, unstructured_assessment_result)
+        float_score_timed_out = merge_timed_out(float_score_records,
+                                                unique_scores)
+        if text_response_timed_out or float_score_timed_out:
+            record_timed_out([
+                bool(text_response_timed_out and text_response_timed_out[i]) or
+                bool(float_score_timed_out and
+                     float_score_timed_out[assessment_indices[i]])
+                for i in prompt_indices
+            ])
+        return scores, [
+            unstructured_assessment_result[i] for i in prompt_indices
+        ]
+
+    def _record_request(self, request_stats: RequestStats) -> None:
+        '''Records the stats of one request sent by the client. Concrete
+        subclasses should call this for every request so that the stats are
+        aggregated per metric call and passed to the stats callbacks.
+        '''
+        record_request(request_stats)
+        for callback in self._stats_callbacks:
+            callback(request_stats)
 
     def similarity_scorer(self) -> BaseSimilarityScorer:
         '''Get the BaseSimilarityScorer object that corresponds to the
@@ -113,3 +166,14 @@ class EvalClient:
         TODO: Intergrate scorer/ with eval_clients/
         '''
         raise NotImplementedError
+
+
+def _deduplicate(items: Iterable[_T]) -> tuple[list[_T], list[int]]:
+    '''Returns the unique items in the order of their first occurrence, and
+    the index in the unique items of every input item.
+    '''
+    unique_indices: dict[_T, int] = {}
+    indices = [
+        unique_indices.setdefault(item, len(unique_indices)) for item in items
+    ]
+    return list(unique_indices), indices
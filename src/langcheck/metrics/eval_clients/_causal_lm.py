@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import copy
+from typing import Any, Iterable
+
+import torch
+from transformers.models.auto.modeling_auto import AutoModelForCausalLM
+from transformers.models.auto.tokenization_auto import AutoTokenizer
+
+from langcheck._handle_logs import _handle_logging_level
+from langcheck.profiling import profiled
+from langcheck.utils.progress_bar import tqdm_wrapper
+
+from .._deadline import deadline_exceeded, record_timed_out
+from ..prompts._utils import get_template
+from ._base import EvalClient, _deduplicate
+
+
+class CausalLMEvalClient(EvalClient):
+    '''EvalClient defined for a local Hugging Face causal language model.
+
+    Instead of generating a free-text assessment and then extracting the
+    result from it, this client scores each option in the ``score_map`` by the
+    log-probability that the model assigns to the tokens of that option, and
+    picks the most likely one. All (prompt, option) pairs are scored with
+    batched forward passes, and the key/value cache of the prompt prefix shared
+    by all prompts (typically the static part of the Jinja template) is only
+    computed once. This makes the evaluation cheap, deterministic and possible
+    to run offline.
+    '''
+
+    def __init__(self,
+                 model_name: str | None = None,
+                 *,
+                 model: Any | None = None,
+                 tokenizer: Any | None = None,
+                 model_revision: str | None = None,
+                 device: str = 'cpu',
+                 batch_size: int = 8,
+                 reuse_prefix_cache: bool = True):
+        '''
+        Initialize the causal LM evaluation client. Either ``model_name`` or
+        both ``model`` and ``tokenizer`` need to be specified.
+
+        Args:
+            model_name: (Optional) The name or path of the Hugging Face causal
+                LM to load.
+            model: (Optional) An already loaded causal LM to use.
+            tokenizer: (Optional) The tokenizer corresponding to ``model``.
+            model_revision: (Optional) The revision of the model to load.
+            device: (Optional) The device on which the model is run
+                (default 'cpu').
+            batch_size: (Optional) The number of (prompt, option) pairs scored
+                in one forward pass.
+            reuse_prefix_cache: (Optional) If True, the key/value cache of the
+                prefix shared by all prompts is computed once and reused for
+                every (prompt, option) pair.
+        '''
+        if model is not None and tokenizer is not None:
+            self._model = model
+            self._tokenizer = tokenizer
+        else:
+            assert model_name is not None, (
+                'You need to specify either the model_name or both the model '
+                'and the tokenizer to use the CausalLMEvalClient.')
+            with _handle_logging_level():
+                self._tokenizer = AutoTokenizer.from_pretrained(
+                    model_name, revision=model_revision)
+                self._model = AutoModelForCausalLM.from_pretrained(
+                    model_name, revision=model_revision)
+
+        if self._tokenizer.pad_token_id is None:
+            self._tokenizer.pad_token = self._tokenizer.eos_token
+
+        self._device = device
+        self._model.to(device)  # type: ignore
+        self._model.eval()  # type: ignore
+        self._batch_size = batch_size
+        self._reuse_prefix_cache = reuse_prefix_cache
+
+    def get_score(
+        self,
+        metric_name: str,
+        language: str,
+        prompts: str | Iterable[str],
+        score_map: dict[str, float],
+        *,
+        intermediate_tqdm_description: str | None = None,
+        score_tqdm_description: str | None = None
+    ) -> tuple[list[float | None], list[str | None]]:
+        '''Give scores to texts embedded in the given prompts. Each prompt is
+        extended with the list of available assessments, and the score of the
+        assessment with the highest log-probability is returned. The
+        "explanation" of each score is the selected assessment, since no free
+        text is generated.
+
+        Args:
+            metric_name: The name of the metric to be used. (e.g. "toxicity")
+            language: The language of the prompts. (e.g. "en")
+            prompts: The prompts that contain the original text to be scored,
+                the evaluation criteria... etc. Typically it is based on the
+                Jinja prompt templates and instantiated withing each metric
+                function.
+            score_map: The mapping from the short assessment results
+                (e.g. "Good") to the scores.
+            intermediate_tqdm_description: Not used by this client.
+            score_tqdm_description: The description to be shown in the tqdm
+                bar for the score calculation.
+
+        Returns:
+            A tuple of two lists. The first list contains the scores for each
+            prompt and the second list contains the selected assessment for
+            each prompt.
+        '''
+        if language not in ['en', 'ja', 'de']:
+            raise ValueError(f'Unsupported language: {language}')
+        if isinstance(prompts, str):
+            prompts = [prompts]
+
+        # Identical prompts are only scored once
+        unique_prompts, prompt_indices = _deduplicate(prompts)
+        template = get_template(f'{language}/get_score/causal_lm.j2')
+        options = list(score_map.keys())
+        scoring_prompts = [
+            template.render({
+                'prompt': prompt,
+                'options': options
+            }) for prompt in unique_prompts
+        ]
+        # The assessment follows "[Assessment]:" with a space, except for
+        # languages that do not separate words with spaces
+        continuations = [
+            option if language == 'ja' else f' {option}' for option in options
+        ]
+
+        log_probs = self._option_log_probs(
+            scoring_prompts,
+            continuations,
+            tqdm_description=score_tqdm_description or 'Scores')
+
+        # The rows that were not scored before the deadline are None
+        unique_assessments = [
+            options[max(range(len(options)), key=lambda i: row[i])]
+            if row is not None else None for row in log_probs
+        ]
+        if any(row is None for row in log_probs):
+            record_timed_out([log_probs[i] is None for i in prompt_indices])
+        assessments = [unique_assessments[i] for i in prompt_indices]
+        scores: list[float | None] = [
+            score_map[assessment] if assessment is not None else None
+            for assessment in assessments
+        ]
+        explanations: list[str | None] = list(assessments)
+        return scores, explanations
+
+    def _option_log_probs(
+            self,
+            prompts: list[str],
+            continuations: list[str],
+            *,
+            tqdm_description: str | None = None) -> list[list[float] | None]:
+        '''Compute the log-probability of each continuation given each prompt.
+
+        Args:
+            prompts: The prompts to condition on.
+            continuations: The candidate continuations of every prompt.
+            tqdm_description: The description to be shown in the tqdm bar.
+
+        Returns:
+            A ``len(prompts) x len(continuations)`` nested list, where each
+            element is the sum of the token log-probabilities of the
+            continuation. The rows of the prompts that could not be scored
+            before the active deadline are None.
+        '''
+        prompt_ids = [
+            self._tokenizer(prompt)['input_ids']  # type: ignore
+            for prompt in prompts
+        ]
+        continuation_ids = [
+            self._tokenizer(continuation, add_special_tokens=False)['input_ids']
+            for continuation in continuations
+        ]
+
+        # The static part of the prompt template is shared by all prompts, so
+        # we compute its key/value cache only once. At least one token of each
+        # prompt is kept out of the prefix so that the first token of every
+        # continuation has logits to be scored against.
+        prefix_length = 0
+        if self._reuse_prefix_cache:
+            prefix_length = _common_prefix_length(prompt_ids)
+            prefix_length = min(prefix_length,
+                                min(len(ids) for ids in prompt_ids) - 1)
+        prefix_cache = None
+        if prefix_length > 0:
+            with torch.no_grad():
+                prefix_input = torch.tensor([prompt_ids[0][:prefix_length]],
+                                            device=self._device)
+                prefix_cache = self._model(  # type: ignore
+                    input_ids=prefix_input, use_cache=True).past_key_values
+
+        # Flatten all (prompt, continuation) pairs so that they are scored in
+        # as few forward passes as possible
+        pairs = [(i, j)
+                 for i in range(len(prompts))
+                 for j in range(len(continuations))]
+        pair_log_probs: list[float] = []
+        for start in tqdm_wrapper(range(0, len(pairs), self._batch_size),
+                                  desc=tqdm_description,
+                                  total=(len(pairs) + self._batch_size - 1) //
+                                  self._batch_size):
+            if deadline_exceeded():
+                break
+            batch_pairs = pairs[start:start + self._batch_size]
+            sequences = [
+                prompt_ids[i][prefix_length:] + continuation_ids[j]
+                for i, j in batch_pairs
+            ]
+            num_target_tokens = [
+                len(continuation_ids[j]) for _, j in batch_pairs
+            ]
+            pair_log_probs.extend(
+                self._score_sequences(sequences, num_target_tokens,
+                                      prefix_length, prefix_cache))
+
+        num_continuations = len(continuations)
+        return [
+            pair_log_probs[i * num_continuations:(i + 1) * num_continuations] if
+            (i + 1) * num_continuations <= len(pair_log_probs) else None
+            for i in range(len(prompts))
+        ]
+
+    @profiled(input_size=lambda self, sequences, *args: len(sequences))
+    def _score_sequences(self, sequences: list[list[int]],
+                         num_target_tokens: list[int], prefix_length: int,
+                         prefix_cache: Any) -> list[float]:
+        '''Run one forward pass over the right-padded sequences and return the
+        summed log-probabilities of the last ``num_target_tokens`` tokens of
+        each sequence.
+        '''
+        batch_size = len(sequences)
+        max_length = max(len(sequence) for sequence in sequences)
+        pad_id = self._tokenizer.pad_token_id
+        input_ids = torch.tensor(
+            [s + [pad_id] * (max_length - len(s)) for s in sequences],
+            device=self._device)
+        attention_mask = torch.tensor([[1] * (prefix_length + len(s)) + [0] *
+                                       (max_length - len(s))
+                                       for s in sequences],
+                                      device=self._device)
+
+        model_inputs: dict[str, Any] = {
+            'input_ids': input_ids,
+            'attention_mask': attention_mask
+        }
+        if prefix_cache is not None:
+            model_inputs['past_key_values'] = _expand_cache(
+                prefix_cache, batch_size)
+            model_inputs['use_cache'] = True
+
+        with torch.no_grad():
+            logits = self._model(**model_inputs).logits  # type: ignore
+            log_probs = torch.log_softmax(logits.float(), dim=-1)
+
+        results = []
+        for row, (sequence,
+                  num_targets) in enumerate(zip(sequences, num_target_tokens)):
+            # The logits at position t predict the token at position t + 1
+            target_positions = torch.arange(len(sequence) - num_targets,
+                                            len(sequence),
+                                            device=self._device)
+            targets = input_ids[row, target_positions]
+            token_log_probs = log_probs[row, target_positions - 1, targets]
+            results.append(token_log_probs.sum().item())
+        return results
+
+
+def _common_prefix_length(token_ids: list[list[int]]) -> int:
+    '''Returns the length of the longest common prefix of the token ids.'''
+    prefix_length = min(len(ids) for ids in token_ids)
+    first = token_ids[0]
+    for ids in token_ids[1:]:
+        for position in range(prefix_length):
+            if ids[position] != first[position]:
+                prefix_length = position
+                break
+    return prefix_length
+
+
+def _expand_cache(cache: Any, batch_size: int) -> Any:
+    '''Returns a copy of the key/value cache computed for a single sequence,
+    repeated along the batch dimension. The copy is needed because the model
+    appends to the cache during the forward pass.
+    '''
+    if hasattr(cache, 'batch_repeat_interleave'):
+        expanded_cache = copy.deepcopy(cache)
+        expanded_cache.batch_repeat_interleave(batch_size)
+        return expanded_cache
+    # Legacy caches are tuples of (key, value) tensors per layer
+    return tuple(
+        tuple(
+            tensor.expand(batch_size, *tensor.shape[1:]).contiguous()
+            for tensor in layer)
+        for layer in cache)
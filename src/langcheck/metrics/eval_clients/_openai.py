@@ -1,29 +1,112 @@
 from __future__ import annotations
 
 import asyncio
+import contextvars
 import json
 import os
-from typing import Any, Iterable
+import random
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Hashable, Iterable, Sequence, Sized
 
 import torch
 from openai import AsyncAzureOpenAI, AsyncOpenAI, AzureOpenAI, OpenAI
 
-from langcheck.utils.progess_bar import tqdm_wrapper
+from langcheck.profiling import profile_stage, profiled
+from langcheck.utils.progress_bar import tqdm_wrapper
 
+from .._deadline import (DeadlineExceeded, deadline_exceeded, record_timed_out,
+                         time_remaining)
 from ..prompts._utils import get_template
 from ..scorer._base import BaseSimilarityScorer
 from ._base import EvalClient
+from ._stats import RequestStats, record_request
+
+
+def _with_request_timeout(model_input: dict[str, Any]) -> dict[str, Any]:
+    '''Returns the arguments of a request, with the time remaining before the
+    active deadline (if any) as its timeout.
+    '''
+    remaining = time_remaining()
+    if remaining is None:
+        return model_input
+    return {**model_input, 'timeout': remaining}
+
+
+# The delay before the first retry of a failed request, which doubles on each
+# retry up to the maximum
+_INITIAL_RETRY_DELAY = 0.5
+_MAX_RETRY_DELAY = 8.0
+# The longest delay requested by the server that is waited for
+_MAX_RETRY_AFTER = 60.0
+
+
+def _retry_after(error: Exception) -> float | None:
+    '''Returns the number of seconds to wait before retrying that the server
+    requested in the `Retry-After` (or `retry-after-ms`) header of the error
+    response, or None if there is no such header.
+    '''
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if headers is None:
+        return None
+    try:
+        if headers.get('retry-after-ms') is not None:
+            return float(headers['retry-after-ms']) / 1000
+        retry_after = headers.get('retry-after')
+        if retry_after is None:
+            return None
+        try:
+            return float(retry_after)
+        except ValueError:
+            # The header can also be an HTTP date
+            return (parsedate_to_datetime(retry_after).timestamp() -
+                    time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _retry_delay(error: Exception, retries: int) -> float:
+    '''Returns the number of seconds to wait before retrying a request that
+    failed with `error` after `retries` retries. This is the delay requested by
+    the server if any, and otherwise an exponential backoff with full jitter,
+    so that the clients that failed at the same time do not retry at the same
+    time. The delay is cut short at the active deadline (if any).
+    '''
+    delay = _retry_after(error)
+    if delay is None:
+        delay = random.uniform(
+            0, min(_MAX_RETRY_DELAY, _INITIAL_RETRY_DELAY * 2**retries))
+    delay = min(max(delay, 0.0), _MAX_RETRY_AFTER)
+    remaining = time_remaining()
+    if remaining is not None:
+        delay = min(delay, max(remaining, 0.0))
+    return delay
+
+
+def _num_prompts(self: Any, prompts: Iterable[str | None], *args: Any,
+                 **kwargs: Any) -> int | None:
+    '''Returns the number of prompts passed to `_call_api`, for profiling.'''
+    return len(prompts) if isinstance(prompts, Sized) else None
 
 
 class OpenAIEvalClient(EvalClient):
     '''EvalClient defined for OpenAI API.
     '''
+    # The number of requests sent concurrently by the sync client
+    _max_concurrency: int = 1
 
     def __init__(self,
                  openai_client: OpenAI | None = None,
                  openai_args: dict[str, str] | None = None,
                  *,
-                 use_async: bool = False):
+                 use_async: bool = False,
+                 max_retries: int = 0,
+                 stats_callbacks: Sequence[Callable[[RequestStats], None]] |
+                 None = None):
         '''
         Intialize the OpenAI evaluation client.
 
@@ -32,6 +115,13 @@ class OpenAIEvalClient(EvalClient):
             openai_args: (Optional) dict of additional args to pass in to the
             ``client.chat.completions.create`` function
             use_async: (Optional) If True, the async client will be used.
+            max_retries: (Optional) The number of times a failed request is
+                retried by the evaluation client, after an exponential backoff
+                or the delay in the `Retry-After` header of the response. This
+                is in addition to the retries done inside the OpenAI client.
+            stats_callbacks: (Optional) Functions called with the
+                :class:`~langcheck.metrics.eval_clients.RequestStats` (token
+                usage, latency, retries and error) of every request.
         '''
         if openai_client:
             self._client = openai_client
@@ -42,21 +132,45 @@ class OpenAIEvalClient(EvalClient):
 
         self._openai_args = openai_args
         self._use_async = use_async
+        self._max_retries = max_retries
+        self._stats_callbacks = stats_callbacks or []
 
+    @profiled(input_size=_num_prompts)
     def _call_api(self,
                   prompts: Iterable[str | None],
                   config: dict[str, str],
                   *,
                   tqdm_description: str | None = None) -> list[Any]:
-        # A helper function to call the API with exception filter for alignment
-        # of exception handling with the async version.
-        def _call_api_with_exception_filter(model_input: dict[str, Any]) -> Any:
+        # A helper function to call the API with retries. The exception of the
+        # last attempt is returned instead of being raised for alignment of
+        # exception handling with the async version. No request is sent for a
+        # prompt that is None, whose model input is None.
+        def _call_api_with_exception_filter(
+                model_input: dict[str, Any] | None) -> Any:
             if model_input is None:
                 return None
-            try:
-                return self._client.chat.completions.create(**model_input)
-            except Exception as e:
-                return e
+            start_time = time.perf_counter()
+            for retries in range(self._max_retries + 1):
+                if deadline_exceeded():
+                    response = DeadlineExceeded()
+                    break
+                try:
+                    with profile_stage('OpenAI request'):
+                        response = self._client.chat.completions.create(
+                            **_with_request_timeout(model_input))
+                    break
+                except Exception as e:
+                    response = e
+                    if retries < self._max_retries:
+                        time.sleep(_retry_delay(e, retries))
+            if isinstance(response, DeadlineExceeded) and retries == 0:
+                # The request was never sent
+                return response
+            if isinstance(response, Exception) and deadline_exceeded():
+                response = DeadlineExceeded()
+            self._record_response(response,
+                                  time.perf_counter() - start_time, retries)
+            return response
 
         model_inputs = [{
             "messages": [{
@@ -64,18 +178,76 @@ class OpenAIEvalClient(EvalClient):
                 "content": prompt
             }],
             **config
-        } for prompt in prompts]
+        } if prompt is not None else None for prompt in prompts]
 
         if self._use_async:
+            # A helper function to call the async API with retries.
+            async def _call_async_api_with_exception_filter(
+                    model_input: dict[str, Any] | None) -> Any:
+                if model_input is None:
+                    return None
+                start_time = time.perf_counter()
+                for retries in range(self._max_retries + 1):
+                    try:
+                        with profile_stage('OpenAI request'):
+                            response = await (
+                                self._client.chat.completions.create(
+                                    **model_input))
+                        break
+                    except Exception as e:
+                        response = e
+                        if retries < self._max_retries:
+                            await asyncio.sleep(_retry_delay(e, retries))
+                self._record_response(response,
+                                      time.perf_counter() - start_time, retries)
+                return response
+
+            # A helper function that cancels the request once the deadline
+            # has passed.
+            async def _call_async_api_with_deadline(
+                    model_input: dict[str, Any] | None) -> Any:
+                try:
+                    return await asyncio.wait_for(
+                        _call_async_api_with_exception_filter(model_input),
+                        timeout=time_remaining())
+                except asyncio.TimeoutError:
+                    return DeadlineExceeded()
+
             # A helper function to call the async API.
             async def _call_async_api() -> list[Any]:
-                responses = await asyncio.gather(*map(
-                    lambda model_input: self._client.chat.completions.create(
-                        **model_input), model_inputs),
-                                                 return_exceptions=True)
+                responses = await asyncio.gather(
+                    *map(_call_async_api_with_deadline, model_inputs))
                 return responses
 
             responses = asyncio.run(_call_async_api())
+        elif self._max_concurrency > 1:
+            # Send the requests from a thread pool. Each request runs in a copy
+            # of the current context so that its stats are recorded to the
+            # active stats collectors.
+            # Once the deadline has passed, the requests that were not sent
+            # yet are cancelled and the ones in flight are not waited for.
+            executor = ThreadPoolExecutor(max_workers=self._max_concurrency)
+            futures = []
+            try:
+                futures = [
+                    executor.submit(contextvars.copy_context().run,
+                                    _call_api_with_exception_filter,
+                                    model_input) for model_input in model_inputs
+                ]
+                responses = []
+                for future in tqdm_wrapper(futures,
+                                           desc=tqdm_description,
+                                           total=len(futures)):
+                    try:
+                        responses.append(
+                            future.result(timeout=time_remaining()))
+                    except FutureTimeoutError:
+                        responses.append(DeadlineExceeded())
+            finally:
+                # `shutdown(cancel_futures=True)` would need Python 3.9
+                for future in futures:
+                    future.cancel()
+                executor.shutdown(wait=False)
         else:
             responses = [
                 _call_api_with_exception_filter(model_input)
@@ -83,15 +255,44 @@ class OpenAIEvalClient(EvalClient):
                                                 desc=tqdm_description)
             ]
 
-        # Filter out exceptions and print them out.
+        # The prompts that could not be evaluated before the deadline are
+        # reported separately from the failed ones
+        record_timed_out(
+            [isinstance(response, DeadlineExceeded) for response in responses])
+
+        # Filter out exceptions and warn about them.
         for i, response in enumerate(responses):
+            if isinstance(response, DeadlineExceeded):
+                responses[i] = None
+                continue
             if not isinstance(response, Exception):
                 continue
-            print('OpenAI failed to return an assessment corresponding to '
-                  f'{i}th prompt: {response}')
+            warnings.warn('OpenAI failed to return an assessment corresponding '
+                          f'to {i}th prompt: {response}')
             responses[i] = None
         return responses
 
+    def _record_response(self, response: Any, latency: float,
+                         retries: int) -> None:
+        '''Records the token usage, latency, retries and error class of one
+        response (or the exception raised instead of it).
+        '''
+        if isinstance(response, Exception):
+            self._record_request(
+                RequestStats(prompt_tokens=None,
+                             completion_tokens=None,
+                             latency=latency,
+                             retries=retries,
+                             error=type(response).__name__))
+            return
+        usage = getattr(response, 'usage', None)
+        self._record_request(
+            RequestStats(prompt_tokens=getattr(usage, 'prompt_tokens', None),
+                         completion_tokens=getattr(usage, 'completion_tokens',
+                                                   None),
+                         latency=latency,
+                         retries=retries))
+
     def get_text_responses(
             self,
             prompts: Iterable[str],
@@ -167,29 +368,11 @@ class OpenAIEvalClient(EvalClient):
             for unstructured_assessment in unstructured_assessment_result
         ]
 
-        functions = [{
-            'name': 'save_assessment',
-            'description': f'Save the assessment of {metric_name}.',
-            'parameters': {
-                'type': 'object',
-                'properties': {
-                    'assessment': {
-                        'type': 'string',
-                        'enum': options,
-                        'description': f'The assessment of {metric_name}.',
-                    },
-                },
-                'required': ['assessment'],
-            },
-        }]
-
         config_structured_assessments = {
-            "seed": 123,
-            "functions": functions,
-            "function_call": {
-                "name": 'save_assessment',
-            },
-            "model": "gpt-3.5-turbo"
+            "seed":
+                123,
+            **self._structured_assessment_args(metric_name, options), "model":
+                "gpt-3.5-turbo"
         }
         config_structured_assessments.update(self._openai_args or {})
 
@@ -198,7 +381,7 @@ class OpenAIEvalClient(EvalClient):
                                    config=config_structured_assessments,
                                    tqdm_description=tqdm_description)
         function_args = [
-            json.loads(response.choices[0].message.function_call.arguments)
+            json.loads(self._structured_assessment_arguments(response))
             if response else None for response in responses
         ]
         assessments = [
@@ -212,13 +395,47 @@ class OpenAIEvalClient(EvalClient):
                 continue
             # By leveraging the function calling API, this should be pretty
             # rare, but we're dealing with LLMs here so nothing is absolute!
-            print(f'OpenAI returned an unrecognized assessment: "{assessment}"')
+            warnings.warn(
+                f'OpenAI returned an unrecognized assessment: "{assessment}"')
 
         return [
             score_map[assessment] if assessment else None
             for assessment in assessments
         ]
 
+    def _structured_assessment_args(self, metric_name: str,
+                                    options: list[str]) -> dict[str, Any]:
+        '''Returns the arguments of ``client.chat.completions.create`` that
+        make the model save the assessment through function calling.
+        '''
+        functions = [{
+            'name': 'save_assessment',
+            'description': f'Save the assessment of {metric_name}.',
+            'parameters': {
+                'type': 'object',
+                'properties': {
+                    'assessment': {
+                        'type': 'string',
+                        'enum': options,
+                        'description': f'The assessment of {metric_name}.',
+                    },
+                },
+                'required': ['assessment'],
+            },
+        }]
+        return {
+            "functions": functions,
+            "function_call": {
+                "name": 'save_assessment',
+            },
+        }
+
+    def _structured_assessment_arguments(self, response: Any) -> str:
+        '''Returns the JSON arguments of the function call in the response to a
+        request made with :meth:`_structured_assessment_args`.
+        '''
+        return response.choices[0].message.function_call.arguments
+
     def similarity_scorer(self) -> OpenAISimilarityScorer:
         '''
         https://openai.com/blog/new-embedding-models-and-api-updates
@@ -227,7 +444,8 @@ class OpenAIEvalClient(EvalClient):
             self._client,
             OpenAI), "Only sync clients are supported for similarity scoring."
         return OpenAISimilarityScorer(openai_client=self._client,
-                                      openai_args=self._openai_args)
+                                      openai_args=self._openai_args,
+                                      stats_callbacks=self._stats_callbacks)
 
 
 class AzureOpenAIEvalClient(OpenAIEvalClient):
@@ -238,7 +456,10 @@ class AzureOpenAIEvalClient(OpenAIEvalClient):
                  azure_openai_client: AzureOpenAI | None = None,
                  openai_args: dict[str, str] | None = None,
                  *,
-                 use_async: bool = False):
+                 use_async: bool = False,
+                 max_retries: int = 0,
+                 stats_callbacks: Sequence[Callable[[RequestStats], None]] |
+                 None = None):
         '''
         Intialize the Azure OpenAI evaluation client.
 
@@ -255,6 +476,12 @@ class AzureOpenAIEvalClient(OpenAIEvalClient):
             openai_args: (Optional) dict of additional args to pass in to the
             ``client.chat.completions.create`` function
             use_async: (Optional) If True, the async client will be used.
+            max_retries: (Optional) The number of times a failed request is
+                retried by the evaluation client. This is in addition to the
+                retries done inside the Azure OpenAI client.
+            stats_callbacks: (Optional) Functions called with the
+                :class:`~langcheck.metrics.eval_clients.RequestStats` (token
+                usage, latency, retries and error) of every request.
         '''
         assert (text_model_name is not None or
                 embedding_model_name is not None), (
@@ -279,6 +506,8 @@ class AzureOpenAIEvalClient(OpenAIEvalClient):
         self._embedding_model_name = embedding_model_name
 
         self._use_async = use_async
+        self._max_retries = max_retries
+        self._stats_callbacks = stats_callbacks or []
 
     def get_score(
         self,
@@ -320,7 +549,8 @@ class AzureOpenAIEvalClient(OpenAIEvalClient):
             'this metric.')
         openai_args = {**self._openai_args, 'model': self._embedding_model_name}
         return OpenAISimilarityScorer(openai_client=self._client,
-                                      openai_args=openai_args)
+                                      openai_args=openai_args,
+                                      stats_callbacks=self._stats_callbacks)
 
 
 class OpenAISimilarityScorer(BaseSimilarityScorer):
@@ -331,22 +561,49 @@ class OpenAISimilarityScorer(BaseSimilarityScorer):
 
     def __init__(self,
                  openai_client: OpenAI | AzureOpenAI,
-                 openai_args: dict[str, Any] | None = None):
+                 openai_args: dict[str, Any] | None = None,
+                 stats_callbacks: Sequence[Callable[[RequestStats], None]] |
+                 None = None):
 
         super().__init__()
 
         self.openai_client = openai_client
         self.openai_args = openai_args
+        self.stats_callbacks = stats_callbacks or []
 
     def _embed(self, inputs: list[str]) -> torch.Tensor:
         '''Embed the inputs using the OpenAI API.
         '''
-        # Embed the inputs
-        if self.openai_args:
-            embed_response = self.openai_client.embeddings.create(
-                input=inputs, **self.openai_args)
-        else:
-            embed_response = self.openai_client.embeddings.create(
-                input=inputs, model='text-embedding-3-small')
+        start_time = time.perf_counter()
+        try:
+            # Embed the inputs
+            if self.openai_args:
+                embed_response = self.openai_client.embeddings.create(
+                    input=inputs, **self.openai_args)
+            else:
+                embed_response = self.openai_client.embeddings.create(
+                    input=inputs, model='text-embedding-3-small')
+        except Exception as e:
+            self._record_request(
+                RequestStats(prompt_tokens=None,
+                             completion_tokens=None,
+                             latency=time.perf_counter() - start_time,
+                             error=type(e).__name__))
+            raise
+        usage = getattr(embed_response, 'usage', None)
+        self._record_request(
+            RequestStats(prompt_tokens=getattr(usage, 'prompt_tokens', None),
+                         completion_tokens=0,
+                         latency=time.perf_counter() - start_time))
 
         return torch.Tensor([item.embedding for item in embed_response.data])
+
+    def _embedding_cache_key(self) -> tuple[Any, Hashable]:
+        openai_args = self.openai_args or {}
+        return self.openai_client, repr(sorted(openai_args.items()))
+
+    def _record_request(self, request_stats: RequestStats) -> None:
+        '''Records the stats of one embedding request.'''
+        record_request(request_stats)
+        for callback in self.stats_callbacks:
+            callback(request_stats)
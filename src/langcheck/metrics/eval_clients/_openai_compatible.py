@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import importlib.util
+import threading
+from typing import Any, Callable, Sequence
+
+import httpx
+from openai import OpenAI
+
+from ._openai import OpenAIEvalClient, OpenAISimilarityScorer
+from ._stats import RequestStats
+
+# The HTTP clients shared by all OpenAICompatibleEvalClients, keyed by the
+# connection settings. Sharing them lets every evaluation client pointing at
+# the same server reuse the same pool of keep-alive connections.
+_http_clients: dict[tuple[str, int, bool, float], httpx.Client] = {}
+_http_clients_lock = threading.Lock()
+
+
+def _shared_http_client(base_url: str, max_connections: int, http2: bool,
+                        timeout: float) -> httpx.Client:
+    '''Returns the pooled HTTP client for the given connection settings,
+    creating it on first use.
+    '''
+    key = (base_url, max_connections, http2, timeout)
+    with _http_clients_lock:
+        if key not in _http_clients:
+            _http_clients[key] = httpx.Client(
+                http2=http2,
+                timeout=timeout,
+                limits=httpx.Limits(max_connections=max_connections,
+                                    max_keepalive_connections=max_connections))
+        return _http_clients[key]
+
+
+class OpenAICompatibleEvalClient(OpenAIEvalClient):
+    '''EvalClient defined for servers exposing an OpenAI-compatible API, such as
+    vLLM, text-generation-inference, llama.cpp or Ollama.
+
+    Requests are sent concurrently from a thread pool over a keep-alive
+    connection pool that is shared by all clients pointing at the same server,
+    using HTTP/2 if the ``h2`` package is installed. The structured assessment
+    is requested through tool calling, which these servers support more widely
+    than the deprecated function calling.
+    '''
+
+    def __init__(self,
+                 base_url: str,
+                 model: str,
+                 *,
+                 api_key: str = 'EMPTY',
+                 openai_args: dict[str, Any] | None = None,
+                 embedding_model: str | None = None,
+                 max_concurrency: int = 8,
+                 max_connections: int | None = None,
+                 http2: bool | None = None,
+                 timeout: float = 60.0,
+                 max_retries: int = 0,
+                 stats_callbacks: Sequence[Callable[[RequestStats], None]] |
+                 None = None):
+        '''
+        Initialize the OpenAI-compatible evaluation client.
+
+        Args:
+            base_url: The base URL of the API, e.g. "http://localhost:8000/v1".
+            model: The name of the model served by the server.
+            api_key: (Optional) The API key, if the server requires one.
+            openai_args: (Optional) dict of additional args to pass in to the
+                ``client.chat.completions.create`` function
+            embedding_model: (Optional) The name of the embedding model served
+                by the server, used by the semantic similarity metrics.
+            max_concurrency: (Optional) The maximum number of requests in
+                flight at the same time.
+            max_connections: (Optional) The size of the connection pool.
+                Defaults to ``max_concurrency``.
+            http2: (Optional) Whether to use HTTP/2. Defaults to True if the
+                ``h2`` package is installed.
+            timeout: (Optional) The timeout of each request in seconds.
+            max_retries: (Optional) The number of times a failed request is
+                retried by the evaluation client.
+            stats_callbacks: (Optional) Functions called with the
+                :class:`~langcheck.metrics.eval_clients.RequestStats` (token
+                usage, latency, retries and error) of every request.
+        '''
+        assert max_concurrency >= 1, 'max_concurrency should be at least 1.'
+        if http2 is None:
+            http2 = importlib.util.find_spec('h2') is not None
+        http_client = _shared_http_client(base_url.rstrip('/'),
+                                          max_connections or max_concurrency,
+                                          http2, timeout)
+        # Retries are done by the evaluation client so that they are recorded
+        # in the stats
+        openai_client = OpenAI(base_url=base_url,
+                               api_key=api_key,
+                               http_client=http_client,
+                               max_retries=0)
+        openai_args = {'model': model, **(openai_args or {})}
+        super().__init__(openai_client,
+                         openai_args,
+                         max_retries=max_retries,
+                         stats_callbacks=stats_callbacks)
+        self._embedding_model = embedding_model
+        self._max_concurrency = max_concurrency
+
+    def _structured_assessment_args(self, metric_name: str,
+                                    options: list[str]) -> dict[str, Any]:
+        '''Returns the arguments of ``client.chat.completions.create`` that
+        make the model save the assessment through tool calling.
+        '''
+        function_args = super()._structured_assessment_args(
+            metric_name, options)
+        return {
+            'tools': [{
+                'type': 'function',
+                'function': function,
+            } for function in function_args['functions']],
+            'tool_choice': {
+                'type': 'function',
+                'function': function_args['function_call'],
+            },
+        }
+
+    def _structured_assessment_arguments(self, response: Any) -> str:
+        '''Returns the JSON arguments of the tool call in the response to a
+        request made with :meth:`_structured_assessment_args`.
+        '''
+        return response.choices[0].message.tool_calls[0].function.arguments
+
+    def similarity_scorer(self) -> OpenAISimilarityScorer:
+        '''Returns a similarity scorer that embeds the inputs with the
+        ``embedding_model`` served by the server.
+        '''
+        assert self._embedding_model is not None, (
+            'You need to specify the embedding_model to get the score for '
+            'this metric.')
+        assert isinstance(self._client, OpenAI)
+        return OpenAISimilarityScorer(
+            openai_client=self._client,
+            openai_args={'model': self._embedding_model},
+            stats_callbacks=self._stats_callbacks)
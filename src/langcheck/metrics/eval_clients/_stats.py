@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import functools
+import math
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, List, Optional, TypeVar, cast
+
+from langcheck.metrics.metric_value import MetricValue
+
+_MetricFunction = TypeVar('_MetricFunction', bound=Callable[..., MetricValue])
+
+# The stats collectors that are active in the current context. Every request
+# recorded by an EvalClient is added to all of them.
+_active_collectors: ContextVar[tuple[EvalClientStats,
+                                     ...]] = ContextVar('_active_collectors',
+                                                        default=())
+
+
+@dataclass
+class RequestStats:
+    '''Statistics of a single request sent by an
+    :class:`~langcheck.metrics.eval_clients.EvalClient`.
+    '''
+    # Token counts can be None if the API did not return the usage
+    prompt_tokens: Optional[int]
+    completion_tokens: Optional[int]
+    # Wall time in seconds, including the retries
+    latency: float
+    retries: int = 0
+    # The class name of the exception if the request failed, e.g.
+    # "RateLimitError"
+    error: Optional[str] = None
+
+
+@dataclass
+class EvalClientStats:
+    '''Aggregated statistics of the requests sent during one metric call. It is
+    attached to the returned
+    :class:`~langcheck.metrics.metric_value.MetricValue` as
+    ``eval_client_stats``.
+    '''
+    requests: List[RequestStats] = field(default_factory=list)
+
+    def add(self, request_stats: RequestStats) -> None:
+        '''Adds the stats of one request.'''
+        self.requests.append(request_stats)
+
+    @property
+    def num_requests(self) -> int:
+        return len(self.requests)
+
+    @property
+    def num_errors(self) -> int:
+        return sum(request.error is not None for request in self.requests)
+
+    @property
+    def error_rate(self) -> float:
+        '''Returns the proportion of requests that failed.'''
+        if not self.requests:
+            return 0.0
+        return self.num_errors / self.num_requests
+
+    @property
+    def error_counts(self) -> dict[str, int]:
+        '''Returns the number of failed requests per exception class.'''
+        return dict(
+            Counter(request.error
+                    for request in self.requests
+                    if request.error is not None))
+
+    @property
+    def num_retries(self) -> int:
+        return sum(request.retries for request in self.requests)
+
+    @property
+    def prompt_tokens(self) -> int:
+        return sum(request.prompt_tokens or 0 for request in self.requests)
+
+    @property
+    def completion_tokens(self) -> int:
+        return sum(request.completion_tokens or 0 for request in self.requests)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def total_latency(self) -> float:
+        '''Returns the sum of the latencies of all requests in seconds. This can
+        be larger than the wall time of the metric call if the requests were
+        sent concurrently.
+        '''
+        return sum(request.latency for request in self.requests)
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        '''Returns the given percentile (between 0 and 100) of the request
+        latencies in seconds, or None if no request was sent. The value is
+        linearly interpolated between the closest ranks.
+        '''
+        if not 0 <= percentile <= 100:
+            raise ValueError('The percentile should be between 0 and 100.')
+        if not self.requests:
+            return None
+        latencies = sorted(request.latency for request in self.requests)
+        rank = (len(latencies) - 1) * percentile / 100
+        lower, upper = math.floor(rank), math.ceil(rank)
+        return latencies[lower] + (latencies[upper] -
+                                   latencies[lower]) * (rank - lower)
+
+    @property
+    def p50_latency(self) -> Optional[float]:
+        return self.latency_percentile(50)
+
+    @property
+    def p99_latency(self) -> Optional[float]:
+        return self.latency_percentile(99)
+
+    def cost(self, prompt_token_price: float,
+             completion_token_price: float) -> float:
+        '''Returns the cost of the requests.
+
+        Args:
+            prompt_token_price: The price of one prompt (input) token.
+            completion_token_price: The price of one completion (output) token.
+        '''
+        return (self.prompt_tokens * prompt_token_price +
+                self.completion_tokens * completion_token_price)
+
+    def __str__(self) -> str:
+        return (f'Requests: {self.num_requests} '
+                f'(errors: {self.num_errors}, retries: {self.num_retries})\n'
+                f'Tokens: {self.prompt_tokens} prompt, '
+                f'{self.completion_tokens} completion\n'
+                f'Latency: p50 {self.p50_latency}s, p99 {self.p99_latency}s')
+
+
+@contextmanager
+def collect_eval_client_stats() -> Iterator[EvalClientStats]:
+    '''Context manager that collects the stats of all requests sent by
+    EvalClients within the context.
+
+    Example:
+        >>> with collect_eval_client_stats() as stats:
+        ...     toxicity(outputs, eval_model=eval_client)
+        >>> stats.p99_latency
+    '''
+    stats = EvalClientStats()
+    token = _active_collectors.set(_active_collectors.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active_collectors.reset(token)
+
+
+def record_request(request_stats: RequestStats) -> None:
+    '''Adds the stats of one request to all active collectors.'''
+    for collector in _active_collectors.get():
+        collector.add(request_stats)
+
+
+def attach_eval_client_stats(metric_fn: _MetricFunction) -> _MetricFunction:
+    '''Decorator for metric functions that attaches the stats of the EvalClient
+    requests sent during the metric call to the returned MetricValue.
+    '''
+
+    @functools.wraps(metric_fn)
+    def wrapper(*args: Any, **kwargs: Any) -> MetricValue:
+        with collect_eval_client_stats() as stats:
+            metric_value = metric_fn(*args, **kwargs)
+        if stats.num_requests > 0:
+            metric_value.eval_client_stats = stats
+        return metric_value
+
+    return cast(_MetricFunction, wrapper)
@@ -2,17 +2,21 @@ from __future__ import annotations
 
 from typing import List, Optional
 
+from langcheck.metrics._deadline import attach_timed_out
 from langcheck.metrics._pairwise_text_quality_utils import (
     enforce_pairwise_comparison_consistency,
     generate_pairwise_comparison_prompt_params)
 from langcheck.metrics._validation import \
     validate_parameters_pairwise_comparison
 from langcheck.metrics.eval_clients import EvalClient
+from langcheck.metrics.eval_clients._stats import attach_eval_client_stats
 from langcheck.metrics.metric_value import MetricValue
 
 from ..prompts._utils import get_template
 
 
+@attach_eval_client_stats
+@attach_timed_out
 def pairwise_comparison(
         generated_outputs_a: List[str] | str,
         generated_outputs_b: List[str] | str,
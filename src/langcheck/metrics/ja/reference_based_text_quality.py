@@ -2,23 +2,28 @@ from __future__ import annotations
 
 from typing import List, Optional
 
-from rouge_score import rouge_scorer
 from rouge_score.tokenizers import Tokenizer
 
+from langcheck.metrics._deadline import attach_timed_out
+from langcheck.metrics._rouge import rouge_f1_scores
 from langcheck.metrics._validation import validate_parameters_reference_based
 from langcheck.metrics.eval_clients import EvalClient
+from langcheck.metrics.eval_clients._stats import attach_eval_client_stats
 from langcheck.metrics.ja._tokenizers import JanomeTokenizer
 from langcheck.metrics.metric_value import MetricValue
 from langcheck.metrics.scorer.hf_models import \
     SentenceTransformerSimilarityScorer
-from langcheck.utils.progess_bar import tqdm_wrapper
+from langcheck.utils.progress_bar import tqdm_wrapper
 
 
+@attach_eval_client_stats
+@attach_timed_out
 def semantic_similarity(
         generated_outputs: List[str] | str,
         reference_outputs: List[str] | str,
         prompts: Optional[List[str] | str] = None,
-        eval_model: str | EvalClient = 'local') -> MetricValue[float]:
+        eval_model: str | EvalClient = 'local',
+        local_chunk_pooling: Optional[str] = None) -> MetricValue[float]:
     '''Calculates the semantic similarities between the generated outputs and
     the reference outputs. The similarities are computed as the cosine
     similarities between the generated and reference embeddings. This metric
@@ -48,6 +53,11 @@ def semantic_similarity(
             optional metadata and not used to calculate the metric.
         eval_model: The type of model to use ('local' or the EvalClient instance
             used for the evaluation). default 'local'
+        local_chunk_pooling: Only used if eval_model is 'local'. If "mean" or
+            "max", outputs longer than the maximum sequence length of the model
+            are split into windows of tokens, and the window embeddings are
+            pooled (by mean or max) instead of truncating the outputs. If None,
+            the outputs are truncated. default None
 
     Returns:
         An :class:`~langcheck.metrics.metric_value.MetricValue` object
@@ -55,7 +65,8 @@ def semantic_similarity(
     generated_outputs, reference_outputs, prompts = validate_parameters_reference_based(  # NOQA: E501
         generated_outputs, reference_outputs, prompts)
     if eval_model == 'local':
-        scorer = SentenceTransformerSimilarityScorer(language='ja')
+        scorer = SentenceTransformerSimilarityScorer(
+            language='ja', chunk_pooling=local_chunk_pooling)
     else:  # EvalClient
         assert isinstance(
             eval_model, EvalClient
@@ -78,7 +89,8 @@ def rouge1(generated_outputs: List[str] | str,
            reference_outputs: List[str] | str,
            prompts: Optional[List[str] | str] = None,
            *,
-           tokenizer: Optional[Tokenizer] = None) -> MetricValue[float]:
+           tokenizer: Optional[Tokenizer] = None,
+           num_workers: int = 1) -> MetricValue[float]:
     '''Calculates the F1 metrics of the ROUGE-1 scores between the generated
     (single tokens) between the generated outputs and the reference outputs.
     This metric takes on float values between [0, 1], where 0 is no overlap and
@@ -92,6 +104,10 @@ def rouge1(generated_outputs: List[str] | str,
         reference_outputs: The reference output(s)
         prompts: The prompts used to generate the output(s). Prompts are
             optional metadata and not used to calculate the metric.
+        num_workers: The number of worker processes computing the scores in
+            chunks. Each worker creates its own tokenizer, or receives a copy
+            of `tokenizer` if it is given (so it needs to be picklable).
+            default 1 (the scores are computed in the current process)
 
     Returns:
         An MetricValue object
@@ -102,7 +118,8 @@ def rouge1(generated_outputs: List[str] | str,
     scores = _rouge(generated_outputs,
                     reference_outputs,
                     'rouge1',
-                    tokenizer=tokenizer)
+                    tokenizer=tokenizer,
+                    num_workers=num_workers)
     return MetricValue(metric_name='rouge1',
                        prompts=prompts,
                        generated_outputs=generated_outputs,
@@ -117,7 +134,8 @@ def rouge2(generated_outputs: List[str] | str,
            reference_outputs: List[str] | str,
            prompts: Optional[List[str] | str] = None,
            *,
-           tokenizer: Optional[Tokenizer] = None) -> MetricValue[float]:
+           tokenizer: Optional[Tokenizer] = None,
+           num_workers: int = 1) -> MetricValue[float]:
     '''Calculates the F1 metrics of the ROUGE-2 scores between the generated
     outputs and the reference outputs. It evaluates the overlap of bigrams
     (two adjacent tokens) between the generated outputs and the reference
@@ -132,6 +150,10 @@ def rouge2(generated_outputs: List[str] | str,
         reference_outputs: The reference output(s)
         prompts: The prompts used to generate the output(s). Prompts are
             optional metadata and not used to calculate the metric.
+        num_workers: The number of worker processes computing the scores in
+            chunks. Each worker creates its own tokenizer, or receives a copy
+            of `tokenizer` if it is given (so it needs to be picklable).
+            default 1 (the scores are computed in the current process)
 
     Returns:
         An MetricValue object
@@ -142,7 +164,8 @@ def rouge2(generated_outputs: List[str] | str,
     scores = _rouge(generated_outputs,
                     reference_outputs,
                     'rouge2',
-                    tokenizer=tokenizer)
+                    tokenizer=tokenizer,
+                    num_workers=num_workers)
     return MetricValue(metric_name='rouge2',
                        prompts=prompts,
                        generated_outputs=generated_outputs,
@@ -157,7 +180,8 @@ def rougeL(generated_outputs: List[str] | str,
            reference_outputs: List[str] | str,
            prompts: Optional[List[str] | str] = None,
            *,
-           tokenizer: Optional[Tokenizer] = None) -> MetricValue[float]:
+           tokenizer: Optional[Tokenizer] = None,
+           num_workers: int = 1) -> MetricValue[float]:
     '''Calculates the F1 metrics of the ROUGE-L scores between the generated
     outputs and the reference outputs. It evaluates the longest common
     subsequence (LCS) between the generated outputs and the reference outputs.
@@ -172,6 +196,10 @@ def rougeL(generated_outputs: List[str] | str,
         reference_outputs: The reference output(s)
         prompts: The prompts used to generate the output(s). Prompts are
             optional metadata and not used to calculate the metric.
+        num_workers: The number of worker processes computing the scores in
+            chunks. Each worker creates its own tokenizer, or receives a copy
+            of `tokenizer` if it is given (so it needs to be picklable).
+            default 1 (the scores are computed in the current process)
 
     Returns:
         An MetricValue object
@@ -192,7 +220,8 @@ def rougeL(generated_outputs: List[str] | str,
     scores = _rouge(generated_outputs,
                     reference_outputs,
                     'rougeLsum',
-                    tokenizer=tokenizer)
+                    tokenizer=tokenizer,
+                    num_workers=num_workers)
     return MetricValue(metric_name='rougeL',
                        prompts=prompts,
                        generated_outputs=generated_outputs,
@@ -207,7 +236,8 @@ def _rouge(generated_outputs: List[str],
            reference_outputs: List[str],
            rouge_type: str,
            *,
-           tokenizer: Optional[Tokenizer] = None) -> List[float]:
+           tokenizer: Optional[Tokenizer] = None,
+           num_workers: int = 1) -> List[float]:
     '''Helper function for computing the rouge1, rouge2, and rougeL metrics.
     This uses Google Research's implementation of ROUGE:
     https://github.com/google-research/google-research/tree/master/rouge
@@ -216,6 +246,7 @@ def _rouge(generated_outputs: List[str],
         generated_outputs: A list of model generated outputs to evaluate
         reference_outputs: A list of reference outputs
         rouge_type: rouge1, rouge2, or rougeLsum
+        num_workers: The number of worker processes
 
     Returns:
         A list of F1 values of the ROUGE scores
@@ -223,13 +254,8 @@ def _rouge(generated_outputs: List[str],
     assert rouge_type in ['rouge1', 'rouge2', 'rougeLsum']
 
     # The tokenizer is default to JanomeTokenizer
-    tokenizer = tokenizer or JanomeTokenizer()
-    scorer = rouge_scorer.RougeScorer([rouge_type],
-                                      use_stemmer=True,
-                                      tokenizer=tokenizer)
-    scores = []
-    for gen, ref in tqdm_wrapper(zip(generated_outputs, reference_outputs),
-                                 total=len(generated_outputs)):
-        score = scorer.score(gen, ref)
-        scores.append(score[rouge_type].fmeasure)
-    return scores
+    return rouge_f1_scores(generated_outputs,
+                           reference_outputs, [rouge_type],
+                           tokenizer=tokenizer,
+                           tokenizer_factory=JanomeTokenizer,
+                           num_workers=num_workers)[rouge_type]
@@ -4,17 +4,21 @@ from typing import List, Optional, Tuple
 
 import regex as re
 
+from langcheck.metrics._deadline import attach_timed_out
 from langcheck.metrics._validation import (validate_parameters_answer_relevance,
                                            validate_parameters_reference_free)
 from langcheck.metrics.eval_clients import EvalClient
+from langcheck.metrics.eval_clients._stats import attach_eval_client_stats
 from langcheck.metrics.metric_value import MetricValue
 from langcheck.metrics.scorer.hf_models import \
     AutoModelForSequenceClassificationScorer
-from langcheck.utils.progess_bar import tqdm_wrapper
+from langcheck.utils.progress_bar import tqdm_wrapper
 
 from ..prompts._utils import get_template
 
 
+@attach_eval_client_stats
+@attach_timed_out
 def sentiment(
         generated_outputs: List[str] | str,
         prompts: Optional[List[str] | str] = None,
@@ -146,6 +150,8 @@ def _sentiment_eval_client(
     return scores, explanations
 
 
+@attach_eval_client_stats
+@attach_timed_out
 def toxicity(
         generated_outputs: List[str] | str,
         prompts: Optional[List[str] | str] = None,
@@ -282,6 +288,8 @@ def _toxicity_eval_client(
     return scores, explanations
 
 
+@attach_eval_client_stats
+@attach_timed_out
 def fluency(
         generated_outputs: List[str] | str,
         prompts: Optional[List[str] | str] = None,
@@ -499,6 +507,8 @@ def tateishi_ono_yamada_reading_ease(
                        language='ja')
 
 
+@attach_eval_client_stats
+@attach_timed_out
 def answer_relevance(generated_outputs: List[str] | str,
                      prompts: List[str] | str,
                      eval_model: EvalClient) -> MetricValue[Optional[float]]:
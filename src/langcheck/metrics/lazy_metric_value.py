@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import functools
+import inspect
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from langcheck.metrics.metric_value import MetricValue, MetricValueWithThreshold
+
+# The arguments of the metric functions that have one element per data point,
+# which are split into batches
+_PER_ROW_ARGUMENTS = frozenset([
+    'generated_outputs', 'generated_outputs_a', 'generated_outputs_b',
+    'prompts', 'sources', 'sources_a', 'sources_b', 'reference_outputs'
+])
+
+
+def lazy(metric_fn: Callable[..., MetricValue],
+         batch_size: int = 64) -> Callable[..., LazyMetricValue]:
+    '''Wraps a metric function so that it computes the metric lazily, one batch
+    of data points at a time, only as far as needed. This is useful for
+    assertions in unit tests and guardrails: `all()` stops at the first batch
+    with a data point that fails the threshold, and `any()` stops at the first
+    batch with a data point that passes it.
+
+    Example:
+        >>> assert langcheck.metrics.lazy(toxicity)(outputs) < 0.2
+
+    Args:
+        metric_fn: The metric function, e.g.
+            :func:`~langcheck.metrics.en.reference_free_text_quality.toxicity`
+        batch_size: The number of data points to compute the metric on at a
+            time. default 64
+
+    Returns:
+        A function that takes the same arguments as `metric_fn` and returns a
+        :class:`~langcheck.metrics.lazy_metric_value.LazyMetricValue`
+    '''
+    if batch_size < 1:
+        raise ValueError('The batch size should be at least 1.')
+    signature = inspect.signature(metric_fn)
+
+    @functools.wraps(metric_fn)
+    def wrapper(*args: Any, **kwargs: Any) -> LazyMetricValue:
+        bound_arguments = signature.bind(*args, **kwargs)
+        return LazyMetricValue(metric_fn, bound_arguments.arguments, batch_size)
+
+    return wrapper
+
+
+class LazyMetricValue:
+    '''The value of a metric that is computed one batch of data points at a
+    time, only when it is needed. It is returned by the functions wrapped with
+    :func:`~langcheck.metrics.lazy_metric_value.lazy`.
+
+    Comparing it with a threshold (e.g. `lazy_metric_value < 0.2`) returns a
+    :class:`~langcheck.metrics.lazy_metric_value.LazyMetricValueWithThreshold`
+    without computing anything. Use :meth:`compute` to compute the remaining
+    batches and get the
+    :class:`~langcheck.metrics.metric_value.MetricValue` of all data points.
+    The batches that are already computed are never computed again.
+    '''
+
+    def __init__(self, metric_fn: Callable[..., MetricValue],
+                 arguments: Dict[str, Any], batch_size: int):
+        self.metric_fn = metric_fn
+        self.batch_size = batch_size
+        self._arguments = arguments
+        self._batches: List[MetricValue] = []
+        # The index of the first data point of the next batch
+        self._next_row = 0
+
+        per_row_lengths = {
+            name: len(value)
+            for name, value in arguments.items()
+            if name in _PER_ROW_ARGUMENTS and isinstance(value, (list, tuple))
+        }
+        if len(set(per_row_lengths.values())) > 1:
+            raise ValueError(
+                'The arguments with one element per data point should have '
+                f'the same length, but got {per_row_lengths}.')
+        # A single string is computed as one batch
+        self.num_rows = next(iter(per_row_lengths.values()), 1)
+        self._per_row_arguments = list(per_row_lengths)
+
+    @property
+    def num_computed_rows(self) -> int:
+        '''Returns the number of data points computed so far.'''
+        return min(self._next_row, self.num_rows)
+
+    def _compute_next_batch(self) -> MetricValue:
+        start, end = self._next_row, self._next_row + self.batch_size
+        arguments = dict(self._arguments)
+        for name in self._per_row_arguments:
+            arguments[name] = list(arguments[name][start:end])
+        batch = self.metric_fn(**arguments)
+        self._batches.append(batch)
+        self._next_row = end
+        return batch
+
+    def iter_batches(self) -> Iterator[MetricValue]:
+        '''Yields the MetricValue of each batch in order, computing the batches
+        that are not computed yet.
+        '''
+        yield from self._batches[:]
+        while self._next_row < self.num_rows:
+            yield self._compute_next_batch()
+
+    def compute(self) -> MetricValue:
+        '''Computes the remaining batches and returns the MetricValue of all
+        data points.
+        '''
+        batches = list(self.iter_batches())
+        if not batches:
+            return self.metric_fn(**self._arguments)
+        return MetricValue.concat(batches)
+
+    def all(self) -> bool:
+        '''Equivalent to all(metric_value.metric_values), but stops at the
+        first batch with a falsy value.
+        '''
+        return all(batch.all() for batch in self.iter_batches())
+
+    def any(self) -> bool:
+        '''Equivalent to any(metric_value.metric_values), but stops at the
+        first batch with a truthy value.
+        '''
+        return any(batch.any() for batch in self.iter_batches())
+
+    def __lt__(self, threshold: float | int) -> LazyMetricValueWithThreshold:
+        return LazyMetricValueWithThreshold(self, threshold, '<')
+
+    def __le__(self, threshold: float | int) -> LazyMetricValueWithThreshold:
+        return LazyMetricValueWithThreshold(self, threshold, '<=')
+
+    def __gt__(self, threshold: float | int) -> LazyMetricValueWithThreshold:
+        return LazyMetricValueWithThreshold(self, threshold, '>')
+
+    def __ge__(self, threshold: float | int) -> LazyMetricValueWithThreshold:
+        return LazyMetricValueWithThreshold(self, threshold, '>=')
+
+    def __eq__(  # type: ignore[override]
+            self, threshold: float | int) -> LazyMetricValueWithThreshold:
+        return LazyMetricValueWithThreshold(self, threshold, '==')
+
+    def __ne__(  # type: ignore[override]
+            self, threshold: float | int) -> LazyMetricValueWithThreshold:
+        return LazyMetricValueWithThreshold(self, threshold, '!=')
+
+    def __bool__(self):
+        raise ValueError(
+            'A LazyMetricValue cannot be used as a boolean. '
+            'Try an expression like `lazy_metric_value > 0.5`, '
+            '`lazy_metric_value.all()`, or `lazy_metric_value.any()` instead.')
+
+    def __repr__(self) -> str:
+        return (f'LazyMetricValue(metric_fn={self.metric_fn.__name__}, '
+                f'computed {self.num_computed_rows}/{self.num_rows} rows)')
+
+
+class LazyMetricValueWithThreshold:
+    '''The result of comparing a
+    :class:`~langcheck.metrics.lazy_metric_value.LazyMetricValue` with a
+    threshold. `all()` (and `bool()`, e.g. in an `assert`) stops computing the
+    metric at the first batch with a data point that fails the threshold, and
+    `any()` stops at the first batch with a data point that passes it.
+    '''
+
+    def __init__(self, lazy_metric_value: LazyMetricValue,
+                 threshold: float | int, threshold_op: str):
+        self.lazy_metric_value = lazy_metric_value
+        self.threshold = threshold
+        self.threshold_op = threshold_op
+        # The first batch that failed the threshold in `all()`, if any, and
+        # the index of its first data point
+        self.failed_batch: Optional[MetricValueWithThreshold] = None
+        self._failed_batch_start = 0
+
+    def _iter_batches(self) -> Iterator[MetricValueWithThreshold]:
+        for batch in self.lazy_metric_value.iter_batches():
+            yield batch._with_threshold(self.threshold, self.threshold_op)
+
+    def all(self) -> bool:
+        '''Returns True if all data points pass the threshold, computing the
+        metric only until a data point fails it.
+        '''
+        start = 0
+        for batch in self._iter_batches():
+            if not batch.all():
+                self.failed_batch = batch
+                self._failed_batch_start = start
+                return False
+            start += len(batch.metric_values)
+        return True
+
+    def any(self) -> bool:
+        '''Returns True if any data point passes the threshold, computing the
+        metric only until a data point passes it.
+        '''
+        return any(batch.any() for batch in self._iter_batches())
+
+    def compute(self) -> MetricValueWithThreshold:
+        '''Computes the remaining batches and returns the
+        MetricValueWithThreshold of all data points.
+        '''
+        return self.lazy_metric_value.compute()._with_threshold(
+            self.threshold, self.threshold_op)
+
+    def __bool__(self) -> bool:
+        '''Allows the user to write an `assert lazy_metric_value < 0.2`, which
+        stops computing the metric at the first failing batch.
+        '''
+        return self.all()
+
+    def __repr__(self) -> str:
+        description = (f'{self.lazy_metric_value.metric_fn.__name__} '
+                       f'{self.threshold_op} {self.threshold}, computed '
+                       f'{self.lazy_metric_value.num_computed_rows}/'
+                       f'{self.lazy_metric_value.num_rows} rows')
+        if self.failed_batch is not None:
+            failed_df = self.failed_batch.to_df()
+            failed_df = failed_df[~failed_df['threshold_result']]
+            # Show the indices of the data points in all data points
+            failed_df.index += self._failed_batch_start
+            description += f'\nFailed data points in the batch:\n{failed_df}'
+        return f'LazyMetricValueWithThreshold({description})'
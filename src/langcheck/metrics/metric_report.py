@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from langcheck.metrics.metric_value import MetricValue
+
+# The order of the input columns in the DataFrame, which is the same as in
+# `MetricValue.to_df()`
+_INPUT_COLUMNS = [
+    'prompt', 'source', 'source_a', 'source_b', 'generated_output',
+    'generated_output_a', 'generated_output_b', 'reference_output'
+]
+
+
+def _input_columns(metric_value: MetricValue) -> Dict[str, Optional[List[str]]]:
+    '''Returns the input lists of a MetricValue by their column names.'''
+    generated_outputs = metric_value.generated_outputs
+    sources = metric_value.sources
+    if metric_value.is_pairwise:
+        # For type checking
+        assert isinstance(generated_outputs, tuple)
+        assert sources is None or isinstance(sources, tuple)
+        sources_a, sources_b = sources or (None, None)
+        return {
+            'prompt': metric_value.prompts,
+            'source_a': sources_a,
+            'source_b': sources_b,
+            'generated_output_a': generated_outputs[0],
+            'generated_output_b': generated_outputs[1],
+            'reference_output': metric_value.reference_outputs,
+        }
+    # For type checking
+    assert not isinstance(generated_outputs, tuple)
+    assert not isinstance(sources, tuple)
+    return {
+        'prompt': metric_value.prompts,
+        'source': sources,
+        'generated_output': generated_outputs,
+        'reference_output': metric_value.reference_outputs,
+    }
+
+
+class MetricReport:
+    '''A table of several metrics computed on the same data points. The input
+    columns (prompts, sources, generated outputs and reference outputs) are
+    stored once, no matter how many metrics are added, and each metric is
+    stored as a numeric column that shares its memory with
+    :attr:`~langcheck.metrics.metric_value.MetricValue.values_array`.
+
+    Example:
+        >>> report = MetricReport([
+        ...     langcheck.metrics.toxicity(outputs),
+        ...     langcheck.metrics.factual_consistency(outputs, sources),
+        ... ])
+        >>> report.to_df()
+    '''
+
+    def __init__(self, metric_values: Iterable[MetricValue] = ()):
+        '''
+        Initialize the report.
+
+        Args:
+            metric_values: The metrics to add to the report
+        '''
+        self._num_rows: Optional[int] = None
+        # The input columns, which are only ever set once
+        self._inputs: Dict[str, np.ndarray] = {}
+        # The lists the input columns were created from, to skip comparing the
+        # inputs of the metrics computed on the same lists. This is why the
+        # input lists must not be changed after they are added.
+        self._input_lists: Dict[str, List[str]] = {}
+        # The metric values and the None masks of the metric columns
+        self._metrics: Dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        # The input columns converted to Arrow arrays, which are cached since
+        # the strings need to be copied into Arrow buffers
+        self._arrow_inputs: Dict[str, Any] = {}
+        for metric_value in metric_values:
+            self.add(metric_value)
+
+    def add(self,
+            metric_value: MetricValue,
+            name: Optional[str] = None) -> None:
+        '''Adds a metric to the report. Its inputs need to be the same as the
+        inputs of the metrics already in the report, except that the inputs the
+        report does not have yet (e.g. the sources) are added to it.
+
+        The report keeps the input lists of the metric without copying them,
+        so they must not be modified in place after the metric is added.
+
+        Args:
+            metric_value: The metric to add
+            name: The name of the metric column. If None, the metric name is
+                used.
+        '''
+        name = name or metric_value.metric_name
+        if name in self._metrics or name in _INPUT_COLUMNS:
+            raise ValueError(
+                f'The report already has a column named "{name}". Please '
+                'specify a different name.')
+        num_rows = len(metric_value.metric_values)
+        if self._num_rows is not None and num_rows != self._num_rows:
+            raise ValueError(
+                f'The metric "{name}" has {num_rows} values, but the report '
+                f'has {self._num_rows} rows.')
+
+        new_inputs = {}
+        for column, values in _input_columns(metric_value).items():
+            if values is None:
+                continue
+            existing_values = self._inputs.get(column)
+            if existing_values is None:
+                new_inputs[column] = values
+            elif not (self._input_lists[column] is values or
+                      existing_values.tolist() == values):
+                raise ValueError(
+                    f'The {column} column of the metric "{name}" is different '
+                    'from the one in the report.')
+
+        for column, values in new_inputs.items():
+            inputs = np.empty(len(values), dtype=object)
+            inputs[:] = values
+            inputs.flags.writeable = False
+            self._inputs[column] = inputs
+            self._input_lists[column] = values
+        self._metrics[name] = (metric_value.values_array,
+                               metric_value.none_mask)
+        self._num_rows = num_rows
+
+    @property
+    def metric_names(self) -> List[str]:
+        '''Returns the names of the metric columns.'''
+        return list(self._metrics)
+
+    def __len__(self) -> int:
+        '''Returns the number of rows (data points) of the report.'''
+        return self._num_rows or 0
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        '''Returns a read-only array of the values of a metric (where `None` is
+        NaN), or of an input column.
+        '''
+        if name in self._metrics:
+            return self._metrics[name][0]
+        return self._inputs[name]
+
+    def to_df(self, copy: bool = False) -> pd.DataFrame:
+        '''Returns a DataFrame with the input columns followed by one column per
+        metric, where the metric values that are `None` are NaN.
+
+        Args:
+            copy: If False, the columns of the DataFrame are read-only views of
+                the columns of the report, so the DataFrame is created without
+                copying the data. If True, the columns are copied so that the
+                DataFrame can be modified in place. default False
+        '''
+        columns: Dict[str, Any] = {
+            column: pd.Series(self._inputs[column], dtype=object, copy=copy)
+            for column in _INPUT_COLUMNS
+            if column in self._inputs
+        }
+        for name, (values, _) in self._metrics.items():
+            columns[name] = values.copy() if copy else values
+        return pd.DataFrame(columns, copy=False)
+
+    def to_arrow(self) -> Any:
+        '''Returns a `pyarrow.Table` with the input columns followed by one
+        column per metric, where the metric values that are `None` are null.
+        The metric columns point to the memory of the report without copying
+        it, and the input columns are converted to Arrow only once. This
+        requires the optional `pyarrow` package.
+        '''
+        from langcheck.metrics._metric_value_io import _import_pyarrow
+        pa = _import_pyarrow()
+
+        arrays = {}
+        for column in _INPUT_COLUMNS:
+            if column not in self._inputs:
+                continue
+            if column not in self._arrow_inputs:
+                self._arrow_inputs[column] = pa.array(self._inputs[column],
+                                                      type=pa.string())
+            arrays[column] = self._arrow_inputs[column]
+        for name, (values, none_mask) in self._metrics.items():
+            arrays[name] = pa.array(values,
+                                    mask=none_mask if none_mask.any() else None)
+        return pa.table(arrays)
+
+    def __str__(self) -> str:
+        '''Returns a string representation of the report.'''
+        return str(self.to_df())
+
+    def __repr__(self) -> str:
+        '''Returns a string representation of the report.'''
+        return str(self)
+
+    def _repr_html_(self) -> str:
+        '''Returns an HTML representation of the report, which is automatically
+        called by Jupyter notebooks.
+        '''
+        return self.to_df()._repr_html_()  # type: ignore
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from langcheck.metrics.metric_value import MetricValue
+
+# The relative accuracy of the approximate quantiles
+_DEFAULT_RELATIVE_ACCURACY = 0.01
+# The values closer to zero than this are counted as zero by the sketch
+_MIN_INDEXABLE_VALUE = 1e-9
+
+
+@dataclass
+class MetricSummary:
+    '''Summary statistics of the values of a metric (count, mean, variance,
+    min, max and approximate quantiles) that can be merged, so that the
+    summaries of the shards of an evaluation can be aggregated without
+    collecting every value.
+
+    The mean and the variance are merged exactly with Chan et al.'s parallel
+    algorithm. The quantiles come from a DDSketch, i.e. a histogram with
+    logarithmically sized buckets, so every approximate quantile is within the
+    relative accuracy of an actual value, and merging two sketches is adding
+    up their bucket counts.
+
+    Ref:
+        https://en.wikipedia.org/wiki/Algorithms_for_calculating_variance#Parallel_algorithm
+        https://arxiv.org/abs/1908.10693
+    '''
+    # The number of values, not including the missing (None or NaN) ones
+    count: int = 0
+    # The number of missing (None or NaN) values
+    num_missing: int = 0
+    mean: float = float('nan')
+    # The sum of the squared differences from the mean
+    m2: float = 0.0
+    min: float = float('nan')
+    max: float = float('nan')
+    relative_accuracy: float = _DEFAULT_RELATIVE_ACCURACY
+    # The bucket counts of the sketch for the positive values, the negative
+    # values (by the bucket of their absolute value), and the zeros
+    positive_buckets: Dict[int, int] = field(default_factory=dict)
+    negative_buckets: Dict[int, int] = field(default_factory=dict)
+    zero_count: int = 0
+
+    @property
+    def _gamma(self) -> float:
+        return (1 + self.relative_accuracy) / (1 - self.relative_accuracy)
+
+    @staticmethod
+    def from_values(
+            values: Any,
+            relative_accuracy: float = _DEFAULT_RELATIVE_ACCURACY
+    ) -> MetricSummary:
+        '''Computes the summary of a sequence of numbers, where None and NaN
+        are counted as missing.
+
+        Args:
+            values: A list or an array of numbers (or None)
+            relative_accuracy: The relative accuracy of the approximate
+                quantiles. default 0.01
+        '''
+        if not 0 < relative_accuracy < 1:
+            raise ValueError('The relative accuracy should be between 0 and 1.')
+        values = np.asarray(values, dtype=np.float64)
+        missing = np.isnan(values)
+        values = values[~missing]
+        summary = MetricSummary(count=len(values),
+                                num_missing=int(np.count_nonzero(missing)),
+                                relative_accuracy=relative_accuracy)
+        if not len(values):
+            return summary
+
+        summary.mean = float(values.mean())
+        summary.m2 = float(np.square(values - summary.mean).sum())
+        summary.min = float(values.min())
+        summary.max = float(values.max())
+
+        abs_values = np.abs(values)
+        is_zero = abs_values < _MIN_INDEXABLE_VALUE
+        summary.zero_count = int(np.count_nonzero(is_zero))
+        keys = np.zeros(len(values), dtype=np.int64)
+        keys[~is_zero] = np.ceil(
+            np.log(abs_values[~is_zero]) / math.log(summary._gamma))
+        for buckets, is_in_buckets in [(summary.positive_buckets, values > 0),
+                                       (summary.negative_buckets, values < 0)]:
+            bucket_keys, counts = np.unique(keys[is_in_buckets & ~is_zero],
+                                            return_counts=True)
+            buckets.update(zip(bucket_keys.tolist(), counts.tolist()))
+        return summary
+
+    @staticmethod
+    def from_metric_value(
+            metric_value: MetricValue,
+            relative_accuracy: float = _DEFAULT_RELATIVE_ACCURACY
+    ) -> MetricSummary:
+        '''Computes the summary of the values of a
+        :class:`~langcheck.metrics.metric_value.MetricValue`.
+
+        Args:
+            metric_value: The metric value to summarize
+            relative_accuracy: The relative accuracy of the approximate
+                quantiles. default 0.01
+        '''
+        return MetricSummary.from_values(metric_value.values_array,
+                                         relative_accuracy)
+
+    def merge(self, *others: MetricSummary) -> MetricSummary:
+        '''Returns the summary of the values of this summary and the other
+        summaries combined. The summaries need to have the same relative
+        accuracy.
+        '''
+        merged = MetricSummary(count=self.count,
+                               num_missing=self.num_missing,
+                               mean=self.mean,
+                               m2=self.m2,
+                               min=self.min,
+                               max=self.max,
+                               relative_accuracy=self.relative_accuracy,
+                               positive_buckets=dict(self.positive_buckets),
+                               negative_buckets=dict(self.negative_buckets),
+                               zero_count=self.zero_count)
+        for other in others:
+            if other.relative_accuracy != merged.relative_accuracy:
+                raise ValueError(
+                    'Summaries with different relative accuracies cannot be '
+                    'merged.')
+            merged.num_missing += other.num_missing
+            if not other.count:
+                continue
+            if not merged.count:
+                merged.mean, merged.m2 = other.mean, other.m2
+                merged.min, merged.max = other.min, other.max
+            else:
+                count = merged.count + other.count
+                delta = other.mean - merged.mean
+                merged.mean += delta * other.count / count
+                merged.m2 += (other.m2 +
+                              delta**2 * merged.count * other.count / count)
+                merged.min = min(merged.min, other.min)
+                merged.max = max(merged.max, other.max)
+            merged.count += other.count
+            merged.zero_count += other.zero_count
+            for buckets, other_buckets in [
+                (merged.positive_buckets, other.positive_buckets),
+                (merged.negative_buckets, other.negative_buckets)
+            ]:
+                for key, bucket_count in other_buckets.items():
+                    buckets[key] = buckets.get(key, 0) + bucket_count
+        return merged
+
+    @property
+    def variance(self) -> float:
+        '''Returns the sample variance (with N - 1 degrees of freedom), or NaN
+        if there are fewer than two values.
+        '''
+        if self.count < 2:
+            return float('nan')
+        return self.m2 / (self.count - 1)
+
+    @property
+    def std(self) -> float:
+        '''Returns the sample standard deviation.'''
+        return math.sqrt(self.variance)
+
+    def quantile(self, q: float) -> float:
+        '''Returns the approximate q-quantile of the values (e.g. the median
+        for q = 0.5), or NaN if there are no values. The result is within the
+        relative accuracy of the value at rank q * (count - 1).
+
+        Args:
+            q: A number between 0 and 1
+        '''
+        if not 0 <= q <= 1:
+            raise ValueError('The quantile should be between 0 and 1.')
+        if not self.count:
+            return float('nan')
+        # The min and the max are known exactly
+        if q == 0:
+            return self.min
+        if q == 1:
+            return self.max
+        rank = q * (self.count - 1)
+        gamma = self._gamma
+        # The buckets in increasing order of their values
+        ordered_buckets = [
+            (-1, key, self.negative_buckets[key])
+            for key in sorted(self.negative_buckets, reverse=True)
+        ] + [(0, 0, self.zero_count)
+            ] + [(1, key, self.positive_buckets[key])
+                 for key in sorted(self.positive_buckets)]
+        seen = 0
+        for sign, key, bucket_count in ordered_buckets:
+            seen += bucket_count
+            if seen > rank:
+                value = sign * 2 * gamma**key / (gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        '''Returns the summary as a JSON-serializable dict, e.g. to send it
+        from a worker to the machine that aggregates the shards.
+        '''
+        return {
+            'count': self.count,
+            'num_missing': self.num_missing,
+            'mean': self.mean,
+            'm2': self.m2,
+            'min': self.min,
+            'max': self.max,
+            'relative_accuracy': self.relative_accuracy,
+            # JSON objects only have string keys
+            'positive_buckets': {
+                str(key): count for key, count in self.positive_buckets.items()
+            },
+            'negative_buckets': {
+                str(key): count for key, count in self.negative_buckets.items()
+            },
+            'zero_count': self.zero_count,
+        }
+
+    @staticmethod
+    def from_dict(summary_dict: Dict[str, Any]) -> MetricSummary:
+        '''Creates a summary from a dict returned by
+        :meth:`~langcheck.metrics.metric_summary.MetricSummary.to_dict`.
+        '''
+        summary_dict = dict(summary_dict)
+        for buckets in ['positive_buckets', 'negative_buckets']:
+            summary_dict[buckets] = {
+                int(key): count for key, count in summary_dict[buckets].items()
+            }
+        return MetricSummary(**summary_dict)
+
+    def __str__(self) -> str:
+        return (f'count: {self.count} (missing: {self.num_missing}), '
+                f'mean: {self.mean:.4g}, std: {self.std:.4g}, '
+                f'min: {self.min:.4g}, median: {self.quantile(0.5):.4g}, '
+                f'max: {self.max:.4g}')
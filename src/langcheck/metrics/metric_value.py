@@ -1,18 +1,150 @@
 from __future__ import annotations
 
+import functools
 import operator
 import warnings
-from dataclasses import dataclass, fields
+from dataclasses import dataclass, field, fields
 from statistics import mean
-from typing import Generic, List, Optional, TypeVar
+from typing import (TYPE_CHECKING, Any, Callable, Generic, List, Optional,
+                    Sequence, TypeVar)
 
+import numpy as np
 import pandas as pd
 
+from langcheck.metrics.metric_summary import MetricSummary
+
+if TYPE_CHECKING:
+    from langcheck.metrics.eval_clients._stats import EvalClientStats
+
 # Metrics take on float or integer values
 # Some metrics may return `None` values when the score fails to be computed
 NumericType = TypeVar('NumericType', float, int, Optional[float], Optional[int])
 
 
+class _MetricValueList(list):
+    '''The list of metric values of a MetricValue. It counts the changes that
+    are made to it in place, so that the arrays computed from the list can
+    tell whether they are still up to date without comparing the values.
+    '''
+    # A class attribute, so that it is also defined while a pickled list is
+    # being restored
+    version = 0
+
+
+def _counting_changes(method_name: str) -> Callable:
+    '''Returns the list method of the given name, which also increments the
+    version of the _MetricValueList it is called on.
+    '''
+    method = getattr(list, method_name)
+
+    @functools.wraps(method)
+    def counting_method(self: _MetricValueList, *args: Any) -> Any:
+        self.version += 1
+        return method(self, *args)
+
+    return counting_method
+
+
+for _method_name in [
+        '__setitem__', '__delitem__', '__iadd__', '__imul__', 'append',
+        'extend', 'insert', 'pop', 'remove', 'clear', 'sort', 'reverse'
+]:
+    setattr(_MetricValueList, _method_name, _counting_changes(_method_name))
+
+
+class _LazyList:
+    '''A list field of a MetricValue that is only converted to a list when it
+    is accessed, e.g. a column of a file loaded by `MetricValue.load()`.
+    Subclasses implement `_to_list()` and may implement `to_series()` to build
+    the DataFrame column without the list.
+    '''
+    # The type of the list returned by `to_list()`
+    list_type: type = list
+    # A lazy list cannot be changed, unlike a _MetricValueList
+    version = 0
+
+    def __init__(self) -> None:
+        self._list: Optional[list] = None
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def _to_list(self) -> list:
+        raise NotImplementedError
+
+    def to_list(self) -> list:
+        '''Returns the list, which is converted only once so that the
+        MetricValues sharing this lazy list also share the list.
+        '''
+        converted = self._list
+        if converted is None:
+            converted = self._list = self.list_type(self._to_list())
+        return converted
+
+    def to_series(self) -> pd.Series:
+        return pd.Series(self.to_list())
+
+
+class _ListField:
+    '''The descriptor of a list field of MetricValue. The field can be set to
+    a _LazyList (or, for the pairwise metrics, a tuple of them), which is
+    converted to a list when the field is first accessed.
+    '''
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance: Any, owner: Any = None) -> Any:
+        if instance is None:
+            return self
+        # `timed_out` and `latencies` are not set by `__init__()`
+        value = instance.__dict__.get(self.name)
+        if isinstance(value, _LazyList) or (isinstance(value, tuple) and any(
+                isinstance(lazy, _LazyList) for lazy in value)):
+            value = self._converted(instance, value)
+            instance.__dict__[self.name] = value
+        return value
+
+    def __set__(self, instance: Any, value: Any) -> None:
+        instance.__dict__[self.name] = value
+
+    def _converted(self, instance: Any, value: Any) -> Any:
+        if isinstance(value, tuple):
+            return tuple(lazy.to_list() if isinstance(lazy, _LazyList) else lazy
+                         for lazy in value)
+        return value.to_list()
+
+
+class _MetricValuesField(_ListField):
+    '''The descriptor of `MetricValue.metric_values`, which keeps the metric
+    values in a _MetricValueList (a copy of the assigned list).
+    '''
+
+    def __set__(self, instance: Any, value: Any) -> None:
+        if isinstance(value, _LazyList):
+            value.list_type = _MetricValueList
+        elif not isinstance(value, _MetricValueList):
+            value = _MetricValueList(value)
+        instance.__dict__[self.name] = value
+
+    def _converted(self, instance: Any, value: Any) -> Any:
+        metric_values = value.to_list()
+        cache = instance.__dict__.get('_array_cache')
+        # The arrays computed from the lazy list are still up to date if the
+        # list has not been changed (through another MetricValue sharing it)
+        if (cache is not None and cache[0] is value and
+                metric_values.version == 0):
+            instance.__dict__['_array_cache'] = (metric_values, 0) + cache[2:]
+        return metric_values
+
+
+def _to_column(value: Any) -> Any:
+    '''Returns a DataFrame column for a stored field of a MetricValue.'''
+    if isinstance(value, _LazyList):
+        return value.to_series()
+    return value
+
+
 @dataclass
 class MetricValue(Generic[NumericType]):
     '''A rich object that is the output of any langcheck.metrics function.'''
@@ -28,37 +160,155 @@ class MetricValue(Generic[NumericType]):
     # An explanation can be None if the metric could not be computed
     explanations: Optional[List[Optional[str]]]
     language: Optional[str]
+    # The token usage, latency and error stats of the EvalClient requests sent
+    # to compute the metric. This is None if no EvalClient was used.
+    eval_client_stats: Optional[EvalClientStats] = field(default=None,
+                                                         init=False,
+                                                         repr=False,
+                                                         compare=False)
+    # Whether each data point could not be computed before the deadline set by
+    # `langcheck.metrics.deadline()`. This is None if nothing timed out.
+    timed_out: Optional[List[bool]] = field(default=None,
+                                            init=False,
+                                            repr=False,
+                                            compare=False)
+    # The number of seconds it took to compute each data point, for the metrics
+    # that measure it (e.g. `validation_fn`). A latency is None if the data
+    # point timed out. This is None if the latencies were not measured.
+    latencies: Optional[List[Optional[float]]] = field(default=None,
+                                                       init=False,
+                                                       repr=False,
+                                                       compare=False)
 
     def to_df(self) -> pd.DataFrame:
         '''Returns a DataFrame of metric values for each data point.'''
         if self.is_pairwise:
-            # For type checking
-            assert self.generated_outputs is not None
-            generated_outputs_a, generated_outputs_b = self.generated_outputs
-            sources_a, sources_b = self.sources if self.sources else (None,
-                                                                      None)
+            generated_outputs_a, generated_outputs_b = map(
+                _to_column, self.__dict__['generated_outputs'])
+            sources = self.__dict__['sources']
+            sources_a, sources_b = (map(_to_column, sources) if sources else
+                                    (None, None))
             dataframe_cols = {
-                'prompt': self.prompts,
+                'prompt': self._column('prompts'),
                 'source_a': sources_a,
                 'source_b': sources_b,
                 'generated_output_a': generated_outputs_a,
                 'generated_output_b': generated_outputs_b,
-                'reference_output': self.reference_outputs,
-                'explanation': self.explanations,
-                'metric_value': self.metric_values,
+                'reference_output': self._column('reference_outputs'),
+                'explanation': self._column('explanations'),
+                'metric_value': self._column('metric_values'),
             }
         else:
             dataframe_cols = {
-                'prompt': self.prompts,
-                'source': self.sources,
-                'generated_output': self.generated_outputs,
-                'reference_output': self.reference_outputs,
-                'explanation': self.explanations,
-                'metric_value': self.metric_values,
+                'prompt': self._column('prompts'),
+                'source': self._column('sources'),
+                'generated_output': self._column('generated_outputs'),
+                'reference_output': self._column('reference_outputs'),
+                'explanation': self._column('explanations'),
+                'metric_value': self._column('metric_values'),
             }
+        if self.__dict__.get('timed_out') is not None:
+            dataframe_cols['timed_out'] = self._column('timed_out')
+        if self.__dict__.get('latencies') is not None:
+            dataframe_cols['latency'] = self._column('latencies')
 
         return pd.DataFrame(dataframe_cols)
 
+    def _column(self, name: str) -> Any:
+        '''Returns a field as a DataFrame column. The field is read as it is
+        stored, so that a lazy list is converted to a column directly instead
+        of to a list.
+        '''
+        return _to_column(self.__dict__.get(name))
+
+    def save(self, path: str, format: Optional[str] = None) -> None:
+        '''Saves the metric values, the inputs, the explanations and the
+        threshold (if any) to a file, which can be loaded with
+        :meth:`~langcheck.metrics.metric_value.MetricValue.load`. This requires
+        the optional `pyarrow` package.
+
+        Args:
+            path: The path of the file
+            format: "arrow" for an (uncompressed) Arrow IPC file, or "parquet"
+                for a Parquet file. If None, the format is "parquet" if the path
+                ends with ".parquet", and "arrow" otherwise.
+        '''
+        from langcheck.metrics._metric_value_io import save_metric_value
+        save_metric_value(self, path, format)
+
+    @staticmethod
+    def load(path: str, format: Optional[str] = None) -> MetricValue:
+        '''Loads a :class:`~langcheck.metrics.metric_value.MetricValue` saved
+        with :meth:`~langcheck.metrics.metric_value.MetricValue.save`. The file
+        is memory-mapped and :attr:`values_array` is read from it directly.
+        The columns are converted to Python lists only when the fields (e.g.
+        `metric_values` or `prompts`) are first accessed, so the threshold
+        results and `to_df()` do not need the lists. This requires the
+        optional `pyarrow` package.
+
+        Args:
+            path: The path of the file
+            format: "arrow" or "parquet". If None, the format is inferred from
+                the path in the same way as in `save()`.
+
+        Returns:
+            A :class:`~langcheck.metrics.metric_value.MetricValue`, or a
+            :class:`~langcheck.metrics.metric_value.MetricValueWithThreshold`
+            if a MetricValueWithThreshold was saved
+        '''
+        from langcheck.metrics._metric_value_io import load_metric_value
+        return load_metric_value(path, format)
+
+    @staticmethod
+    def concat(metric_values: Sequence[MetricValue]) -> MetricValue:
+        '''Concatenates the values of a metric computed on several shards of
+        the data, in the given order. The values arrays and the threshold
+        results of the shards are concatenated as they are, so the thresholds
+        are not evaluated again.
+
+        Args:
+            metric_values: The MetricValues of the shards. They need to be of
+                the same metric, and have the same threshold (or no threshold).
+
+        Returns:
+            A :class:`~langcheck.metrics.metric_value.MetricValue`, or a
+            :class:`~langcheck.metrics.metric_value.MetricValueWithThreshold`
+            if the shards have a threshold
+        '''
+        from langcheck.metrics._shards import concat_metric_values
+        return concat_metric_values(metric_values)
+
+    @staticmethod
+    def merge(metric_values: Sequence[MetricValue],
+              shard_indices: Sequence[Sequence[int]]) -> MetricValue:
+        '''Merges the values of a metric computed on several shards of the
+        data back into the original order of the rows. This is the same as
+        :meth:`~langcheck.metrics.metric_value.MetricValue.concat`, except
+        that each row is placed at its index in the original data.
+
+        Example:
+            >>> shard_indices = [range(0, n, 2), range(1, n, 2)]
+            >>> shards = [toxicity([outputs[i] for i in indices])
+            ...           for indices in shard_indices]
+            >>> MetricValue.merge(shards, shard_indices)
+
+        Args:
+            metric_values: The MetricValues of the shards
+            shard_indices: The indices of the rows of each shard in the
+                original data. Together, they need to cover each index from 0
+                to the total number of rows exactly once.
+        '''
+        from langcheck.metrics._shards import merge_metric_values
+        return merge_metric_values(metric_values, shard_indices)
+
+    def summary(self) -> MetricSummary:
+        '''Returns the count, mean, variance, min, max and approximate
+        quantiles of the metric values as a
+        :class:`~langcheck.metrics.metric_summary.MetricSummary`, which can be
+        merged with the summaries of the other shards of the data.
+        '''
+        return MetricSummary.from_metric_value(self)
+
     def __str__(self) -> str:
         '''Returns a string representation of an
         :class:`~langcheck.metrics.metric_value.MetricValue` object.
@@ -81,59 +331,119 @@ class MetricValue(Generic[NumericType]):
                 f'{self.to_df()._repr_html_()}'  # type: ignore
                )
 
+    @property
+    def values_array(self) -> np.ndarray:
+        '''Returns the metric values as a read-only float array, where the
+        `None` values are NaN. The array is computed again only when
+        `metric_values` changes, and is shared with the objects returned by
+        the comparisons (e.g. `metric_value > 0.5`).
+        '''
+        return self._arrays()[0]
+
+    @property
+    def none_mask(self) -> np.ndarray:
+        '''Returns a read-only boolean array that is True where the metric
+        value is `None`.
+        '''
+        return self._arrays()[1]
+
+    def _arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        '''Returns the values array and the None mask, which are recomputed
+        only if `metric_values` is replaced or modified in place.
+        '''
+        # A lazy list is not converted if the arrays are already known
+        stored_values: _MetricValueList | _LazyList = self.__dict__[
+            'metric_values']
+        cache = self.__dict__.get('_array_cache')
+        # The arrays are up to date if the list they were computed from is
+        # still assigned and has not been changed since
+        if (cache is None or cache[0] is not stored_values or
+                cache[1] != stored_values.version):
+            metric_values = self.metric_values
+            # None is converted to NaN
+            values = np.array(metric_values, dtype=np.float64)
+            none_mask = np.isnan(values)
+            if none_mask.any():
+                # Tell the None values apart from actual NaN values
+                nan_indices = np.flatnonzero(none_mask)
+                none_mask[nan_indices] = [
+                    metric_values[i] is None for i in nan_indices
+                ]
+            self._set_arrays(values, none_mask)
+            cache = self.__dict__['_array_cache']
+        return cache[2], cache[3]
+
+    def _set_arrays(self, values: np.ndarray, none_mask: np.ndarray) -> None:
+        '''Sets the values array and the None mask of the current
+        `metric_values`, e.g. when they are computed from the arrays of the
+        shards that the metric values were concatenated from.
+        '''
+        values.flags.writeable = False
+        none_mask.flags.writeable = False
+        stored_values: _MetricValueList | _LazyList = self.__dict__[
+            'metric_values']
+        self.__dict__['_array_cache'] = (stored_values, stored_values.version,
+                                         values, none_mask)
+
+    def _with_threshold(
+        self,
+        threshold: float | int,
+        threshold_op: str,
+        threshold_array: Optional[np.ndarray] = None
+    ) -> MetricValueWithThreshold:
+        '''Returns a MetricValueWithThreshold that shares the fields (and the
+        values array) of this object instead of copying them. If the threshold
+        results are already known (e.g. when shards are concatenated), they can
+        be passed as `threshold_array` so that they are not computed again.
+        '''
+        metric_value_with_threshold = MetricValueWithThreshold.__new__(
+            MetricValueWithThreshold)
+        metric_value_with_threshold.__dict__.update(self.__dict__)
+        metric_value_with_threshold.threshold = threshold
+        metric_value_with_threshold.threshold_op = threshold_op
+        if threshold_array is None:
+            metric_value_with_threshold.__post_init__()
+        else:
+            metric_value_with_threshold._set_threshold_array(threshold_array)
+        return metric_value_with_threshold
+
     def __lt__(self, threshold: float | int) -> MetricValueWithThreshold:
         '''Allows the user to write a `metric_value < 0.5` expression.'''
-        all_fields = {f.name: getattr(self, f.name) for f in fields(self)}
-        return MetricValueWithThreshold(**all_fields,
-                                        threshold=threshold,
-                                        threshold_op='<')
+        return self._with_threshold(threshold, '<')
 
     def __le__(self, threshold: float | int) -> MetricValueWithThreshold:
         '''Allows the user to write a `metric_value <= 0.5` expression.'''
-        all_fields = {f.name: getattr(self, f.name) for f in fields(self)}
-        return MetricValueWithThreshold(**all_fields,
-                                        threshold=threshold,
-                                        threshold_op='<=')
+        return self._with_threshold(threshold, '<=')
 
     def __gt__(self, threshold: float | int) -> MetricValueWithThreshold:
         '''Allows the user to write a `metric_value > 0.5` expression.'''
-        all_fields = {f.name: getattr(self, f.name) for f in fields(self)}
-        return MetricValueWithThreshold(**all_fields,
-                                        threshold=threshold,
-                                        threshold_op='>')
+        return self._with_threshold(threshold, '>')
 
     def __ge__(self, threshold: float | int) -> MetricValueWithThreshold:
         '''Allows the user to write a `metric_value >= 0.5` expression.'''
-        all_fields = {f.name: getattr(self, f.name) for f in fields(self)}
-        return MetricValueWithThreshold(**all_fields,
-                                        threshold=threshold,
-                                        threshold_op='>=')
+        return self._with_threshold(threshold, '>=')
 
     def __eq__(self, threshold: float | int) -> MetricValueWithThreshold:
         '''Allows the user to write a `metric_value == 0.5` expression.'''
-        all_fields = {f.name: getattr(self, f.name) for f in fields(self)}
-        return MetricValueWithThreshold(**all_fields,
-                                        threshold=threshold,
-                                        threshold_op='==')
+        return self._with_threshold(threshold, '==')
 
     def __ne__(self, threshold: float | int) -> MetricValueWithThreshold:
         '''Allows the user to write a `metric_value != 0.5` expression.'''
-        all_fields = {f.name: getattr(self, f.name) for f in fields(self)}
-        return MetricValueWithThreshold(**all_fields,
-                                        threshold=threshold,
-                                        threshold_op='!=')
+        return self._with_threshold(threshold, '!=')
 
     def all(self) -> bool:
         '''Equivalent to all(metric_value.metric_values). This is mostly useful
         for binary metric functions.
         '''
-        return all(self.metric_values)
+        values, none_mask = self._arrays()
+        return bool(np.all((values != 0) & ~none_mask))
 
     def any(self) -> bool:
         '''Equivalent to any(metric_value.metric_values). This is mostly useful
         for binary metric functions.
         '''
-        return any(self.metric_values)
+        values, none_mask = self._arrays()
+        return bool(np.any((values != 0) & ~none_mask))
 
     def __bool__(self):
         raise ValueError(
@@ -171,7 +481,27 @@ class MetricValue(Generic[NumericType]):
 
     @property
     def is_pairwise(self) -> bool:
-        return isinstance(self.generated_outputs, tuple)
+        # The stored field, so that lazy lists are not converted
+        return isinstance(self.__dict__['generated_outputs'], tuple)
+
+
+# The descriptors are added after the dataclass is created, so that the
+# dataclass still treats the list fields as ordinary fields
+setattr(MetricValue, 'metric_values', _MetricValuesField('metric_values'))
+for _field_name in [
+        'prompts', 'generated_outputs', 'reference_outputs', 'sources',
+        'explanations', 'timed_out', 'latencies'
+]:
+    setattr(MetricValue, _field_name, _ListField(_field_name))
+
+_THRESHOLD_OPERATORS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne
+}
 
 
 @dataclass
@@ -187,33 +517,34 @@ class MetricValueWithThreshold(MetricValue):
         '''Computes self.pass_rate and self.threshold_results based on the
         constructor arguments.
         '''
-        operators = {
-            '<': operator.lt,
-            '<=': operator.le,
-            '>': operator.gt,
-            '>=': operator.ge,
-            '==': operator.eq,
-            '!=': operator.ne
-        }
-
-        if self.threshold_op not in operators:
+        if self.threshold_op not in _THRESHOLD_OPERATORS:
             raise ValueError(f'Invalid threshold operator: {self.threshold_op}')
 
         if self.threshold is None:
             raise ValueError("A threshold of `None` is not supported.")
 
-        if None in self.metric_values:
+        values, none_mask = self._arrays()
+        if none_mask.any():
             warnings.warn(
                 "The threshold result for `None` values in `metric_values` will"
                 " always be `False`.")
 
         # Set the result to `False` if the metric value is `None`
-        self._threshold_results = [
-            operators[self.threshold_op](x, self.threshold)
-            if x is not None else False for x in self.metric_values
-        ]
-
-        self._pass_rate = mean(self._threshold_results)
+        with np.errstate(invalid='ignore'):
+            threshold_results = _THRESHOLD_OPERATORS[self.threshold_op](
+                values, self.threshold)
+        threshold_results &= ~none_mask
+        self._set_threshold_array(threshold_results)
+
+    def _set_threshold_array(self, threshold_results: np.ndarray) -> None:
+        '''Sets the threshold results and computes the pass rate.'''
+        threshold_results.flags.writeable = False
+        self._threshold_array = threshold_results
+        self._threshold_results: Optional[List[bool]] = None
+
+        num_results = len(threshold_results)
+        self._pass_rate = (np.count_nonzero(threshold_results) /
+                           num_results if num_results else float('nan'))
 
     @property
     def pass_rate(self) -> float:
@@ -225,16 +556,23 @@ class MetricValueWithThreshold(MetricValue):
         '''Returns a list of booleans indicating whether each data point passes
         the threshold.
         '''
-        return self._threshold_results
+        threshold_results = self._threshold_results
+        if threshold_results is None:
+            threshold_results = self._threshold_array.tolist()
+            self._threshold_results = threshold_results
+        return threshold_results
+
+    @property
+    def threshold_array(self) -> np.ndarray:
+        '''Returns the threshold results as a read-only boolean array.'''
+        return self._threshold_array
 
     def to_df(self) -> pd.DataFrame:
         '''Returns a DataFrame of metric values for each data point.'''
         dataframe = super().to_df()
 
-        dataframe['threshold_test'] = [
-            f'{self.threshold_op} {self.threshold}' for _ in self.metric_values
-        ]
-        dataframe['threshold_result'] = self.threshold_results
+        dataframe['threshold_test'] = f'{self.threshold_op} {self.threshold}'
+        dataframe['threshold_result'] = self._threshold_array
 
         return dataframe
 
@@ -264,11 +602,11 @@ class MetricValueWithThreshold(MetricValue):
 
     def all(self) -> bool:
         '''Returns True if all data points pass the threshold.'''
-        return all(self.threshold_results)
+        return bool(self._threshold_array.all())
 
     def any(self) -> bool:
         '''Returns True if any data points pass the threshold.'''
-        return any(self.threshold_results)
+        return bool(self._threshold_array.any())
 
     def __bool__(self) -> bool:
         '''Allows the user to write an `assert metric_value > 0.5` or
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from typing import Callable, Dict, List, Optional
+
+from langcheck.metrics._validation import validate_parameters_reference_free
+from langcheck.metrics.metric_value import MetricValue
+from langcheck.stats import TextStats, compute_stats_batch
+
+
+def _en_flesch_reading_ease(stats: TextStats) -> float:
+    words_per_sentence = stats.num_words / stats.num_sentences
+    syllables_per_word = stats.num_syllables / stats.num_words
+    return 206.835 - 1.015 * words_per_sentence - 84.6 * syllables_per_word
+
+
+def _en_flesch_kincaid_grade(stats: TextStats) -> float:
+    words_per_sentence = stats.num_words / stats.num_sentences
+    syllables_per_word = stats.num_syllables / stats.num_words
+    return 0.39 * words_per_sentence + 11.8 * syllables_per_word - 15.59
+
+
+def _de_flesch_reading_ease(stats: TextStats) -> float:
+    words_per_sentence = stats.num_words / stats.num_sentences
+    syllables_per_word = stats.num_syllables / stats.num_words
+    return 180 - words_per_sentence - 58.5 * syllables_per_word
+
+
+# The readability formulas of each language, keyed by the metric name
+_READABILITY_FORMULAS: Dict[str, Dict[str, Callable[[TextStats], float]]] = {
+    'en': {
+        'flesch_reading_ease': _en_flesch_reading_ease,
+        'flesch_kincaid_grade': _en_flesch_kincaid_grade,
+    },
+    'de': {
+        'flesch_reading_ease': _de_flesch_reading_ease,
+    },
+}
+
+
+def readability(
+        generated_outputs: List[str] | str,
+        prompts: Optional[List[str] | str] = None,
+        languages: List[str] | str = 'en',
+        metric_names: Optional[List[str]] = None) -> List[MetricValue[float]]:
+    '''Calculates several readability metrics of the generated outputs at
+    once. The sentences, words, and syllables of each output are counted only
+    once, and every readability score is derived from those counts, so this is
+    faster than calling each readability metric separately.
+
+    The supported metrics are :func:`~langcheck.metrics.en.flesch_reading_ease`
+    and :func:`~langcheck.metrics.en.flesch_kincaid_grade` for English ('en'),
+    and :func:`~langcheck.metrics.de.flesch_reading_ease` for German ('de').
+
+    Args:
+        generated_outputs: The model generated output(s) to evaluate
+        prompts: The prompts used to generate the output(s). Prompts are
+            optional metadata and not used to calculate the metric.
+        languages: The language(s) of the readability formulas to use.
+            default 'en'
+        metric_names: The names of the readability metrics to compute, e.g.
+            ['flesch_reading_ease']. Each metric is computed for every
+            requested language that supports it. If None, all the metrics of
+            the requested languages are computed. default None
+
+    Returns:
+        A list of :class:`~langcheck.metrics.metric_value.MetricValue` objects,
+        one per metric and language, in the order of `languages`
+    '''
+    if isinstance(languages, str):
+        languages = [languages]
+    for language in languages:
+        if language not in _READABILITY_FORMULAS:
+            raise ValueError(
+                f'Unsupported language for readability metrics: {language}. '
+                f'The supported languages are {list(_READABILITY_FORMULAS)}.')
+    formulas = [
+        (language, metric_name, formula)
+        for language in languages
+        for metric_name, formula in _READABILITY_FORMULAS[language].items()
+        if metric_names is None or metric_name in metric_names
+    ]
+    for metric_name in metric_names or []:
+        if not any(name == metric_name for _, name, _ in formulas):
+            raise ValueError(
+                f'The readability metric {metric_name} is not supported for '
+                f'the languages {languages}.')
+
+    generated_outputs, prompts = validate_parameters_reference_free(
+        generated_outputs, prompts)
+    output_stats = compute_stats_batch(generated_outputs)
+
+    return [
+        MetricValue(metric_name=metric_name,
+                    prompts=prompts,
+                    generated_outputs=generated_outputs,
+                    reference_outputs=None,
+                    sources=None,
+                    explanations=None,
+                    metric_values=[formula(stat)
+                                   for stat in output_stats],
+                    language=language)
+        for language, metric_name, formula in formulas
+    ]
@@ -1,10 +1,15 @@
 from __future__ import annotations
 
-from typing import List, Optional
+import os
+from typing import Callable, Dict, List, Optional, Tuple
 
+from rouge_score.tokenizers import Tokenizer
+
+from langcheck.metrics._rouge import (RougeCorpusScore, rouge_corpus_f1_scores,
+                                      rouge_f1_scores)
 from langcheck.metrics._validation import validate_parameters_reference_based
 from langcheck.metrics.metric_value import MetricValue
-from langcheck.utils.progess_bar import tqdm_wrapper
+from langcheck.utils.progress_bar import tqdm_wrapper
 
 
 def exact_match(generated_outputs: List[str] | str,
@@ -42,3 +47,172 @@ def exact_match(generated_outputs: List[str] | str,
                        explanations=None,
                        metric_values=metric_values,
                        language=None)
+
+
+def rouge(generated_outputs: List[str] | str,
+          reference_outputs: List[str] | str,
+          prompts: Optional[List[str] | str] = None,
+          language: str = 'en',
+          rouge_types: Optional[List[str]] = None,
+          *,
+          tokenizer: Optional[Tokenizer] = None,
+          num_workers: int = 1) -> List[MetricValue[float]]:
+    '''Calculates several ROUGE metrics at once. The values are the same as
+    those of `rouge1()`, `rouge2()` and `rougeL()` of the language, but each
+    output is tokenized only once, and all the metrics are computed from the
+    same tokens. This is faster than calling the metric functions one by one.
+
+    Args:
+        generated_outputs: The model generated output(s) to evaluate
+        reference_outputs: The reference output(s)
+        prompts: The prompts used to generate the output(s). Prompts are
+            optional metadata and not used to calculate the metric.
+        language: The language of the outputs ('en', 'ja', 'zh' or 'de'),
+            which sets the tokenizer. default 'en'
+        rouge_types: The ROUGE metrics to compute ('rouge1', 'rouge2' and/or
+            'rougeL'). default all of them
+        tokenizer: The tokenizer to use instead of the default tokenizer of the
+            language
+        num_workers: The number of worker processes computing the scores in
+            chunks. default 1 (the scores are computed in the current process)
+
+    Returns:
+        A list of :class:`~langcheck.metrics.metric_value.MetricValue` objects,
+        one per ROUGE metric in the order of `rouge_types`
+    '''
+    generated_outputs, reference_outputs, prompts = validate_parameters_reference_based(  # NOQA: E501
+        generated_outputs, reference_outputs, prompts)
+    rouge_types, score_types = _rouge_score_types(rouge_types)
+    f1_values = rouge_f1_scores(
+        generated_outputs,
+        reference_outputs,
+        score_types,
+        tokenizer,
+        tokenizer_factory=_rouge_tokenizer_factory(language),
+        num_workers=num_workers)
+    return [
+        MetricValue(metric_name=rouge_type,
+                    prompts=prompts,
+                    generated_outputs=generated_outputs,
+                    reference_outputs=reference_outputs,
+                    sources=None,
+                    explanations=None,
+                    metric_values=f1_values[score_type],
+                    language=language)
+        for rouge_type, score_type in zip(rouge_types, score_types)
+    ]
+
+
+def rouge_corpus(
+    generated_outputs: List[str] | str,
+    reference_outputs: List[str] | str,
+    language: str = 'en',
+    rouge_types: Optional[List[str]] = None,
+    *,
+    tokenizer: Optional[Tokenizer] = None,
+    num_workers: Optional[int] = None,
+    chunk_size: int = 1000,
+    num_bootstrap: int = 1000,
+    confidence_level: float = 0.95,
+    seed: int = 0
+) -> Tuple[List[MetricValue[float]], Dict[str, RougeCorpusScore]]:
+    '''Calculates the ROUGE F1 scores between the generated outputs and the
+    reference outputs, along with their corpus-level means and bootstrap
+    confidence intervals. This is meant for large corpora: the pairs are
+    scored in chunks by a pool of worker processes, where each worker creates
+    the tokenizer of the language once. Every requested ROUGE type is computed
+    from the same tokens, and the bootstrap replicates are accumulated in the
+    workers as well.
+
+    The bootstrap is a Poisson bootstrap, where each pair gets a Poisson(1)
+    weight in each replicate. The intervals are reproducible for a given
+    `seed` and `chunk_size`, whatever the number of workers.
+
+    Args:
+        generated_outputs: The model generated output(s) to evaluate
+        reference_outputs: The reference output(s)
+        language: The language of the outputs ('en', 'ja', 'zh' or 'de'),
+            which sets the tokenizer. default 'en'
+        rouge_types: The ROUGE metrics to compute ('rouge1', 'rouge2' and/or
+            'rougeL'). default all of them
+        tokenizer: The tokenizer to use instead of the default tokenizer of the
+            language. It is pickled to each worker.
+        num_workers: The number of worker processes. default the number of CPUs
+        chunk_size: The number of pairs scored by a worker at once. default
+            1000
+        num_bootstrap: The number of bootstrap replicates. default 1000
+        confidence_level: The confidence level of the intervals. default 0.95
+        seed: The seed of the bootstrap. default 0
+
+    Returns:
+        A list of :class:`~langcheck.metrics.metric_value.MetricValue` objects,
+        one per ROUGE metric, and a dict mapping each ROUGE metric to its
+        corpus-level mean and confidence interval (a `RougeCorpusScore`)
+    '''
+    generated_outputs, reference_outputs, _ = validate_parameters_reference_based(  # NOQA: E501
+        generated_outputs, reference_outputs, None)
+    rouge_types, score_types = _rouge_score_types(rouge_types)
+    f1_values, aggregates = rouge_corpus_f1_scores(
+        generated_outputs,
+        reference_outputs,
+        score_types,
+        tokenizer,
+        tokenizer_factory=_rouge_tokenizer_factory(language),
+        num_workers=num_workers or os.cpu_count() or 1,
+        chunk_size=chunk_size,
+        num_bootstrap=num_bootstrap,
+        confidence_level=confidence_level,
+        seed=seed)
+
+    metric_values = [
+        MetricValue(metric_name=rouge_type,
+                    prompts=None,
+                    generated_outputs=generated_outputs,
+                    reference_outputs=reference_outputs,
+                    sources=None,
+                    explanations=None,
+                    metric_values=f1_values[score_type],
+                    language=language)
+        for rouge_type, score_type in zip(rouge_types, score_types)
+    ]
+    return metric_values, {
+        rouge_type: aggregates[score_type]
+        for rouge_type, score_type in zip(rouge_types, score_types)
+    }
+
+
+def _rouge_score_types(
+        rouge_types: Optional[List[str]]) -> Tuple[List[str], List[str]]:
+    '''Returns the ROUGE metrics to compute (all of them if `rouge_types` is
+    None), and the ROUGE types of `rouge_score` that they are computed as.
+    '''
+    rouge_types = rouge_types or ['rouge1', 'rouge2', 'rougeL']
+    for rouge_type in rouge_types:
+        if rouge_type not in ['rouge1', 'rouge2', 'rougeL']:
+            raise ValueError(f'Unsupported ROUGE metric: {rouge_type}')
+    # The ROUGE-L metrics are summary-level (see `langcheck.metrics.rougeL`)
+    score_types = [
+        'rougeLsum' if rouge_type == 'rougeL' else rouge_type
+        for rouge_type in rouge_types
+    ]
+    return rouge_types, score_types
+
+
+def _rouge_tokenizer_factory(
+        language: str) -> Optional[Callable[[], Tokenizer]]:
+    '''Returns the class of the default ROUGE tokenizer of the language, or
+    None for the default tokenizer of `rouge_score` (for English).
+    '''
+    if language == 'en':
+        return None
+    elif language == 'ja':
+        from langcheck.metrics.ja._tokenizers import JanomeTokenizer
+        return JanomeTokenizer
+    elif language == 'zh':
+        from langcheck.metrics.zh._tokenizers import HanLPTokenizer
+        return HanLPTokenizer
+    elif language == 'de':
+        from langcheck.metrics.de._tokenizers import DeTokenizer
+        return DeTokenizer
+    else:
+        raise ValueError(f'Unsupported language: {language}')
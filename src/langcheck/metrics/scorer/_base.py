@@ -1,12 +1,16 @@
 from __future__ import annotations
 
-from typing import Generic, Optional, TypeVar
+from typing import Any, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+from weakref import WeakKeyDictionary
 
 import torch
 from sentence_transformers import util
 from torch import Tensor
 
-from langcheck.utils.progess_bar import tqdm_wrapper
+from langcheck.profiling import profile_stage
+from langcheck.utils.progress_bar import tqdm_wrapper
+
+from .._deadline import deadline_exceeded, record_timed_out
 
 # Define a type variable for token type.
 # This type is used to represent the list of tokens returned by the
@@ -14,15 +18,19 @@ from langcheck.utils.progess_bar import tqdm_wrapper
 # can be a list, dict, or any other type.
 _TokensType = TypeVar('_TokensType')
 
+# Define a type variable for input type. Most scorers take a list of strings,
+# but some take tuples of strings (e.g. (claim, source) pairs).
+_InputType = TypeVar('_InputType')
+
 
-class BaseSingleScorer(Generic[_TokensType]):
+class BaseSingleScorer(Generic[_InputType, _TokensType]):
     '''Base class for single input scorers.
     '''
 
     def __init__(self) -> None:
         self.batch_size = 8
 
-    def _tokenize(self, inputs: list[str]) -> _TokensType:
+    def _tokenize(self, inputs: list[_InputType]) -> _TokensType:
         '''Tokenize the inputs. The returned type should be defined in the
         subclass.
         '''
@@ -42,11 +50,12 @@ class BaseSingleScorer(Generic[_TokensType]):
         '''
         raise NotImplementedError
 
-    def score(self, inputs: list[str]) -> list[Optional[float]]:
+    def score(self, inputs: list[_InputType]) -> list[Optional[float]]:
         '''Score the inputs. Basically subclasses should not override this.
         '''
 
-        tokens = self._tokenize(inputs)
+        with profile_stage(f'{type(self).__name__}._tokenize', len(inputs)):
+            tokens = self._tokenize(inputs)
 
         input_length = len(inputs)
 
@@ -54,15 +63,34 @@ class BaseSingleScorer(Generic[_TokensType]):
         for i in tqdm_wrapper(range(0, input_length, self.batch_size),
                               total=(input_length + self.batch_size - 1) //
                               self.batch_size):
+            if deadline_exceeded():
+                break
 
-            batch_tokens = self._slice_tokens(
-                tokens, i, min(i + self.batch_size, input_length))
+            end_idx = min(i + self.batch_size, input_length)
+            batch_tokens = self._slice_tokens(tokens, i, end_idx)
 
-            scores.extend(self._score_tokens(batch_tokens))
+            with profile_stage(f'{type(self).__name__}._score_tokens',
+                               end_idx - i):
+                scores.extend(self._score_tokens(batch_tokens))
 
+        # The inputs that were not scored before the deadline are None
+        num_scored = len(scores)
+        if num_scored < input_length:
+            scores.extend([None] * (input_length - num_scored))
+            record_timed_out([i >= num_scored for i in range(input_length)])
         return scores
 
 
+# The normalized embeddings of the phrase banks, cached per embedding model (or
+# client) for as long as the model is alive. For each model, the keys are the
+# embedding settings and the phrases.
+_PhraseBanks = Dict[Tuple[Hashable, Tuple[str, ...]], Tensor]
+_phrase_bank_embeddings: WeakKeyDictionary[Any,
+                                           _PhraseBanks] = (WeakKeyDictionary())
+# The maximum number of phrase banks cached per model
+_MAX_PHRASE_BANKS = 8
+
+
 class BaseSimilarityScorer:
     '''Base class for similarity score calculators, which calculate the
     similarity score between two inputs.
@@ -77,6 +105,12 @@ class BaseSimilarityScorer:
         '''
         raise NotImplementedError
 
+    def _profiled_embed(self, inputs: list[str]) -> Tensor:
+        '''Embed the inputs, recording the time taken to the active profiles.
+        '''
+        with profile_stage(f'{type(self).__name__}._embed', len(inputs)):
+            return self._embed(inputs)
+
     def _get_similarity_score(self, embedding1: Tensor,
                               embedding2: Tensor) -> list[float]:
         '''Calculate the similarity score between the two embeddings. The
@@ -90,7 +124,8 @@ class BaseSimilarityScorer:
         cosine_scores = torch.clamp(cosine_scores, -1.0, 1.0)
         return cosine_scores.tolist()
 
-    def score(self, inputs1: list[str], inputs2: list[str]) -> list[float]:
+    def score(self, inputs1: list[str],
+              inputs2: list[str]) -> list[Optional[float]]:
         '''Score the similarity between the inputs. Basically subclasses should
         not override this.
         '''
@@ -104,17 +139,26 @@ class BaseSimilarityScorer:
                               total=(input_length + self.batch_size - 1) //
                               self.batch_size,
                               desc='Getting embeddings'):
+            if deadline_exceeded():
+                # The inputs that were not embedded before the deadline are
+                # not scored
+                record_timed_out([j >= i for j in range(input_length)])
+                input_length = i
+                break
             batch_inputs1 = inputs1[i:min(i + self.batch_size, input_length)]
             batch_inputs2 = inputs2[i:min(i + self.batch_size, input_length)]
 
-            embeddings1.append(self._embed(batch_inputs1))
-            embeddings2.append(self._embed(batch_inputs2))
+            embeddings1.append(self._profiled_embed(batch_inputs1))
+            embeddings2.append(self._profiled_embed(batch_inputs2))
+
+        if not embeddings1:
+            return [None] * len(inputs1)
 
         # Concatenate the embeddings
         embedding1 = torch.cat(embeddings1, dim=0)
         embedding2 = torch.cat(embeddings2, dim=0)
 
-        scores: list[float] = []
+        scores: list[Optional[float]] = []
         for i in tqdm_wrapper(range(0, input_length, self.batch_size),
                               total=(input_length + self.batch_size - 1) //
                               self.batch_size,
@@ -127,4 +171,69 @@ class BaseSimilarityScorer:
             scores.extend(
                 self._get_similarity_score(batch_embedding1, batch_embedding2))
 
-        return scores
+        return scores + [None] * (len(inputs1) - input_length)
+
+    def _embedding_cache_key(self) -> Optional[tuple[Any, Hashable]]:
+        '''Return the object whose lifetime bounds the cached embeddings
+        (e.g. the embedding model) and the embedding settings, or None if the
+        embeddings should not be cached.
+        '''
+        return None
+
+    def _embed_phrase_bank(self, phrases: list[str]) -> Tensor:
+        '''Embed and normalize the phrases, reusing the embeddings of a
+        previous call with the same phrases if possible.
+        '''
+        cache_key = self._embedding_cache_key()
+        if cache_key is not None:
+            owner, settings = cache_key
+            banks = _phrase_bank_embeddings.setdefault(owner, {})
+            bank_key = (settings, tuple(phrases))
+            if bank_key in banks:
+                return banks[bank_key]
+
+        embeddings = torch.cat([
+            self._profiled_embed(phrases[i:i + self.batch_size])
+            for i in range(0, len(phrases), self.batch_size)
+        ])
+        embeddings = torch.nn.functional.normalize(embeddings.float(), dim=-1)
+
+        if cache_key is not None:
+            if len(banks) >= _MAX_PHRASE_BANKS:
+                del banks[next(iter(banks))]
+            banks[bank_key] = embeddings
+        return embeddings
+
+    def max_similarity(self, inputs: list[str],
+                       phrases: list[str]) -> list[Optional[float]]:
+        '''Score each input by its highest cosine similarity to a bank of
+        phrases. The bank is embedded once (and cached across calls when
+        possible), and each batch of inputs is compared with the whole bank in
+        one matrix multiplication.
+        '''
+        assert phrases, 'The phrase bank should not be empty.'
+        phrase_embeddings = self._embed_phrase_bank(phrases)
+
+        input_length = len(inputs)
+        scores: list[Optional[float]] = []
+        for i in tqdm_wrapper(range(0, input_length, self.batch_size),
+                              total=(input_length + self.batch_size - 1) //
+                              self.batch_size,
+                              desc='Computing similarity to the phrases'):
+            if deadline_exceeded():
+                # The inputs that were not embedded before the deadline are
+                # not scored
+                record_timed_out([j >= i for j in range(input_length)])
+                break
+            embeddings = torch.nn.functional.normalize(self._profiled_embed(
+                inputs[i:i + self.batch_size]).float(),
+                                                       dim=-1)
+            similarities = embeddings @ phrase_embeddings.to(
+                embeddings.device).T
+            # Numerical instability can cause the dot product of almost
+            # identical vectors to exceed 1.0 slightly, so we clip the outputs.
+            scores.extend(
+                torch.clamp(similarities.max(dim=-1).values, -1.0,
+                            1.0).tolist())
+
+        return scores + [None] * (input_length - len(scores))
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Optional, Tuple
+from typing import Any, Hashable, Optional, Tuple
 
 import torch
 from transformers import BatchEncoding
@@ -134,13 +134,105 @@ class AutoModelForSequenceClassificationScorer(BaseSingleScorer):
 
 class SentenceTransformerSimilarityScorer(BaseSimilarityScorer):
     '''Scorer using SentenceTransformer.
+
+    By default, each input is embedded as a whole, so the model silently
+    truncates inputs longer than its maximum sequence length. If `chunk_pooling`
+    is set, long inputs are instead split into windows of tokens that fit in the
+    model, the windows of all inputs in a batch are embedded in one call, and
+    the window embeddings of each input are pooled into one embedding.
     '''
 
-    def __init__(self, language, metric='semantic_similarity'):
+    def __init__(self,
+                 language,
+                 metric='semantic_similarity',
+                 chunk_pooling: Optional[str] = None,
+                 chunk_overlap: int = 0):
+        '''
+        Initialize the scorer with the provided configs.
+
+        Args:
+            language: The language of the model
+            metric: The metric of the model (default 'semantic_similarity')
+            chunk_pooling: How to pool the embeddings of the token windows of a
+                long input. The value should be either "mean", "max", or None
+                to embed each input as a whole (truncated by the model).
+            chunk_overlap: The number of tokens shared by consecutive windows
+        '''
         super().__init__()
+        assert chunk_pooling in [
+            None, 'mean', 'max'
+        ], 'Chunk pooling is invalid. The value should be either "mean", "max" or None.'  # NOQA: E501
 
         from langcheck.metrics.model_manager import manager
         self.model = manager.fetch_model(language=language, metric=metric)
+        self.chunk_pooling = chunk_pooling
+        self.chunk_overlap = chunk_overlap
 
     def _embed(self, inputs: list[str]) -> torch.Tensor:
-        return self.model.encode(inputs, convert_to_tensor=True)  # type: ignore
+        if self.chunk_pooling is None:
+            return self.model.encode(  # type: ignore
+                inputs, convert_to_tensor=True)
+
+        windows, window_owners = self._split_into_windows(inputs)
+        window_embeddings = torch.nn.functional.normalize(
+            self.model.encode(  # type: ignore
+                windows, convert_to_tensor=True).float(),
+            dim=-1)
+        owners = torch.tensor(window_owners, device=window_embeddings.device)
+        index = owners.unsqueeze(1).expand_as(window_embeddings)
+        pooled = torch.zeros(len(inputs),
+                             window_embeddings.shape[1],
+                             device=window_embeddings.device)
+        reduce = 'mean' if self.chunk_pooling == 'mean' else 'amax'
+        return pooled.scatter_reduce(0,
+                                     index,
+                                     window_embeddings,
+                                     reduce=reduce,
+                                     include_self=False)
+
+    def _split_into_windows(self,
+                            inputs: list[str]) -> tuple[list[str], list[int]]:
+        '''Split the inputs into windows of tokens that fit in the model
+        together with its special tokens. Returns the windows of all inputs and
+        the index of the input of each window. Inputs that fit in the model are
+        kept as a single window.
+        '''
+        tokenizer = self.model.tokenizer  # type: ignore
+        window_size = (
+            self.model.max_seq_length -  # type: ignore
+            tokenizer.num_special_tokens_to_add())
+        assert 0 <= self.chunk_overlap < window_size, (
+            'The chunk overlap should be smaller than the window size.')
+        stride = window_size - self.chunk_overlap
+
+        use_offsets = getattr(tokenizer, 'is_fast', False)
+        encodings = tokenizer(inputs,
+                              add_special_tokens=False,
+                              return_offsets_mapping=use_offsets)
+
+        windows: list[str] = []
+        window_owners: list[int] = []
+        for i, text in enumerate(inputs):
+            input_ids = encodings['input_ids'][i]
+            if len(input_ids) <= window_size:
+                windows.append(text)
+                window_owners.append(i)
+                continue
+            for start in range(0, len(input_ids) - self.chunk_overlap, stride):
+                end = min(start + window_size, len(input_ids))
+                if use_offsets:
+                    # Slice the original text, so that the windows keep its
+                    # exact characters
+                    offsets = encodings['offset_mapping'][i]
+                    windows.append(text[offsets[start][0]:offsets[end - 1][1]])
+                else:
+                    windows.append(
+                        tokenizer.decode(input_ids[start:end],
+                                         skip_special_tokens=True))
+                window_owners.append(i)
+        return windows, window_owners
+
+    def _embedding_cache_key(self) -> Optional[tuple[Any, Hashable]]:
+        if self.chunk_pooling is None:
+            return self.model, None
+        return self.model, (self.chunk_pooling, self.chunk_overlap)
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+from typing import Any, List, Optional, Tuple
+
+import torch
+
+from ._base import BaseSingleScorer
+
+# The token IDs of each input, and whether each input fits in the model
+_UniEvalTokens = Tuple[List[List[int]], List[bool]]
+
+# The beginning of the input, which is followed by the claim
+_PREFIX = 'question: Is this claim consistent with the document? </s> claim:'
+# The text between the claim and the source
+_SEPARATOR = ' </s> document:'
+# A (claim, source) pair that is tokenized both in pieces and in full to check
+# that the tokenizer gives the same token IDs either way. It has the characters
+# that a tokenizer is most likely to merge or normalize differently.
+_CANARY_INPUT = ('The  claim\'s "quoted", ünïcode & 123.5 text ',
+                 '\tA source\nwith\u3000various   spaces.')
+
+
+class UniEvalFactualConsistencyScorer(BaseSingleScorer[Tuple[str, str],
+                                                       _UniEvalTokens]):
+    '''Scorer using the UniEval-fact model, which scores the consistency of a
+    claim with a source document as the probability of answering "Yes" rather
+    than "No" to "Is this claim consistent with the document?". The inputs are
+    (claim, source) pairs.
+
+    Ref:
+        https://github.com/maszhongming/UniEval
+    '''
+
+    def __init__(self,
+                 language: str = 'en',
+                 metric: str = 'factual_consistency',
+                 device: str = 'cpu',
+                 batch_size: int = 8,
+                 overflow_strategy: str = 'truncate',
+                 max_input_length: Optional[int] = None):
+        '''
+        Initialize the scorer with the provided configs.
+
+        Args:
+            language: The language of the model (default 'en')
+            metric: The metric of the model (default 'factual_consistency')
+            device: The device on which the model is run (default 'cpu')
+            batch_size: The number of inputs scored in one forward pass
+            overflow_strategy: The strategy to handle the overflow of the input.
+                The value should be either "raise", "truncate" or "nullify".
+            max_input_length: The maximum length of the input. If None, the
+                maximum length of the tokenizer is used.
+        '''
+        super().__init__()
+        assert overflow_strategy in [
+            'raise', 'truncate', 'nullify'
+        ], 'Overflow strategy is invalid. The value should be either "raise", "truncate" or "nullify".'  # NOQA: E501
+        from langcheck.metrics.model_manager import manager
+        tokenizer, model = manager.fetch_model(language=language, metric=metric)
+
+        self.tokenizer: Any = tokenizer
+        self.model: Any = model.to(device)  # type: ignore
+        self.model.eval()
+        self.device = device
+        self.batch_size = batch_size
+        self.overflow_strategy = overflow_strategy
+        self.max_input_length: int = (max_input_length or
+                                      self.tokenizer.model_max_length)
+
+        self.pos_id = self.tokenizer('Yes')['input_ids'][0]
+        self.neg_id = self.tokenizer('No')['input_ids'][0]
+        # Whether tokenizing the inputs in pieces gives the same token IDs as
+        # tokenizing them in full, which is checked on the first call
+        self._pieces_match_full_inputs: Optional[bool] = None
+
+    def _tokenize(self, inputs: list[tuple[str, str]]) -> _UniEvalTokens:
+        '''Tokenize the inputs and validate their length. If the overflow
+        strategy is 'raise', it raises an error when an input is too long.
+
+        The inputs are `question: Is this claim consistent with the document?
+        </s> claim: {claim} </s> document: {source}`. The claims of one
+        generated output share the same source, so instead of tokenizing the
+        full input once per claim, each unique source is tokenized once, the
+        claims are tokenized in bulk, and the inputs are assembled by
+        concatenating the cached token IDs. The pieces are split at whitespace,
+        which the SentencePiece tokenizer of UniEval never merges tokens
+        across. Since another tokenizer can be configured in the ModelManager,
+        this is checked once per scorer on a canary input, and the full inputs
+        are tokenized instead if the token IDs differ.
+        '''
+        if not inputs:
+            return [], []
+        if self._pieces_match_full_inputs is None:
+            canary_ids_in_pieces = self._ids_in_pieces([_CANARY_INPUT])
+            canary_ids_in_full = self._ids_in_full([_CANARY_INPUT])
+            self._pieces_match_full_inputs = (
+                canary_ids_in_pieces == canary_ids_in_full)
+        if self._pieces_match_full_inputs:
+            full_ids_list = self._ids_in_pieces(inputs)
+        else:
+            full_ids_list = self._ids_in_full(inputs)
+
+        # Find the special tokens that the tokenizer adds around a text (i.e.
+        # "</s>" at the end for UniEval)
+        prefix_ids = self._tokenize_texts([_PREFIX])[0]
+        special_ids = self.tokenizer(_PREFIX)['input_ids']
+        start = next(i for i in range(len(special_ids))
+                     if special_ids[i:i + len(prefix_ids)] == prefix_ids)
+        head_ids = special_ids[:start]
+        tail_ids = special_ids[start + len(prefix_ids):]
+
+        # Truncate from the end, leaving room for the special tokens
+        max_length = self.max_input_length - len(head_ids) - len(tail_ids)
+        input_ids_list = [
+            head_ids + full_ids[:max_length] + tail_ids
+            for full_ids in full_ids_list
+        ]
+        input_validation_results = [
+            len(full_ids) <= max_length for full_ids in full_ids_list
+        ]
+
+        if self.overflow_strategy == 'truncate':
+            return input_ids_list, [True] * len(inputs)
+        if self.overflow_strategy == 'raise' and not all(
+                input_validation_results):
+            raise ValueError('Some of the inputs are too long.')
+        return input_ids_list, input_validation_results
+
+    def _tokenize_texts(self, texts: list[str]) -> list[list[int]]:
+        '''Tokenize the texts without the special tokens.'''
+        return self.tokenizer(texts, add_special_tokens=False)['input_ids']
+
+    def _ids_in_full(self, inputs: list[tuple[str, str]]) -> list[list[int]]:
+        '''Tokenize the full inputs, without the special tokens.'''
+        return self._tokenize_texts([
+            f'{_PREFIX} {claim}{_SEPARATOR} {source}'
+            for claim, source in inputs
+        ])
+
+    def _ids_in_pieces(self, inputs: list[tuple[str, str]]) -> list[list[int]]:
+        '''Tokenize the inputs by concatenating the token IDs of the claims
+        and of each unique source, without the special tokens.
+        '''
+        claims = [claim for claim, _ in inputs]
+        sources = [source for _, source in inputs]
+        prefix_ids, separator_ids = self._tokenize_texts([_PREFIX, _SEPARATOR])
+        claim_ids_list = self._tokenize_texts([f' {claim}' for claim in claims])
+        unique_sources = list(dict.fromkeys(sources))
+        unique_source_ids = self._tokenize_texts(
+            [f' {source}' for source in unique_sources])
+        source_ids_map = dict(zip(unique_sources, unique_source_ids))
+        return [
+            prefix_ids + claim_ids + separator_ids + source_ids_map[source]
+            for claim_ids, source in zip(claim_ids_list, sources)
+        ]
+
+    def _slice_tokens(self, tokens: _UniEvalTokens, start_idx: int,
+                      end_idx: int) -> _UniEvalTokens:
+        input_ids_list, validation_results = tokens
+        return (input_ids_list[start_idx:end_idx],
+                validation_results[start_idx:end_idx])
+
+    def _score_tokens(self, tokens: _UniEvalTokens) -> list[Optional[float]]:
+        '''Return the probability of "Yes" relative to "No" as the scores.
+
+        Only the logits of "Yes" and "No" are computed from the final hidden
+        state of the decoder, instead of projecting it onto the whole vocabulary
+        and taking the softmax. The result is the same, since
+        P(Yes) / (P(Yes) + P(No)) is the softmax of the two logits.
+        '''
+        input_ids_list, validation_results = tokens
+        encoded_inputs = self.tokenizer.pad(  # type: ignore
+            {
+                'input_ids': input_ids_list
+            }, return_tensors='pt').to(self.device)
+        # The decoder input is the start token, i.e. the target "No" shifted to
+        # the right
+        decoder_input_ids = torch.full(
+            (len(input_ids_list), 1),
+            self.model.config.decoder_start_token_id,  # type: ignore
+            device=self.device)
+
+        with torch.no_grad():
+            encoder_outputs = self.model.get_encoder()(  # type: ignore
+                input_ids=encoded_inputs['input_ids'],
+                attention_mask=encoded_inputs['attention_mask'])
+            hidden_states = self.model.get_decoder()(  # type: ignore
+                input_ids=decoder_input_ids,
+                encoder_hidden_states=encoder_outputs[0],
+                encoder_attention_mask=encoded_inputs['attention_mask'])[0][:,
+                                                                            -1]
+            logits = self._yes_no_logits(hidden_states)
+            scores: list[Optional[float]] = torch.softmax(logits.float(),
+                                                          dim=-1)[:,
+                                                                  0].tolist()
+
+        for i, validation_result in enumerate(validation_results):
+            if not validation_result:
+                scores[i] = None
+        return scores
+
+    def _yes_no_logits(self, hidden_states: torch.Tensor) -> torch.Tensor:
+        '''Project the final decoder hidden states onto the "Yes" and "No"
+        tokens only.
+        '''
+        config = self.model.config  # type: ignore
+        # T5 rescales the decoder outputs before the LM head when the input and
+        # output embeddings are tied
+        if config.model_type == 't5' and getattr(
+                config, 'scale_decoder_outputs', config.tie_word_embeddings):
+            hidden_states = hidden_states * (config.d_model**-0.5)
+        token_ids = torch.tensor([self.pos_id, self.neg_id], device=self.device)
+        lm_head = self.model.get_output_embeddings()  # type: ignore
+        logits = hidden_states @ lm_head.weight[token_ids].T
+        if getattr(lm_head, 'bias', None) is not None:
+            logits = logits + lm_head.bias[token_ids]
+        final_logits_bias = getattr(self.model, 'final_logits_bias', None)
+        if final_logits_bias is not None:
+            logits = logits + final_logits_bias[0, token_ids]
+        return logits
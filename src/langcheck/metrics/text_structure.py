@@ -2,11 +2,18 @@ from __future__ import annotations
 
 import json
 import re
-from typing import Callable, Container, Iterable, List, Optional
+from typing import (Any, Callable, Container, Dict, Iterable, List, Optional,
+                    Set, Tuple)
 
+from langcheck.metrics._deadline import (attach_timed_out, deadline_exceeded,
+                                         record_timed_out)
+from langcheck.metrics._json_schema import compile_json_schema
+from langcheck.metrics._string_matcher import compile_string_matcher
 from langcheck.metrics._validation import validate_parameters_text_structure
+from langcheck.metrics._validation_workers import (run_validation_fn,
+                                                   validate_output)
 from langcheck.metrics.metric_value import MetricValue
-from langcheck.utils.progess_bar import tqdm_wrapper
+from langcheck.utils.progress_bar import tqdm_wrapper
 
 
 def is_int(generated_outputs: List[str] | str,
@@ -176,6 +183,56 @@ def is_json_array(
                        language=None)
 
 
+def matches_json_schema(
+        generated_outputs: List[str] | str,
+        schema: Dict[str, Any],
+        prompts: Optional[List[str] | str] = None) -> MetricValue[int]:
+    '''Checks if generated outputs can be parsed as JSON values that match a
+    given JSON Schema. This metric takes on binary 0 or 1 values. The
+    explanation of each invalid output gives the reason and the path of the
+    failing value, e.g. `$.items[0].price: "ten" is not of type number`.
+
+    The schema is compiled once (and reused by later calls with an equal
+    schema), and the outputs are parsed with orjson if it is installed. The
+    validation keywords of JSON Schema (type, enum, const, and the object,
+    array, string, and number constraints), the applicators (properties,
+    items, allOf, anyOf, oneOf, not, if/then/else, etc.), and local references
+    ($ref) are supported. A schema with unevaluatedProperties,
+    unevaluatedItems, $dynamicRef, or $recursiveRef raises a ValueError, and
+    other keywords, such as "format", are ignored.
+
+    Args:
+        generated_outputs: The model generated output(s) to evaluate
+        schema: The JSON Schema that the outputs should match, e.g.
+            `{"type": "object", "required": ["name"]}`
+        prompts: The prompts used to generate the output(s). Prompts are
+            optional metadata and not used to calculate the metric.
+
+    Returns:
+        An :class:`~langcheck.metrics.metric_value.MetricValue` object
+    '''
+    generated_outputs, prompts = validate_parameters_text_structure(
+        generated_outputs, prompts)
+    validator = compile_json_schema(schema)
+
+    # The values are binary: 1 for success and 0 for failure
+    metric_values = []
+    explanations = []
+    for output in tqdm_wrapper(generated_outputs):
+        error = validator.validate(output)
+        metric_values.append(1 if error is None else 0)
+        explanations.append(error)
+
+    return MetricValue(metric_name='matches_json_schema',
+                       prompts=prompts,
+                       generated_outputs=generated_outputs,
+                       reference_outputs=None,
+                       sources=None,
+                       explanations=explanations,
+                       metric_values=metric_values,
+                       language=None)
+
+
 def matches_regex(
         generated_outputs: List[str] | str,
         regex: str,
@@ -250,6 +307,13 @@ def contains_regex(
                        language=None)
 
 
+def _matched_strings_explanation(strings: List[str], matched: Set[int]) -> str:
+    '''Explain which of the strings were found in an output.
+    '''
+    matched_strings = [strings[i] for i in sorted(matched)]
+    return f'Matched strings: {json.dumps(matched_strings, ensure_ascii=False)}'
+
+
 def contains_all_strings(
         generated_outputs: List[str] | str,
         strings: List[str],
@@ -271,28 +335,22 @@ def contains_all_strings(
     generated_outputs, prompts = validate_parameters_text_structure(
         generated_outputs, prompts)
 
-    # Convert everything to lowercase if case insensitive
-    if not case_sensitive:
-        _strings = [string.lower() for string in strings]
-        _generated_outputs = [output.lower() for output in generated_outputs]
-    else:
-        _strings = strings
-        _generated_outputs = generated_outputs
+    matcher = compile_string_matcher(tuple(strings), case_sensitive)
 
     # The values are binary: 1 for success and 0 for failure
     metric_values = []
-    for output in tqdm_wrapper(_generated_outputs):
-        if all(string in output for string in _strings):
-            metric_values.append(1)
-        else:
-            metric_values.append(0)
+    explanations = []
+    for output in tqdm_wrapper(generated_outputs):
+        matched = matcher.find(output)
+        metric_values.append(1 if len(matched) == len(strings) else 0)
+        explanations.append(_matched_strings_explanation(strings, matched))
 
     return MetricValue(metric_name='contains_all_strings',
                        prompts=prompts,
                        generated_outputs=generated_outputs,
                        reference_outputs=None,
                        sources=None,
-                       explanations=None,
+                       explanations=explanations,
                        metric_values=metric_values,
                        language=None)
 
@@ -319,39 +377,48 @@ def contains_any_strings(
     generated_outputs, prompts = validate_parameters_text_structure(
         generated_outputs, prompts)
 
-    # Convert everything to lowercase if case insensitive
-    if not case_sensitive:
-        _strings = [string.lower() for string in strings]
-        _generated_outputs = [output.lower() for output in generated_outputs]
-    else:
-        _strings = strings
-        _generated_outputs = generated_outputs
+    matcher = compile_string_matcher(tuple(strings), case_sensitive)
 
     # The values are binary: 1 for success and 0 for failure
     metric_values = []
-    for output in tqdm_wrapper(_generated_outputs):
-        if any(string in output for string in _strings):
-            metric_values.append(1)
-        else:
-            metric_values.append(0)
+    explanations = []
+    for output in tqdm_wrapper(generated_outputs):
+        matched = matcher.find(output)
+        metric_values.append(1 if matched else 0)
+        explanations.append(_matched_strings_explanation(strings, matched))
 
     return MetricValue(metric_name='contains_any_strings',
                        prompts=prompts,
                        generated_outputs=generated_outputs,
                        reference_outputs=None,
                        sources=None,
-                       explanations=None,
+                       explanations=explanations,
                        metric_values=metric_values,
                        language=None)
 
 
+@attach_timed_out
 def validation_fn(
         generated_outputs: List[str] | str,
         valid_fn: Callable[[str], bool],
-        prompts: Optional[List[str] | str] = None) -> MetricValue[int]:
+        prompts: Optional[List[str] | str] = None,
+        *,
+        executor: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        timeout: Optional[float] = None) -> MetricValue[Optional[int]]:
     '''Checks if generated outputs are valid according to an arbitrary function.
     This metric takes on binary 0 or 1 values.
 
+    By default, the function is called on each output in turn. With the
+    `executor` option, the outputs are validated in parallel on a pool of
+    threads (e.g. for functions that wait for I/O) or processes (for CPU-bound
+    functions). With the `timeout` option, the validation of an output that
+    takes too long is abandoned, and the output gets a value of `None` and is
+    marked in the ``timed_out`` list of the returned MetricValue, unlike the
+    outputs that are invalid (0). With either option, the time it took to
+    validate each output is reported in the ``latencies`` list of the returned
+    MetricValue.
+
     Args:
         generated_outputs: The model generated output(s) to evaluate
         valid_fn: A function that takes a single string and returns a
@@ -359,6 +426,17 @@ def validation_fn(
             The function can also raise an exception on failure.
         prompts: The prompts used to generate the output(s). Prompts are
             optional metadata and not used to calculate the metric.
+        executor: 'thread' or 'process' to validate the outputs in parallel,
+            or None to validate them one by one. If the executor is 'process',
+            `valid_fn` needs to be picklable when the processes are spawned
+            (e.g. a module-level function). If None and `timeout` is set,
+            'thread' is used. default None
+        max_workers: The number of threads or processes. If None, it is based
+            on the number of CPUs. default None
+        timeout: The maximum number of seconds to validate each output, or
+            None for no limit. A thread whose validation times out cannot be
+            interrupted, so it keeps running in the background, while a
+            process is terminated. default None
 
     Returns:
         An :class:`~langcheck.metrics.metric_value.MetricValue` object
@@ -366,22 +444,37 @@ def validation_fn(
     generated_outputs, prompts = validate_parameters_text_structure(
         generated_outputs, prompts)
 
-    # The values are binary: 1 for success and 0 for failure
-    metric_values = []
-    for output in tqdm_wrapper(generated_outputs):
-        try:
-            if valid_fn(output):
-                metric_values.append(1)
-            else:
-                metric_values.append(0)
-        except Exception:
-            metric_values.append(0)
-
-    return MetricValue(metric_name='validation_fn',
-                       prompts=prompts,
-                       generated_outputs=generated_outputs,
-                       reference_outputs=None,
-                       sources=None,
-                       explanations=None,
-                       metric_values=metric_values,
-                       language=None)
+    # The latencies are measured by the thread or process workers
+    in_parallel = executor is not None or timeout is not None
+    results: List[Tuple[Optional[int], Optional[float]]]
+    if not in_parallel:
+        results = []
+        for output in tqdm_wrapper(generated_outputs):
+            if deadline_exceeded():
+                break
+            results.append(validate_output(valid_fn, output))
+        results += [(None, None)] * (len(generated_outputs) - len(results))
+    else:
+        results = run_validation_fn(generated_outputs,
+                                    valid_fn,
+                                    executor=executor or 'thread',
+                                    max_workers=max_workers,
+                                    timeout=timeout)
+
+    # The values are binary: 1 for success and 0 for failure. The outputs
+    # that timed out are None.
+    metric_values = [is_valid for is_valid, _ in results]
+    record_timed_out([is_valid is None for is_valid in metric_values])
+
+    metric_value = MetricValue[Optional[int]](
+        metric_name='validation_fn',
+        prompts=prompts,
+        generated_outputs=generated_outputs,
+        reference_outputs=None,
+        sources=None,
+        explanations=None,
+        metric_values=metric_values,
+        language=None)
+    if in_parallel:
+        metric_value.latencies = [latency for _, latency in results]
+    return metric_value
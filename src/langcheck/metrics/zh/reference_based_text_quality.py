@@ -2,22 +2,27 @@ from __future__ import annotations
 
 from typing import List, Optional
 
-from rouge_score import rouge_scorer
 from rouge_score.tokenizers import Tokenizer
 
+from langcheck.metrics._deadline import attach_timed_out
+from langcheck.metrics._rouge import rouge_f1_scores
 from langcheck.metrics._validation import validate_parameters_reference_based
 from langcheck.metrics.eval_clients import EvalClient
+from langcheck.metrics.eval_clients._stats import attach_eval_client_stats
 from langcheck.metrics.metric_value import MetricValue
 from langcheck.metrics.scorer.hf_models import \
     SentenceTransformerSimilarityScorer
 from langcheck.metrics.zh._tokenizers import HanLPTokenizer
 
 
+@attach_eval_client_stats
+@attach_timed_out
 def semantic_similarity(
         generated_outputs: List[str] | str,
         reference_outputs: List[str] | str,
         prompts: Optional[List[str] | str] = None,
-        eval_model: str | EvalClient = 'local') -> MetricValue[float]:
+        eval_model: str | EvalClient = 'local',
+        local_chunk_pooling: Optional[str] = None) -> MetricValue[float]:
     '''
     Calculates the semantic similarities between the generated outputs and
     the reference outputs. The similarities are computed as the cosine
@@ -53,6 +58,11 @@ def semantic_similarity(
             optional metadata and not used to calculate the metric.
         eval_model: The type of model to use ('local' or the EvalClient instance
             used for the evaluation). default 'local'
+        local_chunk_pooling: Only used if eval_model is 'local'. If "mean" or
+            "max", outputs longer than the maximum sequence length of the model
+            are split into windows of tokens, and the window embeddings are
+            pooled (by mean or max) instead of truncating the outputs. If None,
+            the outputs are truncated. default None
 
     Returns:
         An :class:`~langcheck.metrics.metric_value.MetricValue` object
@@ -61,7 +71,8 @@ def semantic_similarity(
         generated_outputs, reference_outputs, prompts)
 
     if eval_model == 'local':
-        scorer = SentenceTransformerSimilarityScorer(language='zh')
+        scorer = SentenceTransformerSimilarityScorer(
+            language='zh', chunk_pooling=local_chunk_pooling)
     else:  # EvalClient
         assert isinstance(
             eval_model, EvalClient
@@ -83,7 +94,8 @@ def rouge1(generated_outputs: List[str] | str,
            reference_outputs: List[str] | str,
            prompts: Optional[List[str] | str] = None,
            *,
-           tokenizer: Optional[Tokenizer] = None) -> MetricValue[float]:
+           tokenizer: Optional[Tokenizer] = None,
+           num_workers: int = 1) -> MetricValue[float]:
     '''Calculates the F1 metrics of the ROUGE-1 scores between the generated
     (single tokens) between the generated outputs and the reference outputs.
     This metric takes on float values between [0, 1], where 0 is no overlap and
@@ -97,6 +109,10 @@ def rouge1(generated_outputs: List[str] | str,
         reference_outputs: The reference output(s)
         prompts: The prompts used to generate the output(s). Prompts are
             optional metadata and not used to calculate the metric.
+        num_workers: The number of worker processes computing the scores in
+            chunks. Each worker creates its own tokenizer, or receives a copy
+            of `tokenizer` if it is given (so it needs to be picklable).
+            default 1 (the scores are computed in the current process)
 
     Returns:
         An MetricValue object
@@ -107,7 +123,8 @@ def rouge1(generated_outputs: List[str] | str,
     scores = _rouge(generated_outputs,
                     reference_outputs,
                     'rouge1',
-                    tokenizer=tokenizer)
+                    tokenizer=tokenizer,
+                    num_workers=num_workers)
     return MetricValue(metric_name='rouge1',
                        prompts=prompts,
                        generated_outputs=generated_outputs,
@@ -122,7 +139,8 @@ def rouge2(generated_outputs: List[str] | str,
            reference_outputs: List[str] | str,
            prompts: Optional[List[str] | str] = None,
            *,
-           tokenizer: Optional[Tokenizer] = None) -> MetricValue[float]:
+           tokenizer: Optional[Tokenizer] = None,
+           num_workers: int = 1) -> MetricValue[float]:
     '''Calculates the F1 metrics of the ROUGE-2 scores between the generated
     outputs and the reference outputs. It evaluates the overlap of bigrams
     (two adzhcent tokens) between the generated outputs and the reference
@@ -137,6 +155,10 @@ def rouge2(generated_outputs: List[str] | str,
         reference_outputs: The reference output(s)
         prompts: The prompts used to generate the output(s). Prompts are
             optional metadata and not used to calculate the metric.
+        num_workers: The number of worker processes computing the scores in
+            chunks. Each worker creates its own tokenizer, or receives a copy
+            of `tokenizer` if it is given (so it needs to be picklable).
+            default 1 (the scores are computed in the current process)
 
     Returns:
         An MetricValue object
@@ -147,7 +169,8 @@ def rouge2(generated_outputs: List[str] | str,
     scores = _rouge(generated_outputs,
                     reference_outputs,
                     'rouge2',
-                    tokenizer=tokenizer)
+                    tokenizer=tokenizer,
+                    num_workers=num_workers)
     return MetricValue(metric_name='rouge2',
                        prompts=prompts,
                        generated_outputs=generated_outputs,
@@ -162,7 +185,8 @@ def rougeL(generated_outputs: List[str] | str,
            reference_outputs: List[str] | str,
            prompts: Optional[List[str] | str] = None,
            *,
-           tokenizer: Optional[Tokenizer] = None) -> MetricValue[float]:
+           tokenizer: Optional[Tokenizer] = None,
+           num_workers: int = 1) -> MetricValue[float]:
     '''Calculates the F1 metrics of the ROUGE-L scores between the generated
     outputs and the reference outputs. It evaluates the longest common
     subsequence (LCS) between the generated outputs and the reference outputs.
@@ -177,6 +201,10 @@ def rougeL(generated_outputs: List[str] | str,
         reference_outputs: The reference output(s)
         prompts: The prompts used to generate the output(s). Prompts are
             optional metadata and not used to calculate the metric.
+        num_workers: The number of worker processes computing the scores in
+            chunks. Each worker creates its own tokenizer, or receives a copy
+            of `tokenizer` if it is given (so it needs to be picklable).
+            default 1 (the scores are computed in the current process)
 
     Returns:
         An MetricValue object
@@ -197,7 +225,8 @@ def rougeL(generated_outputs: List[str] | str,
     scores = _rouge(generated_outputs,
                     reference_outputs,
                     'rougeLsum',
-                    tokenizer=tokenizer)
+                    tokenizer=tokenizer,
+                    num_workers=num_workers)
     return MetricValue(metric_name='rougeL',
                        prompts=prompts,
                        generated_outputs=generated_outputs,
@@ -212,7 +241,8 @@ def _rouge(generated_outputs: List[str],
            reference_outputs: List[str],
            rouge_type: str,
            *,
-           tokenizer: Optional[Tokenizer] = None) -> List[float]:
+           tokenizer: Optional[Tokenizer] = None,
+           num_workers: int = 1) -> List[float]:
     '''Helper function for computing the rouge1, rouge2, and rougeL metrics.
     This uses Google Research's implementation of ROUGE:
     https://github.com/google-research/google-research/tree/master/rouge
@@ -221,6 +251,7 @@ def _rouge(generated_outputs: List[str],
         generated_outputs: A list of model generated outputs to evaluate
         reference_outputs: A list of reference outputs
         rouge_type: rouge1, rouge2, or rougeLsum
+        num_workers: The number of worker processes
 
     Returns:
         A list of F1 values of the ROUGE scores
@@ -228,12 +259,8 @@ def _rouge(generated_outputs: List[str],
     assert rouge_type in ['rouge1', 'rouge2', 'rougeLsum']
 
     # The tokenizer is default to HanLPTokenizer
-    tokenizer = tokenizer or HanLPTokenizer()
-    scorer = rouge_scorer.RougeScorer([rouge_type],
-                                      use_stemmer=True,
-                                      tokenizer=tokenizer)
-    scores = []
-    for gen, ref in zip(generated_outputs, reference_outputs):
-        score = scorer.score(gen, ref)
-        scores.append(score[rouge_type].fmeasure)
-    return scores
+    return rouge_f1_scores(generated_outputs,
+                           reference_outputs, [rouge_type],
+                           tokenizer=tokenizer,
+                           tokenizer_factory=HanLPTokenizer,
+                           num_workers=num_workers)[rouge_type]
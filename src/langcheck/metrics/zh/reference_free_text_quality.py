@@ -5,15 +5,19 @@ from typing import List, Optional
 import hanlp
 from transformers.pipelines import pipeline
 
+from langcheck.metrics._deadline import attach_timed_out
 from langcheck.metrics._validation import validate_parameters_reference_free
 from langcheck.metrics.en.reference_free_text_quality import \
     _toxicity_eval_client
 from langcheck.metrics.en.reference_free_text_quality import \
     sentiment as en_sentiment
 from langcheck.metrics.eval_clients import EvalClient
+from langcheck.metrics.eval_clients._stats import attach_eval_client_stats
 from langcheck.metrics.metric_value import MetricValue
 
 
+@attach_eval_client_stats
+@attach_timed_out
 def sentiment(
     generated_outputs: List[str] | str,
     prompts: Optional[List[str] | str] = None,
@@ -93,6 +97,8 @@ def sentiment(
         language='zh')
 
 
+@attach_eval_client_stats
+@attach_timed_out
 def toxicity(
         generated_outputs: List[str] | str,
         prompts: Optional[List[str] | str] = None,
@@ -4,13 +4,17 @@ from typing import List, Optional, cast
 
 from transformers.pipelines import pipeline
 
+from langcheck.metrics._deadline import attach_timed_out
 from langcheck.metrics._validation import validate_parameters_source_based
 from langcheck.metrics.en.source_based_text_quality import \
     factual_consistency as en_factual_consistency
 from langcheck.metrics.eval_clients import EvalClient
+from langcheck.metrics.eval_clients._stats import attach_eval_client_stats
 from langcheck.metrics.metric_value import MetricValue
 
 
+@attach_eval_client_stats
+@attach_timed_out
 def factual_consistency(
         generated_outputs: List[str] | str,
         sources: List[str] | str,
@@ -1,6 +1,9 @@
 import math
+from functools import lru_cache
+from typing import Tuple
 
-import plotly.express as px
+import numpy as np
+import plotly.graph_objects as go
 from dash import Dash, Input, Output, dcc, html
 
 from langcheck.metrics.metric_value import MetricValue, MetricValueWithThreshold
@@ -24,9 +27,26 @@ def histogram(metric_value: MetricValue, jupyter_mode: str = 'inline') -> None:
             Dash documentation for more info:
             https://dash.plotly.com/workspaces/using-dash-in-jupyter-and-workspaces#display-modes
     '''
-    # Rename some MetricValue fields for display
-    df = metric_value.to_df()
-    df.rename(columns={'metric_value': metric_value.metric_name}, inplace=True)
+    # Compute the values to plot and the range of the bins once. The `None`
+    # values are left out, as in a DataFrame histogram.
+    values = metric_value.values_array
+    values = values[~np.isnan(values)]
+    if len(values):
+        start = math.floor(values.min())
+        end = math.ceil(values.max())
+    else:
+        start, end = 0, 1
+    if start == end:
+        # All values are the same integer
+        end = start + 1
+
+    @lru_cache(maxsize=None)
+    def bin_counts(num_bins: int) -> Tuple[np.ndarray, np.ndarray]:
+        '''Returns the number of values in each bin and the bin edges. They
+        are computed once for each number of bins, so that only the bars (not
+        every data point) are sent to the browser when the slider moves.
+        '''
+        return np.histogram(values, bins=num_bins, range=(start, end))
 
     # Define layout of the Dash app (histogram + input for number of bins)
     app = Dash(__name__)
@@ -66,24 +86,25 @@ def histogram(metric_value: MetricValue, jupyter_mode: str = 'inline') -> None:
         Input('num_bins', 'value'),
     )
     def update_figure(num_bins):
-        # Plot the histogram
-        fig = px.histogram(df, x=metric_value.metric_name)
+        # Plot the histogram from the precomputed bin counts
+        counts, edges = bin_counts(int(num_bins))
+        fig = go.Figure(
+            go.Bar(x=(edges[:-1] + edges[1:]) / 2,
+                   y=counts,
+                   width=np.diff(edges),
+                   customdata=np.stack([edges[:-1], edges[1:]], axis=-1),
+                   hovertemplate=(f'{metric_value.metric_name}: '
+                                  '%{customdata[0]:.4g} - %{customdata[1]:.4g}'
+                                  '<br>count: %{y}<extra></extra>')))
+        fig.update_layout(bargap=0,
+                          xaxis_title=metric_value.metric_name,
+                          yaxis_title='count')
         if isinstance(metric_value, MetricValueWithThreshold):
             _plot_threshold(fig, metric_value.threshold_op,
                             metric_value.threshold, Axis.vertical)
-        # Manually set the number of bins in the histogram. We can't use the
-        # nbins parameter of px.histogram() since it's just a suggested number
-        # of bins. See: https://community.plotly.com/t/histogram-bin-size-with-plotly-express/38927/5  # NOQA: E501
-        start = math.floor(df[metric_value.metric_name].min())
-        end = math.ceil(df[metric_value.metric_name].max())
-        step_size = (end - start) / int(num_bins)
-        fig.update_traces(xbins={'start': start, 'end': end, 'size': step_size})
         # Explicitly set the default axis ranges (with a little padding) so that
         # the range plotted would not be influenced by threshold settings
-        fig.update_xaxes(range=[
-            min(-0.1, math.floor(df[metric_value.metric_name].min())),
-            max(1.1, math.ceil(df[metric_value.metric_name].max()))
-        ])
+        fig.update_xaxes(range=[min(-0.1, start), max(1.1, end)])
         # If the user manually zoomed in, keep that zoom level even when
         # update_figure() re-runs
         fig.update_layout(uirevision='constant')
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import (Any, Callable, ContextManager, Dict, Iterator, List,
+                    Optional, TypeVar, cast)
+
+import pandas as pd
+from tabulate import tabulate
+
+_Function = TypeVar('_Function', bound=Callable[..., Any])
+
+# The profiles that are active in the current context. Every stage timing is
+# added to all of them.
+_active_profiles: ContextVar[tuple[Profile,
+                                   ...]] = ContextVar('_active_profiles',
+                                                      default=())
+
+# The context manager returned by `profile_stage()` when nothing is profiled
+_NULL_STAGE = nullcontext()
+
+
+@dataclass
+class StageTiming:
+    '''The timing of one run of an instrumented stage, e.g. one forward pass of
+    a scorer.
+    '''
+    # The name of the stage, e.g. "AutoModelForSequenceClassificationScorer
+    # ._score_tokens"
+    name: str
+    # The time.perf_counter() values when the stage started and ended
+    start_time: float
+    end_time: float
+    # The size of the input of the stage (e.g. the number of texts in a batch,
+    # or the number of characters of a text), or None if it is not measured
+    input_size: Optional[int]
+    thread_id: int
+
+    @property
+    def duration(self) -> float:
+        return self.end_time - self.start_time
+
+
+class Profile:
+    '''The stage timings recorded within a :func:`~langcheck.profile` context.
+    '''
+
+    def __init__(self) -> None:
+        self.start_time = time.perf_counter()
+        self.timings: List[StageTiming] = []
+
+    def add(self, timing: StageTiming) -> None:
+        '''Adds the timing of one run of a stage.'''
+        self.timings.append(timing)
+
+    def to_df(self) -> pd.DataFrame:
+        '''Returns a DataFrame with one row per stage: the number of calls,
+        the total, mean and max wall time in seconds, and the total input size
+        (None if it is not measured for the stage), sorted by the total time.
+        '''
+        columns = [
+            'stage', 'calls', 'total_time', 'mean_time', 'max_time',
+            'input_size'
+        ]
+        stages: Dict[str, List[StageTiming]] = {}
+        for timing in self.timings:
+            stages.setdefault(timing.name, []).append(timing)
+        rows = []
+        for name, timings in stages.items():
+            durations = [timing.duration for timing in timings]
+            input_sizes = [
+                timing.input_size
+                for timing in timings
+                if timing.input_size is not None
+            ]
+            rows.append({
+                'stage': name,
+                'calls': len(timings),
+                'total_time': sum(durations),
+                'mean_time': sum(durations) / len(durations),
+                'max_time': max(durations),
+                'input_size': sum(input_sizes) if input_sizes else None,
+            })
+        df = pd.DataFrame(rows, columns=columns)
+        return df.sort_values('total_time', ascending=False, ignore_index=True)
+
+    def __str__(self) -> str:
+        '''Returns the per-stage summary as a table.'''
+        return tabulate(
+            self.to_df(),  # type: ignore
+            headers='keys',
+            showindex=False,
+            floatfmt='.4f')
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        '''Returns the timings in the Chrome trace event format, which can be
+        opened in chrome://tracing or https://ui.perfetto.dev. Each run of a
+        stage is a complete event on the timeline of its thread, so nested
+        stages are shown inside their parents.
+        '''
+        pid = os.getpid()
+        events = []
+        for timing in self.timings:
+            event: Dict[str, Any] = {
+                'name': timing.name,
+                'cat': 'langcheck',
+                'ph': 'X',
+                'ts': (timing.start_time - self.start_time) * 1e6,
+                'dur': timing.duration * 1e6,
+                'pid': pid,
+                'tid': timing.thread_id,
+            }
+            if timing.input_size is not None:
+                event['args'] = {'input_size': timing.input_size}
+            events.append(event)
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def save_chrome_trace(self, path: str) -> None:
+        '''Saves the timings to a JSON file in the Chrome trace event format.
+
+        Args:
+            path: The path of the file
+        '''
+        with open(path, 'w') as f:
+            json.dump(self.to_chrome_trace(), f)
+
+
+@contextmanager
+def profile() -> Iterator[Profile]:
+    '''Context manager that records how long each instrumented stage (e.g.
+    tokenization, the forward passes of the local models, the embeddings,
+    translation, text stats, and the EvalClient API calls) takes within the
+    context, including the stages run on other threads on behalf of the
+    context.
+
+    Example:
+        >>> with langcheck.profile() as prof:
+        ...     langcheck.metrics.factual_consistency(outputs, sources)
+        >>> print(prof)
+        >>> prof.save_chrome_trace('trace.json')
+
+    Yields:
+        A :class:`~langcheck.profiling.Profile` object that collects the
+        timings
+    '''
+    recorded_profile = Profile()
+    token = _active_profiles.set(_active_profiles.get() + (recorded_profile,))
+    try:
+        yield recorded_profile
+    finally:
+        _active_profiles.reset(token)
+
+
+class _Stage:
+    '''Records the wall time of a stage to the active profiles.'''
+
+    def __init__(self, name: str, input_size: Optional[int],
+                 profiles: tuple[Profile, ...]):
+        self._name = name
+        self._input_size = input_size
+        self._profiles = profiles
+
+    def __enter__(self) -> None:
+        self._start_time = time.perf_counter()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        timing = StageTiming(name=self._name,
+                             start_time=self._start_time,
+                             end_time=time.perf_counter(),
+                             input_size=self._input_size,
+                             thread_id=threading.get_ident())
+        for recorded_profile in self._profiles:
+            recorded_profile.add(timing)
+
+
+def profile_stage(name: str,
+                  input_size: Optional[int] = None) -> ContextManager[None]:
+    '''Context manager that records the wall time of the code within it as one
+    run of a stage, if it runs within :func:`~langcheck.profile`. Otherwise
+    this does nothing, so stages can be instrumented on hot paths.
+
+    Args:
+        name: The name of the stage
+        input_size: The size of the input of the stage, if any
+    '''
+    profiles = _active_profiles.get()
+    if not profiles:
+        return _NULL_STAGE
+    return _Stage(name, input_size, profiles)
+
+
+def profiled(
+    name: Optional[str] = None,
+    input_size: Optional[Callable[..., Optional[int]]] = None
+) -> Callable[[_Function], _Function]:
+    '''Decorator that records each call of a function as one run of a stage.
+
+    Args:
+        name: The name of the stage. If None, the qualified name of the
+            function (e.g. "OpenAIEvalClient._call_api") is used.
+        input_size: A function that takes the arguments of the decorated
+            function and returns the size of the input (or None)
+    '''
+
+    def decorator(fn: _Function) -> _Function:
+        stage_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _active_profiles.get():
+                return fn(*args, **kwargs)
+            size = input_size(*args, **kwargs) if input_size else None
+            with profile_stage(stage_name, size):
+                return fn(*args, **kwargs)
+
+        return cast(_Function, wrapper)
+
+    return decorator
@@ -1,10 +1,15 @@
 import string
 from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List
 
 import nltk
 from nltk.corpus import cmudict
 from nltk.tokenize import SyllableTokenizer
 
+from langcheck.profiling import profiled
+from langcheck.utils.progress_bar import tqdm_wrapper
+
 
 @dataclass
 class TextStats:
@@ -13,16 +18,45 @@ class TextStats:
     num_syllables: int
 
 
-def compute_stats(input_text: str) -> TextStats:
-    '''Compute statics about the given input text.
+def _all_punctuations(input_str: str) -> bool:
+    '''Returns True for "words" like "!", ".", ... etc'''
+    return all(c in string.punctuation for c in input_str)
 
-    Args:
-        input_text: Text you want to compute the stats for
 
-    Returns:
-        A :class:`~langcheck.stats.TextStats` object
+class _SyllableCounter:
+    '''Counts the syllables of words by checking the CMU pronouncing dictionary
+    first, and falling back to the best-effort SyllableTokenizer. The
+    dictionary is loaded once into a table of syllable counts (instead of
+    phoneme lists), and the count of each word is memoized.
     '''
 
+    def __init__(self) -> None:
+        # The number of syllables of the first pronunciation of each word,
+        # i.e. the number of its phonemes that have a stress marker
+        self._counts: Dict[str, int] = {
+            word: sum(phoneme[-1] in '012' for phoneme in pronunciations[0])
+            for word, pronunciations in cmudict.dict().items()
+        }
+        self._tokenizer = SyllableTokenizer()
+
+    def count(self, word: str) -> int:
+        word = word.lower()
+        count = self._counts.get(word)
+        if count is None:
+            syllables = self._tokenizer.tokenize(word)
+            count = len([
+                syllable for syllable in syllables
+                if not _all_punctuations(syllable)
+            ])
+            self._counts[word] = count
+        return count
+
+
+@lru_cache(maxsize=None)
+def _syllable_counter() -> _SyllableCounter:
+    '''Downloads the NLTK data used to compute the stats if needed, and
+    returns the shared syllable counter.
+    '''
     try:
         nltk.data.find('tokenizers/punkt')
     except LookupError:
@@ -33,38 +67,51 @@ def compute_stats(input_text: str) -> TextStats:
     except LookupError:
         nltk.download('cmudict')
 
+    return _SyllableCounter()
+
+
+@profiled('compute_stats', input_size=lambda input_text, _: len(input_text))
+def _compute_stats(input_text: str,
+                   syllable_counter: _SyllableCounter) -> TextStats:
     sentences = nltk.tokenize.sent_tokenize(input_text)
+    words = [
+        word for sentence in sentences
+        for word in nltk.tokenize.word_tokenize(sentence)
+        if not _all_punctuations(word)
+    ]
+    num_syllables = sum(syllable_counter.count(word) for word in words)
+
+    return TextStats(num_sentences=len(sentences),
+                     num_words=len(words),
+                     num_syllables=num_syllables)
 
-    words = sum(
-        [nltk.tokenize.word_tokenize(sentence) for sentence in sentences], [])
 
-    # Filter out "words" like "!", ".", ... etc
-    def _all_punctuations(input_str: str) -> bool:
-        return all(c in string.punctuation for c in input_str)
+def compute_stats(input_text: str) -> TextStats:
+    '''Compute statics about the given input text.
 
-    words = [word for word in words if not _all_punctuations(word)]
+    Args:
+        input_text: Text you want to compute the stats for
 
-    tokenizer = SyllableTokenizer()
-    syllable_dict = cmudict.dict()
+    Returns:
+        A :class:`~langcheck.stats.TextStats` object
+    '''
+    return _compute_stats(input_text, _syllable_counter())
 
-    # Count syllables in a word by checking a dictionary first, and falling back
-    # to best-effort SyllableTokenizer
-    def _count_syllables(word):
-        word = word.lower()
-        if word in syllable_dict:
-            return len([
-                phoneme for phoneme in syllable_dict[word][0]
-                if phoneme[-1] in ['0', '1', '2']
-            ])
-        else:
-            syllables = tokenizer.tokenize(word)
-            return len([
-                syllable for syllable in syllables
-                if not _all_punctuations(syllable)
-            ])
 
-    num_syllables = sum([_count_syllables(word) for word in words])
+def compute_stats_batch(input_texts: List[str]) -> List[TextStats]:
+    '''Compute statics about each of the given input texts. The NLTK resources
+    are loaded once, and the syllable counts of the words are shared by all
+    texts, so this is much faster than calling
+    :func:`~langcheck.stats.compute_stats` on each text.
 
-    return TextStats(num_sentences=len(sentences),
-                     num_words=len(words),
-                     num_syllables=num_syllables)
+    Args:
+        input_texts: Texts you want to compute the stats for
+
+    Returns:
+        A list of :class:`~langcheck.stats.TextStats` objects, one per text
+    '''
+    syllable_counter = _syllable_counter()
+    return [
+        _compute_stats(input_text, syllable_counter)
+        for input_text in tqdm_wrapper(input_texts, desc='Computing stats')
+    ]
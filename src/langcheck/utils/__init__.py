@@ -1,3 +1,12 @@
 from langcheck.utils.io import load_json
+from langcheck.utils.progress_bar import (ProgressUpdate, add_progress_callback,
+                                          remove_progress_callback,
+                                          set_progress_bar_enabled)
 
-__all__ = ['load_json']
+__all__ = [
+    'add_progress_callback',
+    'load_json',
+    'ProgressUpdate',
+    'remove_progress_callback',
+    'set_progress_bar_enabled',
+]
@@ -1,17 +1,222 @@
-from typing import Any, Iterable, Optional
+import os
+import time
+from dataclasses import dataclass
+from typing import (Any, Callable, Iterable, Iterator, List, Optional, Sized,
+                    Tuple)
 
 from tqdm import tqdm
 
 
+@dataclass
+class ProgressUpdate:
+    '''The progress of one task (e.g. computing the embeddings of the outputs),
+    which is passed to the progress callbacks.
+    '''
+    desc: str
+    unit: str
+    # The number of units completed so far
+    completed: int
+    # The total number of units, or None if it is not known in advance
+    total: Optional[int]
+    # The number of seconds since the task started
+    elapsed: float
+    # Whether the task has finished (or was stopped early)
+    finished: bool
+
+
+ProgressCallback = Callable[[ProgressUpdate], None]
+
+# Whether to draw the tqdm progress bars. They can be turned off by setting the
+# LANGCHECK_DISABLE_PROGRESS_BAR environment variable (e.g. in production), or
+# with `set_progress_bar_enabled()`.
+_progress_bar_enabled = not os.environ.get('LANGCHECK_DISABLE_PROGRESS_BAR')
+# The registered callbacks and the minimum number of seconds between two calls
+# of each callback for the same task
+_progress_callbacks: List[Tuple[ProgressCallback, float]] = []
+
+
+def set_progress_bar_enabled(enabled: bool) -> None:
+    '''Turns the progress bars drawn by langcheck on or off. The progress
+    callbacks are still called when the progress bars are off.
+
+    Args:
+        enabled: Whether to draw the progress bars
+    '''
+    global _progress_bar_enabled
+    _progress_bar_enabled = enabled
+
+
+def add_progress_callback(callback: ProgressCallback,
+                          min_interval: float = 0.5) -> None:
+    '''Registers a function that is called with a
+    :class:`~langcheck.utils.progress_bar.ProgressUpdate` when a task starts,
+    as it progresses, and when it finishes, e.g. to send the progress to a
+    logging or monitoring system. The callback is called in the thread that
+    runs the task, so it should return quickly.
+
+    Args:
+        callback: The function to call
+        min_interval: The minimum number of seconds between two calls for the
+            same task, other than the calls when the task starts and finishes.
+            default 0.5
+    '''
+    _progress_callbacks.append((callback, min_interval))
+
+
+def remove_progress_callback(callback: ProgressCallback) -> None:
+    '''Unregisters a function registered with
+    :func:`~langcheck.utils.progress_bar.add_progress_callback`.
+
+    Args:
+        callback: The function to unregister
+    '''
+    _progress_callbacks[:] = [
+        (registered_callback, min_interval)
+        for registered_callback, min_interval in _progress_callbacks
+        if registered_callback != callback
+    ]
+
+
+class Progress:
+    '''Tracks the progress of one task, drawing a progress bar and calling the
+    progress callbacks. Use it as a context manager, or call
+    :meth:`close` when the task finishes.
+    '''
+
+    def __init__(self,
+                 desc: str,
+                 total: Optional[int],
+                 unit: str,
+                 show_progress_bar: bool = True,
+                 callbacks: Optional[List[Tuple[ProgressCallback,
+                                                float]]] = None):
+        self.desc = desc
+        self.total = total
+        self.unit = unit
+        self.completed = 0
+        self._start_time = time.monotonic()
+        self._bar = None
+        if show_progress_bar:
+            self._bar = tqdm(desc=desc, total=total, unit=unit)
+        self._callbacks = list(callbacks or [])
+        self._last_called = [self._start_time] * len(self._callbacks)
+        self._closed = False
+        for callback, _ in self._callbacks:
+            callback(self._progress_update(finished=False))
+
+    def _progress_update(self, finished: bool) -> ProgressUpdate:
+        return ProgressUpdate(desc=self.desc,
+                              unit=self.unit,
+                              completed=self.completed,
+                              total=self.total,
+                              elapsed=time.monotonic() - self._start_time,
+                              finished=finished)
+
+    def update(self, n: int = 1) -> None:
+        '''Records that `n` more units are completed.'''
+        self.completed += n
+        if self._bar is not None:
+            self._bar.update(n)
+        if self._callbacks:
+            now = time.monotonic()
+            for i, (callback, min_interval) in enumerate(self._callbacks):
+                if now - self._last_called[i] >= min_interval:
+                    self._last_called[i] = now
+                    callback(self._progress_update(finished=False))
+
+    def close(self) -> None:
+        '''Records that the task finished. Calling this more than once has no
+        effect.
+        '''
+        if self._closed:
+            return
+        self._closed = True
+        if self._bar is not None:
+            self._bar.close()
+        for callback, _ in self._callbacks:
+            callback(self._progress_update(finished=True))
+
+    def __enter__(self) -> 'Progress':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class _NullProgress(Progress):
+    '''The progress of a task when there is no progress bar or callback, which
+    does nothing.
+    '''
+
+    def __init__(self) -> None:
+        pass
+
+    def update(self, n: int = 1) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+_NULL_PROGRESS = _NullProgress()
+
+
+def progress_bar(desc: Optional[str] = None,
+                 total: Optional[int] = None,
+                 unit: str = 'it') -> Progress:
+    '''Starts tracking the progress of a task whose progress is updated
+    manually (e.g. when results arrive out of order). This returns a no-op
+    object if the progress bars are off and there is no progress callback.
+
+    Args:
+        desc: The description of the task. default "Progress"
+        total: The total number of units, if known
+        unit: The name of a unit. default "it"
+
+    Returns:
+        A :class:`~langcheck.utils.progress_bar.Progress` object
+    '''
+    if not _progress_bar_enabled and not _progress_callbacks:
+        return _NULL_PROGRESS
+    return Progress(desc or 'Progress',
+                    total,
+                    unit,
+                    show_progress_bar=_progress_bar_enabled,
+                    callbacks=_progress_callbacks)
+
+
+def _track(iterable: Iterable[Any], progress: Progress) -> Iterator[Any]:
+    try:
+        for item in iterable:
+            yield item
+            progress.update(1)
+    finally:
+        progress.close()
+
+
 def tqdm_wrapper(iterable: Iterable[Any],
                  desc: Optional[str] = None,
                  total: Optional[int] = None,
-                 unit: str = "it"):
-    """
-    Wrapper for tqdm to make it optional
-    """
-    if desc is None:
-        desc = "Progress"
-    if total is None:
-        total = len(list(iterable))
-    return tqdm(iterable, desc=desc, total=total, unit=unit)
+                 unit: str = 'it') -> Iterable[Any]:
+    '''Wraps an iterable to track the progress of iterating over it. The
+    iterable is never consumed in advance: if `total` is not given, it is
+    taken from `len(iterable)` when the iterable has a length, and left
+    unknown otherwise (e.g. for generators). If the progress bars are off and
+    there is no progress callback, the iterable itself is returned.
+
+    Args:
+        iterable: The iterable to wrap
+        desc: The description of the task. default "Progress"
+        total: The total number of items, if known
+        unit: The name of an item. default "it"
+
+    Returns:
+        An iterable over the same items
+    '''
+    if not _progress_bar_enabled and not _progress_callbacks:
+        return iterable
+    if total is None and isinstance(iterable, Sized):
+        total = len(iterable)
+    if not _progress_callbacks:
+        return tqdm(iterable, desc=desc or 'Progress', total=total, unit=unit)
+    return _track(iterable, progress_bar(desc, total, unit))
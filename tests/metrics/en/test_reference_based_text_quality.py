@@ -2,6 +2,7 @@ import os
 from unittest.mock import Mock, patch
 
 import pytest
+import torch
 from openai.types import CreateEmbeddingResponse
 
 from langcheck.metrics.en import rouge1, rouge2, rougeL, semantic_similarity
@@ -84,6 +85,60 @@ def test_semantic_similarity_openai(generated_outputs, reference_outputs):
         assert 0.99 <= metric_value <= 1
 
 
+class WhitespaceTokenizer:
+    '''A slow tokenizer that splits texts at whitespace.'''
+
+    is_fast = False
+
+    def __call__(self, texts, add_special_tokens, return_offsets_mapping):
+        return {'input_ids': [text.split() for text in texts]}
+
+    def num_special_tokens_to_add(self):
+        return 0
+
+    def decode(self, token_ids, skip_special_tokens):
+        return ' '.join(token_ids)
+
+
+class TruncatingEncoder:
+    '''A sentence encoder that embeds the first `max_seq_length` words of
+    texts as bags of words and records its calls.'''
+
+    def __init__(self, vocab, max_seq_length):
+        self.vocab = vocab
+        self.max_seq_length = max_seq_length
+        self.tokenizer = WhitespaceTokenizer()
+        self.calls = []
+
+    def encode(self, texts, convert_to_tensor):
+        self.calls.append(texts)
+        words_list = [text.split()[:self.max_seq_length] for text in texts]
+        return torch.tensor([[float(words.count(word))
+                              for word in self.vocab]
+                             for words in words_list])
+
+
+@pytest.mark.parametrize('chunk_pooling,expected_score', [(None, 1.0),
+                                                          ('mean', 0.5**0.5),
+                                                          ('max', 0.5**0.5)])
+def test_semantic_similarity_chunk_pooling(chunk_pooling, expected_score):
+    encoder = TruncatingEncoder(['cat', 'dog'], max_seq_length=4)
+    generated_outputs = ['cat cat cat cat dog dog dog dog', 'cat dog']
+    reference_outputs = ['cat cat cat', 'cat dog']
+    with patch('langcheck.metrics.model_manager.manager.fetch_model',
+               return_value=encoder):
+        metric_value = semantic_similarity(generated_outputs,
+                                           reference_outputs,
+                                           local_chunk_pooling=chunk_pooling)
+    assert metric_value.metric_values == pytest.approx([expected_score, 1.0])
+    # The windows of all outputs in a batch are embedded in one call
+    assert len(encoder.calls) == 2
+    if chunk_pooling is not None:
+        assert encoder.calls[0] == [
+            'cat cat cat cat', 'dog dog dog dog', 'cat dog'
+        ]
+
+
 @pytest.mark.parametrize(
     'generated_outputs,reference_outputs',
     [("The cat sat on the mat.", "The cat sat on the mat."),
@@ -2,6 +2,7 @@ import os
 from unittest.mock import Mock, patch
 
 import pytest
+import torch
 from openai.types import CreateEmbeddingResponse
 
 from langcheck.metrics.en import (ai_disclaimer_similarity, answer_relevance,
@@ -165,6 +166,37 @@ def test_ai_disclaimer_similarity(generated_outputs):
     assert 0.5 <= metric_value <= 1
 
 
+class CountingEncoder:
+    '''A sentence encoder that embeds texts as bags of words and counts the
+    texts it embeds.'''
+
+    def __init__(self, vocab):
+        self.vocab = vocab
+        self.encoded_texts = []
+
+    def encode(self, texts, convert_to_tensor):
+        self.encoded_texts += texts
+        return torch.tensor([
+            [float(text.count(word)) for word in self.vocab] for text in texts
+        ])
+
+
+def test_ai_disclaimer_similarity_phrase_bank():
+    encoder = CountingEncoder(['AI', 'model', 'opinions', 'cats'])
+    phrases = ['I am an AI model.', 'I have no opinions.', 'AI opinions']
+    generated_outputs = ['As an AI model, I cannot.', 'I like cats.', 'cats']
+    with patch('langcheck.metrics.model_manager.manager.fetch_model',
+               return_value=encoder):
+        for _ in range(2):
+            metric_value = ai_disclaimer_similarity(
+                generated_outputs, ai_disclaimer_phrases=phrases)
+            assert metric_value.metric_values == pytest.approx([1.0, 0.0, 0.0],
+                                                               abs=1e-6)
+    # The bank was embedded once
+    assert encoder.encoded_texts.count(phrases[0]) == 1
+    assert encoder.encoded_texts.count(generated_outputs[0]) == 2
+
+
 @pytest.mark.parametrize('generated_outputs', [[
     "I don't have personal opinions, emotions, or consciousness.",
 ]])
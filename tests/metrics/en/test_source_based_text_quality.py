@@ -1,6 +1,17 @@
+from typing import List
+from unittest.mock import patch
+
 import pytest
+import torch
+from tokenizers import Tokenizer, decoders, models, pre_tokenizers, processors
+from transformers import (AutoTokenizer, PreTrainedTokenizerFast, T5Config,
+                          T5ForConditionalGeneration)
 
 from langcheck.metrics.en import context_relevance, factual_consistency
+from langcheck.metrics.en.source_based_text_quality import (_aggregate_scores,
+                                                            _retrieve_chunks)
+from langcheck.metrics.scorer.unieval_models import \
+    UniEvalFactualConsistencyScorer
 from tests.utils import MockEvalClient
 
 ################################################################################
@@ -8,6 +19,190 @@ from tests.utils import MockEvalClient
 ################################################################################
 
 
+def _toy_tokenizer(vocab: List[tuple]) -> Tokenizer:
+    tokenizer = Tokenizer(models.Unigram(vocab, unk_id=2))
+    tokenizer.pre_tokenizer = pre_tokenizers.Metaspace()
+    tokenizer.decoder = decoders.Metaspace()
+    tokenizer.post_processor = processors.TemplateProcessing(single='$A </s>',
+                                                             special_tokens=[
+                                                                 ('</s>', 1)
+                                                             ])
+    return tokenizer
+
+
+def _toy_unieval_scorer(model_max_length: int,
+                        tokenizer=None,
+                        **kwargs) -> UniEvalFactualConsistencyScorer:
+    '''Returns a UniEval scorer with a tiny randomly initialized T5 model and,
+    unless another tokenizer is given, a character-level tokenizer that splits
+    the text at whitespace and appends "</s>", like the T5 tokenizer used by
+    UniEval.
+    '''
+    characters = [chr(i) for i in range(33, 127)]
+    vocab = [('<pad>', 0.0), ('</s>', 0.0), ('<unk>', 0.0), ('\u2581', -2.0)]
+    vocab += [(c, -3.0) for c in characters]
+    vocab += [('\u2581' + c, -2.5) for c in characters]
+    vocab += [('\u2581Yes', -1.0), ('\u2581No', -1.0)]
+    if tokenizer is None:
+        tokenizer = PreTrainedTokenizerFast(
+            tokenizer_object=_toy_tokenizer(vocab),
+            pad_token='<pad>',
+            eos_token='</s>',
+            unk_token='<unk>',
+            model_max_length=model_max_length)
+    torch.manual_seed(0)
+    config = T5Config(vocab_size=len(vocab),
+                      d_model=16,
+                      d_kv=4,
+                      d_ff=32,
+                      num_layers=1,
+                      num_heads=2,
+                      pad_token_id=0,
+                      eos_token_id=1)
+    # The pretrained models have this in their config.json, but it is not a
+    # parameter of T5Config. T5 starts decoding with the padding token.
+    config.decoder_start_token_id = 0
+    model = T5ForConditionalGeneration(config)
+    with patch('langcheck.metrics.model_manager.manager.fetch_model',
+               return_value=(tokenizer, model)):
+        return UniEvalFactualConsistencyScorer(**kwargs)
+
+
+@pytest.mark.parametrize('model_max_length', [64, 1024])
+def test_unieval_scorer_tokenize(model_max_length):
+    scorer = _toy_unieval_scorer(model_max_length)
+    claims = ['Tokyo is big.', 'It is  in Japan.', 'A']
+    sources = ['Tokyo is a city in Japan.'] * 2 + ['B' * 100]
+    expected = [
+        scorer.tokenizer(
+            'question: Is this claim consistent with the document? </s> '
+            f'claim: {claim} </s> document: {source}',
+            truncation=True)['input_ids']  # type: ignore
+        for claim, source in zip(claims, sources)
+    ]
+    input_ids_list, _ = scorer._tokenize(list(zip(claims, sources)))
+    assert input_ids_list == expected
+
+
+def test_unieval_scorer_tokenize_fallback():
+    scorer = _toy_unieval_scorer(1024)
+    inputs = [('Tokyo is big.', 'Tokyo is a city in Japan.')]
+    expected, _ = scorer._tokenize(inputs)
+    assert scorer._pieces_match_full_inputs
+
+    # If the token IDs of the pieces differ from the ones of the full inputs on
+    # the canary input, the full inputs are tokenized instead
+    scorer = _toy_unieval_scorer(1024)
+    with patch.object(scorer,
+                      '_ids_in_pieces',
+                      side_effect=lambda inputs: [[3]] * len(inputs)):
+        input_ids_list, _ = scorer._tokenize(inputs)
+    assert not scorer._pieces_match_full_inputs
+    assert input_ids_list == expected
+
+
+@pytest.mark.optional
+def test_unieval_scorer_tokenize_real_tokenizer():
+    tokenizer = AutoTokenizer.from_pretrained('MingZhong/unieval-fact')
+    scorer = _toy_unieval_scorer(tokenizer.model_max_length,
+                                 tokenizer=tokenizer)
+    inputs = [('Tokyo is big. ', 'Tokyo is a city in Japan.'),
+              ('It is  in "Japan".', 'Tokyo is a city in Japan.'),
+              ('', ' 123.5\tünïcode\n'), ('A', 'B ' * 1000)]
+    expected = [
+        tokenizer(
+            'question: Is this claim consistent with the document? </s> '
+            f'claim: {claim} </s> document: {source}',
+            truncation=True)['input_ids'] for claim, source in inputs
+    ]
+    input_ids_list, _ = scorer._tokenize(inputs)
+    # The pieces are concatenated instead of tokenizing the full inputs
+    assert scorer._pieces_match_full_inputs
+    assert input_ids_list == expected
+
+
+def test_unieval_scorer_yes_no_logits():
+    scorer = _toy_unieval_scorer(1024, batch_size=2)
+    inputs = [('Tokyo is big.', 'Tokyo is a city in Japan.'),
+              ('The Earth is flat.', 'The Earth is round.'), ('A', 'B' * 100)]
+    scores = scorer.score(inputs)
+
+    # The scores computed from the two logits equal P(Yes) / (P(Yes) + P(No))
+    # in the softmax over the whole vocabulary
+    encoded_inputs = scorer.tokenizer(  # type: ignore
+        [
+            'question: Is this claim consistent with the document? </s> '
+            f'claim: {claim} </s> document: {source}'
+            for claim, source in inputs
+        ],
+        padding=True,
+        return_tensors='pt')
+    with torch.no_grad():
+        logits = scorer.model(  # type: ignore
+            **encoded_inputs,
+            labels=torch.full((len(inputs), 1), scorer.neg_id)).logits
+    probs = torch.softmax(logits[:, 0], dim=-1)
+    expected = (probs[:, scorer.pos_id] /
+                (probs[:, scorer.pos_id] + probs[:, scorer.neg_id])).tolist()
+    assert scores == pytest.approx(expected, abs=1e-5)
+
+
+def test_unieval_scorer_overflow_strategy():
+    inputs = [('Tokyo is big.', 'Tokyo is a city in Japan.'), ('A', 'B' * 200)]
+    scores = _toy_unieval_scorer(256, overflow_strategy='nullify').score(inputs)
+    assert scores[0] is not None
+    assert scores[1] is None
+    with pytest.raises(ValueError):
+        _toy_unieval_scorer(256, overflow_strategy='raise').score(inputs)
+
+
+class BagOfWordsEncoder:
+    '''A sentence encoder that embeds texts as normalized bags of words.'''
+
+    def __init__(self, vocab: List[str]):
+        self.vocab = vocab
+        self.num_encoded = 0
+
+    def encode(self, texts, convert_to_tensor, normalize_embeddings):
+        self.num_encoded += len(texts)
+        embeddings = torch.tensor(
+            [[float(word in text.split())
+              for word in self.vocab]
+             for text in texts])
+        return torch.nn.functional.normalize(embeddings, dim=-1)
+
+
+def test_retrieve_chunks():
+    encoder = BagOfWordsEncoder(['cats', 'dogs', 'birds', 'fish'])
+    long_source = 'long'
+    short_source = 'short'
+    source_chunks = {
+        long_source: ['fish swim', 'cats purr', 'dogs bark', 'birds sing'],
+        short_source: ['cats purr'],
+    }
+    gen_sentences = ['birds and cats', 'dogs', 'fish', 'cats']
+    sources = [long_source] * 3 + [short_source]
+    with patch('langcheck.metrics.model_manager.manager.fetch_model',
+               return_value=encoder):
+        chunks = _retrieve_chunks(gen_sentences, sources, source_chunks, 2)
+    # The top chunks are kept in the order of the source
+    assert chunks[0] == ['cats purr', 'birds sing']
+    assert 'dogs bark' in chunks[1] and len(chunks[1]) == 2
+    assert 'fish swim' in chunks[2] and len(chunks[2]) == 2
+    # The sources that have few chunks are not pruned nor embedded
+    assert chunks[3] == ['cats purr']
+    assert encoder.num_encoded == 4 + 3
+
+
+def test_aggregate_scores():
+    scores, timed_out = _aggregate_scores([0.1, 0.9, 0.5, None, None],
+                                          [False, False, False, False, True],
+                                          [2, 1, 1, 1], max)
+    assert scores == [0.9, 0.5, None, None]
+    assert timed_out == [False, False, False, True]
+    assert _aggregate_scores([0.2, 0.4], None, [2], max) == ([0.4], None)
+
+
 @pytest.mark.parametrize(
     'generated_outputs,sources',
     [('Tokyo is the capital of Japan.', "Tokyo is Japan's capital city."),
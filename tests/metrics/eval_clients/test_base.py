@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from langcheck.metrics.en import toxicity
+from tests.utils import MockEvalClient
+
+
+class CountingEvalClient(MockEvalClient):
+    '''A mock evaluation client that records the inputs of both stages.'''
+
+    def __init__(self, evaluation_result: str | None = None) -> None:
+        super().__init__(evaluation_result)
+        self.text_response_prompts: list[str | None] = []
+        self.float_score_inputs: list[str | None] = []
+
+    def get_text_responses(self, prompts, *, tqdm_description=None):
+        prompts = list(prompts)
+        self.text_response_prompts.extend(prompts)
+        # Echo the prompts so that different prompts get different responses
+        return [
+            f'{prompt} {self.evaluation_result}' if prompt is not None else None
+            for prompt in prompts
+        ]
+
+    def get_float_score(self,
+                        metric_name,
+                        language,
+                        unstructured_assessment_result,
+                        score_map,
+                        *,
+                        tqdm_description=None):
+        self.float_score_inputs.extend(unstructured_assessment_result)
+        return [
+            score_map[assessment.split()[-1]] if assessment else None
+            for assessment in unstructured_assessment_result
+        ]
+
+
+def test_get_score_deduplication():
+    client = CountingEvalClient('Good')
+    prompts = ['foo', 'bar', 'foo', None, 'bar', 'foo', None]
+    scores, explanations = client.get_score('fluency', 'en', prompts, {
+        'Good': 1.0,
+        'Poor': 0.0
+    })
+    assert client.text_response_prompts == ['foo', 'bar', None]
+    assert client.float_score_inputs == ['foo Good', 'bar Good', None]
+    assert scores == [1.0, 1.0, 1.0, None, 1.0, 1.0, None]
+    assert explanations == [
+        'foo Good', 'bar Good', 'foo Good', None, 'bar Good', 'foo Good', None
+    ]
+
+
+def test_metric_deduplication():
+    client = CountingEvalClient('5')
+    metric_value = toxicity(['foo', 'bar', 'foo', 'foo'], eval_model=client)
+    assert len(client.text_response_prompts) == 2
+    assert metric_value.metric_values == [1.0] * 4
+    assert metric_value.explanations is not None
+    assert metric_value.explanations[0] == metric_value.explanations[2]
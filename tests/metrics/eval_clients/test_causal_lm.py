@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import pytest
+import torch
+from tokenizers import Tokenizer, decoders, models, pre_tokenizers
+from transformers import GPT2Config, GPT2LMHeadModel, PreTrainedTokenizerFast
+
+from langcheck.metrics.en import toxicity
+from langcheck.metrics.eval_clients import CausalLMEvalClient
+
+
+def _tiny_model_and_tokenizer():
+    '''Builds a randomly initialized GPT-2 model with a byte-level tokenizer,
+    so that the tests can run on CPU without downloading any model.
+    '''
+    byte_vocab = {
+        char: i for i, char in enumerate(pre_tokenizers.ByteLevel.alphabet())
+    }
+    tokenizer = Tokenizer(models.BPE(vocab=byte_vocab, merges=[]))
+    tokenizer.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tokenizer.decoder = decoders.ByteLevel()
+    hf_tokenizer = PreTrainedTokenizerFast(tokenizer_object=tokenizer)
+    hf_tokenizer.add_special_tokens({'eos_token': '<|endoftext|>'})
+
+    torch.manual_seed(0)
+    config = GPT2Config(vocab_size=len(hf_tokenizer),
+                        n_positions=1024,
+                        n_embd=16,
+                        n_layer=2,
+                        n_head=2)
+    return GPT2LMHeadModel(config), hf_tokenizer
+
+
+@pytest.fixture(scope='module')
+def tiny_model_and_tokenizer():
+    return _tiny_model_and_tokenizer()
+
+
+def test_get_score_causal_lm(tiny_model_and_tokenizer):
+    model, tokenizer = tiny_model_and_tokenizer
+    client = CausalLMEvalClient(model=model, tokenizer=tokenizer)
+    score_map = {'Good': 1.0, 'Fair': 0.5, 'Poor': 0.0}
+    prompts = ['Evaluate this text: foo', 'Evaluate this text: bar baz']
+
+    scores, explanations = client.get_score('fluency', 'en', prompts, score_map)
+    assert len(scores) == len(prompts)
+    for score, explanation in zip(scores, explanations):
+        assert explanation in score_map
+        assert score == score_map[explanation]
+
+    # The scores are deterministic
+    assert client.get_score('fluency', 'en', prompts,
+                            score_map) == (scores, explanations)
+
+
+@pytest.mark.parametrize(
+    'prompts', [['Evaluate: foo'], ['Evaluate: foo', 'Evaluate: foo bar'],
+                ['foo', 'bar', 'Evaluate: baz']])
+def test_prefix_cache_causal_lm(tiny_model_and_tokenizer, prompts):
+    model, tokenizer = tiny_model_and_tokenizer
+    continuations = [' Good', ' Fair', ' Not Good']
+
+    cached_client = CausalLMEvalClient(model=model,
+                                       tokenizer=tokenizer,
+                                       batch_size=2)
+    uncached_client = CausalLMEvalClient(model=model,
+                                         tokenizer=tokenizer,
+                                         reuse_prefix_cache=False)
+    cached = cached_client._option_log_probs(prompts, continuations)
+    uncached = uncached_client._option_log_probs(prompts, continuations)
+    assert len(cached) == len(prompts)
+    for cached_row, uncached_row in zip(cached, uncached):
+        assert cached_row is not None
+        assert uncached_row is not None
+        assert len(cached_row) == len(continuations)
+        assert all(abs(x - y) < 1e-4 for x, y in zip(cached_row, uncached_row))
+
+
+def test_metric_causal_lm(tiny_model_and_tokenizer):
+    model, tokenizer = tiny_model_and_tokenizer
+    client = CausalLMEvalClient(model=model, tokenizer=tokenizer)
+    metric_value = toxicity(['foo', 'bar'], eval_model=client)
+    assert all(value in [0, 0.25, 0.5, 0.75, 1.0]
+               for value in metric_value.metric_values)
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import json
+import os
+from unittest.mock import Mock, patch
+
+import httpx
+import pytest
+from openai import APIConnectionError, RateLimitError
+from openai.types import CompletionUsage
+from openai.types.chat import ChatCompletion
+
+from langcheck.metrics.en import fluency
+from langcheck.metrics.eval_clients import (EvalClientStats, OpenAIEvalClient,
+                                            RequestStats,
+                                            collect_eval_client_stats)
+from langcheck.metrics.eval_clients._openai import _retry_delay
+from tests.utils import MockEvalClient
+
+
+def _mock_chat_completion(prompt_tokens: int,
+                          completion_tokens: int) -> ChatCompletion:
+    mock_chat_completion = Mock(spec=ChatCompletion)
+    mock_chat_completion.choices = [
+        Mock(message=Mock(content='Good',
+                          function_call=Mock(
+                              arguments=json.dumps({'assessment': 'Good'}))))
+    ]
+    mock_chat_completion.usage = CompletionUsage(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=prompt_tokens + completion_tokens)
+    return mock_chat_completion
+
+
+def test_eval_client_stats():
+    stats = EvalClientStats()
+    assert stats.latency_percentile(50) is None
+    assert stats.error_rate == 0
+
+    for latency in [1.0, 2.0, 3.0, 4.0]:
+        stats.add(
+            RequestStats(prompt_tokens=10, completion_tokens=5,
+                         latency=latency))
+    stats.add(
+        RequestStats(prompt_tokens=None,
+                     completion_tokens=None,
+                     latency=5.0,
+                     retries=2,
+                     error='RateLimitError'))
+
+    assert stats.num_requests == 5
+    assert stats.num_errors == 1
+    assert stats.num_retries == 2
+    assert stats.error_rate == 0.2
+    assert stats.error_counts == {'RateLimitError': 1}
+    assert stats.prompt_tokens == 40
+    assert stats.completion_tokens == 20
+    assert stats.total_tokens == 60
+    assert stats.p50_latency == 3.0
+    assert stats.latency_percentile(100) == 5.0
+    assert stats.latency_percentile(25) == 2.0
+    assert stats.cost(0.5, 1.0) == 40
+    with pytest.raises(ValueError):
+        stats.latency_percentile(101)
+
+
+def test_openai_request_stats():
+    prompts = ['Assess the fluency of the generated output...'] * 3
+    callback = Mock()
+    with patch('openai.resources.chat.Completions.create',
+               return_value=_mock_chat_completion(12, 3)):
+        os.environ["OPENAI_API_KEY"] = "dummy_key"
+        client = OpenAIEvalClient(stats_callbacks=[callback])
+        with collect_eval_client_stats() as stats:
+            client.get_text_responses(prompts)
+
+    assert stats.num_requests == 3
+    assert stats.prompt_tokens == 36
+    assert stats.completion_tokens == 9
+    assert stats.num_errors == 0
+    assert callback.call_count == 3
+    assert isinstance(callback.call_args[0][0], RequestStats)
+
+
+def test_openai_request_stats_with_errors():
+    prompts = ['Assess the fluency of the generated output...']
+    error = APIConnectionError(request=Mock())
+    with patch('openai.resources.chat.Completions.create',
+               side_effect=[
+                   error, error,
+                   _mock_chat_completion(1, 1), error, error, error
+               ]):
+        os.environ["OPENAI_API_KEY"] = "dummy_key"
+        client = OpenAIEvalClient(max_retries=2)
+        with collect_eval_client_stats() as stats, patch(
+                'langcheck.metrics.eval_clients._openai.time.sleep') as sleep:
+            # The first request succeeds on the last retry, and the second
+            # request fails on every attempt
+            with pytest.warns(UserWarning):
+                responses = client.get_text_responses(prompts * 2)
+
+    assert responses[0] == 'Good'
+    assert stats.num_requests == 2
+    assert [request.retries for request in stats.requests] == [2, 2]
+    assert stats.error_counts == {'APIConnectionError': 1}
+    # There is no delay after the last attempt
+    assert sleep.call_count == 4
+
+
+def test_retry_delay():
+    error = APIConnectionError(request=Mock())
+    for retries in range(10):
+        # Exponential backoff with full jitter, up to 8 seconds
+        assert 0 <= _retry_delay(error, retries) <= min(8, 0.5 * 2**retries)
+
+    # The delay requested by the server is used instead, up to 60 seconds
+    request = httpx.Request('POST', 'https://api.openai.com/v1')
+    for header, value, expected_delay in [('retry-after', '3', 3),
+                                          ('retry-after-ms', '1500', 1.5),
+                                          ('retry-after', '1000', 60)]:
+        response = httpx.Response(429, headers={header: value}, request=request)
+        error = RateLimitError('Rate limit', response=response, body=None)
+        assert _retry_delay(error, 0) == expected_delay
+
+
+def test_metric_value_eval_client_stats():
+    with patch('openai.resources.chat.Completions.create',
+               return_value=_mock_chat_completion(12, 3)):
+        os.environ["OPENAI_API_KEY"] = "dummy_key"
+        client = OpenAIEvalClient()
+        metric_value = fluency(['foo', 'bar'], eval_model=client)
+
+    assert metric_value == 1.0
+    # The first stage sends one request per output, and the second stage
+    # sends one request for the identical responses
+    assert metric_value.eval_client_stats is not None
+    assert metric_value.eval_client_stats.num_requests == 3
+    assert metric_value.eval_client_stats.prompt_tokens == 36
+    # The stats are kept when a threshold is applied
+    assert (metric_value > 0).eval_client_stats is \
+        metric_value.eval_client_stats
+
+    metric_value = fluency(['foo', 'bar'], eval_model=MockEvalClient('Good'))
+    assert metric_value.eval_client_stats is None
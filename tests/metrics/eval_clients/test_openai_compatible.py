@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import pytest
+
+from langcheck.metrics.en import fluency
+from langcheck.metrics.eval_clients import OpenAICompatibleEvalClient
+from tests.utils import MockOpenAIServer
+
+
+@pytest.mark.parametrize('assessment,expected_score', [('Good', 1.0),
+                                                       ('Fair', 0.5),
+                                                       ('Poor', 0.0)])
+def test_get_score_openai_compatible(assessment, expected_score):
+    with MockOpenAIServer(assessment=assessment) as server:
+        client = OpenAICompatibleEvalClient(server.base_url, 'mock-model')
+        scores, explanations = client.get_score(
+            'fluency', 'en', ['Evaluate: foo', 'Evaluate: bar'], {
+                'Good': 1.0,
+                'Fair': 0.5,
+                'Poor': 0.0
+            })
+    assert scores == [expected_score, expected_score]
+    assert explanations == [f'The assessment is {assessment}.'] * 2
+
+
+def test_connection_pool_openai_compatible():
+    with MockOpenAIServer(delay=0.05) as server:
+        client = OpenAICompatibleEvalClient(server.base_url,
+                                            'mock-model',
+                                            max_concurrency=4,
+                                            http2=False)
+        metric_value = fluency([f'foo {i}' for i in range(16)],
+                               eval_model=client)
+        assert metric_value.metric_values == [1.0] * 16
+        # One request per output, sent in parallel over a bounded number of
+        # keep-alive connections. The responses are identical, so the second
+        # stage sends a single request.
+        assert server.num_requests == 17
+        assert 1 < server.max_in_flight <= 4
+        assert server.num_connections <= 4
+
+        # Another client for the same server shares the connection pool
+        other_client = OpenAICompatibleEvalClient(server.base_url,
+                                                  'mock-model',
+                                                  max_concurrency=4,
+                                                  http2=False)
+        fluency(['bar'] * 4, eval_model=other_client)
+        assert server.num_connections <= 4
+
+    assert metric_value.eval_client_stats is not None
+    assert metric_value.eval_client_stats.num_requests == 17
+    assert metric_value.eval_client_stats.completion_tokens == 17 * 8
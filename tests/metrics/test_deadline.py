@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from langcheck.metrics import deadline
+from langcheck.metrics._deadline import (collect_timed_out, merge_timed_out,
+                                         time_remaining)
+from langcheck.metrics.en import fluency
+from langcheck.metrics.eval_clients import OpenAICompatibleEvalClient
+from langcheck.metrics.scorer._base import BaseSingleScorer
+from tests.utils import MockEvalClient, MockOpenAIServer
+
+
+class SlowScorer(BaseSingleScorer):
+    '''A scorer that takes `delay` seconds per batch.'''
+
+    def __init__(self, delay: float) -> None:
+        super().__init__()
+        self.batch_size = 2
+        self.delay = delay
+
+    def _tokenize(self, inputs):
+        return inputs
+
+    def _score_tokens(self, tokens):
+        time.sleep(self.delay)
+        return [float(len(token)) for token in tokens]
+
+    def _slice_tokens(self, tokens, start_idx, end_idx):
+        return tokens[start_idx:end_idx]
+
+
+def test_nested_deadline():
+    assert time_remaining() is None
+    with deadline(10):
+        with deadline(100):
+            remaining = time_remaining()
+            assert remaining is not None and remaining <= 10
+    assert time_remaining() is None
+
+
+def test_merge_timed_out():
+    assert merge_timed_out([], [1.0, None]) is None
+    assert merge_timed_out([[False, False]], [1.0, None]) is None
+    assert merge_timed_out([[True, False], [False, True]],
+                           [None, None]) == [True, True]
+    # Records that are not aligned fall back to the missing results
+    assert merge_timed_out([[True]], [1.0, None, None]) == [False, True, True]
+
+
+def test_scorer_deadline():
+    scorer = SlowScorer(delay=0.2)
+    with collect_timed_out() as records, deadline(0.3):
+        scores = scorer.score(['a', 'bb', 'ccc', 'dddd', 'eeeee', 'f'])
+    assert scores[:2] == [1.0, 2.0]
+    assert scores[-1] is None
+    assert records == [[score is None for score in scores]]
+
+
+@pytest.mark.parametrize('max_concurrency', [1, 4])
+def test_eval_client_deadline(max_concurrency):
+    outputs = ['foo', 'slow', 'bar', 'baz']
+    # The request of the 'slow' output takes longer than the deadline
+    with MockOpenAIServer(
+            delay=lambda prompt: 5.0 if 'slow' in prompt else 0.05) as server:
+        client = OpenAICompatibleEvalClient(server.base_url,
+                                            'mock-model',
+                                            max_concurrency=max_concurrency)
+        start_time = time.monotonic()
+        with deadline(1.0):
+            metric_value = fluency(outputs, eval_model=client)
+        assert time.monotonic() - start_time < 2.0
+
+    if max_concurrency == 1:
+        # The requests after the slow one were never sent
+        assert metric_value.timed_out == [False, True, True, True]
+    else:
+        assert metric_value.timed_out == [False, True, False, False]
+    assert metric_value.timed_out is not None
+    for value, timed_out in zip(metric_value.metric_values,
+                                metric_value.timed_out):
+        assert (value is None) == timed_out
+
+    # The timed-out rows are kept through a threshold and shown in the table
+    metric_value_with_threshold = metric_value > 0.5
+    assert metric_value_with_threshold.timed_out == metric_value.timed_out
+    assert 'timed_out' in metric_value.to_df().columns
+
+
+def test_failed_rows_are_not_timed_out():
+    with deadline(10):
+        metric_value = fluency(['foo', 'bar'],
+                               eval_model=MockEvalClient('Unknown'))
+    assert metric_value.metric_values == [None, None]
+    assert metric_value.timed_out is None
@@ -0,0 +1,211 @@
+import pytest
+
+from langcheck.metrics._json_schema import (JsonSchemaValidator,
+                                            compile_json_schema)
+
+################################################################################
+# Tests
+################################################################################
+
+_ITEM_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'name': {
+            'type': 'string',
+            'minLength': 1
+        },
+        'price': {
+            'type': 'number',
+            'exclusiveMinimum': 0
+        },
+        'tags': {
+            'type': 'array',
+            'items': {
+                'enum': ['new', 'sale']
+            },
+            'uniqueItems': True
+        },
+    },
+    'required': ['name', 'price'],
+    'additionalProperties': False,
+}
+
+
+@pytest.mark.parametrize('text,error', [
+    ('{"name": "pen", "price": 1.5}', None),
+    ('{"name": "pen", "price": 1, "tags": ["new", "sale"]}', None),
+    ('{"name": "pen"}', '$: "price" is a required property'),
+    ('{"name": "", "price": 1}', '$.name: "" is shorter than 1 characters'),
+    ('{"name": "pen", "price": 0}',
+     '$.price: 0 is less than or equal to the exclusive minimum of 0'),
+    ('{"name": "pen", "price": true}', '$.price: true is not of type number'),
+    ('{"name": "pen", "price": 1, "tags": ["new", "old"]}',
+     '$.tags[1]: "old" is not one of ["new", "sale"]'),
+    ('{"name": "pen", "price": 1, "tags": ["new", "new"]}',
+     '$.tags: The items 0 and 1 are not unique'),
+    ('{"name": "pen", "price": 1, "the color": "red"}',
+     '$["the color"]: Additional properties are not allowed'),
+    ('[]', '$: an array is not of type object'),
+])
+def test_json_schema_validator(text, error):
+    assert JsonSchemaValidator(_ITEM_SCHEMA).validate(text) == error
+
+
+def test_json_schema_validator_invalid_json():
+    error = JsonSchemaValidator(_ITEM_SCHEMA).validate('{"name": ')
+    assert error is not None and error.startswith('Invalid JSON: ')
+
+
+def test_json_schema_validator_recursive_ref():
+    schema = {
+        '$defs': {
+            'node': {
+                'type': 'object',
+                'properties': {
+                    'value': {
+                        'type': 'integer'
+                    },
+                    'children': {
+                        'type': 'array',
+                        'items': {
+                            '$ref': '#/$defs/node'
+                        }
+                    },
+                },
+            }
+        },
+        '$ref': '#/$defs/node',
+    }
+    validator = JsonSchemaValidator(schema)
+    assert validator.validate(
+        '{"value": 1, "children": [{"value": 2.0, "children": []}]}') is None
+    assert validator.validate(
+        '{"value": 1, "children": [{"value": 2.5}]}'
+    ) == '$.children[0].value: 2.5 is not of type integer'
+
+
+@pytest.mark.parametrize('schema,valid_texts,invalid_texts', [
+    ({
+        'anyOf': [{
+            'type': 'string'
+        }, {
+            'type': 'integer'
+        }]
+    }, ['"a"', '1'], ['1.5', 'null']),
+    ({
+        'oneOf': [{
+            'type': 'number'
+        }, {
+            'type': 'integer'
+        }]
+    }, ['1.5'], ['1', '"a"']),
+    ({
+        'not': {
+            'type': 'null'
+        }
+    }, ['0', '{}'], ['null']),
+    ({
+        'const': 1
+    }, ['1', '1.0'], ['true', '2']),
+    ({
+        'if': {
+            'type': 'number'
+        },
+        'then': {
+            'minimum': 0
+        },
+        'else': {
+            'type': 'string'
+        }
+    }, ['0', '"a"'], ['-1', 'null']),
+    ({
+        'type': 'array',
+        'prefixItems': [{
+            'type': 'string'
+        }],
+        'items': False,
+        'minItems': 1
+    }, ['["a"]'], ['[]', '[1]', '["a", "b"]']),
+    ({
+        'patternProperties': {
+            '^x-': {
+                'type': 'integer'
+            }
+        },
+        'maxProperties': 1
+    }, ['{"x-a": 1}', '{"y": "b"}'], ['{"x-a": "b"}', '{"a": 1, "b": 2}']),
+    ({
+        'type': 'string',
+        'pattern': '^[0-9]+$'
+    }, ['"123"'], ['"12a"']),
+    ({
+        'multipleOf': 0.5
+    }, ['1.5', '2', '"a"'], ['1.2']),
+    ({
+        'minimum': 0,
+        'exclusiveMinimum': True,
+        'maximum': 1,
+        'exclusiveMaximum': False
+    }, ['0.5', '1'], ['0', '1.5']),
+    ({
+        'contains': {
+            'type': 'integer'
+        },
+        'maxContains': 2
+    }, ['[1, "a"]', '[1, 2]', '"a"'], ['[]', '["a"]', '[1, 2, 3]']),
+    ({
+        'propertyNames': {
+            'pattern': '^[a-z]+$'
+        }
+    }, ['{"abc": 1}', '[]'], ['{"Abc": 1}']),
+    ({
+        'dependentRequired': {
+            'a': ['b']
+        },
+        'dependentSchemas': {
+            'c': {
+                'required': ['d']
+            }
+        }
+    }, ['{"a": 1, "b": 2}', '{"c": 1, "d": 2}'], ['{"a": 1}', '{"c": 1}']),
+    ({
+        'dependencies': {
+            'a': ['b'],
+            'c': {
+                'maxProperties': 1
+            }
+        }
+    }, ['{"a": 1, "b": 2}', '{"c": 1}'], ['{"a": 1}', '{"c": 1, "d": 2}']),
+    (True, ['null'], []),
+    (False, [], ['null']),
+])
+def test_json_schema_validator_keywords(schema, valid_texts, invalid_texts):
+    validator = JsonSchemaValidator(schema)
+    for text in valid_texts:
+        assert validator.validate(text) is None, text
+    for text in invalid_texts:
+        assert validator.validate(text) is not None, text
+
+
+def test_json_schema_validator_values_rejected_by_orjson():
+    validator = JsonSchemaValidator({'type': 'number'})
+    assert validator.validate('NaN') is None
+    assert validator.validate(str(2**70)) is None
+
+
+def test_json_schema_validator_invalid_schema():
+    with pytest.raises(ValueError):
+        JsonSchemaValidator({'type': 'float'})
+    with pytest.raises(ValueError):
+        JsonSchemaValidator({'$ref': '#/$defs/missing'})
+    # The keywords that are not implemented are not silently ignored
+    with pytest.raises(ValueError):
+        JsonSchemaValidator({'items': {'unevaluatedProperties': False}})
+
+
+def test_compile_json_schema_is_cached():
+    validator = compile_json_schema({'type': 'object', 'required': ['a']})
+    assert compile_json_schema({
+        'required': ['a'],
+        'type': 'object'
+    }) is validator
@@ -0,0 +1,75 @@
+from typing import List
+
+import pytest
+
+from langcheck.metrics import exact_match, is_float, lazy
+from langcheck.metrics.metric_value import MetricValue
+
+
+def _counting(metric_fn, batch_sizes: List[int]):
+    '''Wraps a metric function to record the number of data points of each
+    call.'''
+
+    def counting_metric_fn(generated_outputs, *args, **kwargs) -> MetricValue:
+        batch_sizes.append(len(generated_outputs))
+        return metric_fn(generated_outputs, *args, **kwargs)
+
+    counting_metric_fn.__name__ = metric_fn.__name__
+    return counting_metric_fn
+
+
+def test_lazy_all_stops_at_first_failing_batch():
+    batch_sizes = []
+    generated_outputs = ['1', '2', 'a', '4', '5', '6', '7']
+    lazy_is_float = lazy(_counting(is_float, batch_sizes), batch_size=2)
+
+    lazy_metric_value = lazy_is_float(generated_outputs) == 1
+    assert batch_sizes == []
+    assert not lazy_metric_value
+    # The third data point fails, so only the first two batches are computed
+    assert batch_sizes == [2, 2]
+    assert lazy_metric_value.failed_batch is not None
+    assert lazy_metric_value.failed_batch.generated_outputs == ['a', '4']
+    assert 'computed 4/7 rows' in repr(lazy_metric_value)
+
+    # any() stops at the first passing batch
+    batch_sizes.clear()
+    assert (lazy_is_float(generated_outputs) == 0).any()
+    assert batch_sizes == [2, 2]
+
+    batch_sizes.clear()
+    assert lazy_is_float(generated_outputs[3:]) == 1
+    assert batch_sizes == [2, 2]
+
+    # The computed batches are reused
+    batch_sizes.clear()
+    lazy_metric_value = lazy_is_float(generated_outputs)
+    assert not lazy_metric_value.all()
+    metric_value = lazy_metric_value.compute()
+    assert batch_sizes == [2, 2, 2, 1]
+    assert metric_value.metric_values == is_float(
+        generated_outputs).metric_values
+    assert metric_value.generated_outputs == generated_outputs
+
+    with pytest.raises(ValueError):
+        bool(lazy_metric_value)
+
+
+def test_lazy_with_multiple_per_row_arguments():
+    generated_outputs = ['a', 'b', 'c']
+    reference_outputs = ['a', 'b', 'd']
+    lazy_exact_match = lazy(exact_match, batch_size=2)
+
+    lazy_metric_value = lazy_exact_match(generated_outputs,
+                                         reference_outputs,
+                                         prompts=['p1', 'p2', 'p3'])
+    assert not lazy_metric_value == 1
+    metric_value = (lazy_metric_value == 1).compute()
+    assert metric_value.threshold_results == [True, True, False]
+    assert metric_value.prompts == ['p1', 'p2', 'p3']
+
+    # A single string is computed as one batch
+    assert lazy_exact_match('a', 'a') == 1
+
+    with pytest.raises(ValueError):
+        lazy_exact_match(generated_outputs, reference_outputs[:2])
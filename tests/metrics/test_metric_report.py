@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from langcheck.metrics import MetricReport, is_float, is_int
+from langcheck.metrics.metric_value import MetricValue
+
+
+def test_metric_report():
+    generated_outputs = ['1', '2.5', 'a']
+    report = MetricReport([is_float(generated_outputs)])
+    report.add(is_int(generated_outputs))
+    report.add(is_int(list(generated_outputs), domain=range(2, 10)),
+               name='is_int_min_2')
+
+    assert len(report) == 3
+    assert report.metric_names == ['is_float', 'is_int', 'is_int_min_2']
+
+    df = report.to_df()
+    assert list(df.columns) == [
+        'generated_output', 'is_float', 'is_int', 'is_int_min_2'
+    ]
+    assert df['generated_output'].tolist() == generated_outputs
+    assert df['is_float'].tolist() == [1, 1, 0]
+    assert df['is_int'].tolist() == [1, 0, 0]
+    assert df['is_int_min_2'].tolist() == [0, 0, 0]
+
+    # The DataFrame shares the columns of the report
+    assert np.shares_memory(df['is_float'].to_numpy(), report['is_float'])
+    assert np.shares_memory(df['generated_output'].to_numpy(),
+                            report['generated_output'])
+    df_copy = report.to_df(copy=True)
+    df_copy.loc[0, 'is_float'] = 0
+    assert report['is_float'][0] == 1
+
+    with pytest.raises(ValueError):
+        # Duplicate name
+        report.add(is_int(generated_outputs))
+    with pytest.raises(ValueError):
+        # Different generated outputs
+        report.add(is_int(['1', '2', '3']), name='other')
+    with pytest.raises(ValueError):
+        # Different number of rows
+        report.add(is_int(['1']), name='other')
+    assert report.metric_names == ['is_float', 'is_int', 'is_int_min_2']
+
+
+def test_metric_report_inputs_and_none():
+    metric_value = MetricValue(metric_name='score',
+                               prompts=['p1', 'p2'],
+                               generated_outputs=['a', 'b'],
+                               reference_outputs=None,
+                               sources=None,
+                               explanations=None,
+                               metric_values=[0.5, None],
+                               language='en')
+    metric_value_with_sources = MetricValue(metric_name='other_score',
+                                            prompts=None,
+                                            generated_outputs=['a', 'b'],
+                                            reference_outputs=None,
+                                            sources=['s1', 's2'],
+                                            explanations=None,
+                                            metric_values=[1, 0],
+                                            language='en')
+    report = MetricReport([metric_value, metric_value_with_sources])
+
+    df = report.to_df()
+    assert list(df.columns) == [
+        'prompt', 'source', 'generated_output', 'score', 'other_score'
+    ]
+    assert df['score'].iloc[0] == 0.5
+    assert np.isnan(df['score'].iloc[1])
+
+    pa = pytest.importorskip('pyarrow')
+    table = report.to_arrow()
+    assert table.column_names == list(df.columns)
+    assert table.column('score').to_pylist() == [0.5, None]
+    assert table.column('source').type == pa.string()
+    assert table.column('other_score').to_pylist() == [1, 0]
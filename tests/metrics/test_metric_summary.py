@@ -0,0 +1,57 @@
+import json
+import math
+
+import numpy as np
+import pytest
+
+from langcheck.metrics import MetricSummary
+
+
+def test_metric_summary():
+    values = [0.5, None, 0.1, 0.9, float('nan'), 0.3]
+    summary = MetricSummary.from_values(values)
+
+    assert summary.count == 4
+    assert summary.num_missing == 2
+    assert summary.mean == pytest.approx(0.45)
+    assert summary.variance == pytest.approx(
+        np.var([0.5, 0.1, 0.9, 0.3], ddof=1))
+    assert summary.min == 0.1
+    assert summary.max == 0.9
+    assert summary.quantile(0) == 0.1
+    assert summary.quantile(1) == 0.9
+
+    empty_summary = MetricSummary.from_values([])
+    assert empty_summary.count == 0
+    assert math.isnan(empty_summary.mean)
+    assert math.isnan(empty_summary.quantile(0.5))
+    with pytest.raises(ValueError):
+        summary.quantile(1.5)
+
+
+def test_metric_summary_merge():
+    rng = np.random.default_rng(0)
+    values = np.concatenate([rng.normal(size=3000), np.zeros(100)])
+    shards = np.array_split(rng.permutation(values), 7)
+
+    summaries = [MetricSummary.from_values(shard) for shard in shards]
+    # The summaries survive a round trip through JSON
+    summaries = [
+        MetricSummary.from_dict(json.loads(json.dumps(summary.to_dict())))
+        for summary in summaries
+    ]
+    merged = summaries[0].merge(*summaries[1:], MetricSummary())
+
+    assert merged.count == len(values)
+    assert merged.mean == pytest.approx(values.mean())
+    assert merged.variance == pytest.approx(values.var(ddof=1))
+    assert merged.min == values.min()
+    assert merged.max == values.max()
+
+    sorted_values = np.sort(values)
+    for q in [0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99]:
+        actual = sorted_values[int(q * (len(values) - 1))]
+        assert abs(merged.quantile(q) - actual) <= 0.01 * abs(actual) + 1e-9
+
+    with pytest.raises(ValueError):
+        merged.merge(MetricSummary.from_values([1.0], relative_accuracy=0.05))
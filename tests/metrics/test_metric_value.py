@@ -1,10 +1,15 @@
+import math
+import operator
 from typing import Optional
 
+import numpy as np
 import pandas as pd
 import pytest
 
-from langcheck.metrics import is_float
-from langcheck.metrics.metric_value import MetricValue
+from langcheck.metrics import is_float, is_int
+from langcheck.metrics.eval_clients._stats import EvalClientStats, RequestStats
+from langcheck.metrics.metric_value import (MetricValue,
+                                            MetricValueWithThreshold, _LazyList)
 
 
 def test_metric_value():
@@ -77,6 +82,76 @@ def test_optional_metric_values():
     assert (metric_value == 0).pass_rate == 0
 
 
+def test_vectorized_thresholds():
+    score_list = [0.2, None, float('nan'), 0.8, 0.5]
+    generated_outputs = ['a', 'b', 'c', 'd', 'e']
+    metric_value: MetricValue[Optional[float]] = MetricValue(
+        metric_name='test',
+        prompts=None,
+        generated_outputs=generated_outputs,
+        reference_outputs=None,
+        sources=None,
+        explanations=None,
+        metric_values=score_list,
+        language='en')
+
+    # Only the `None` value is masked, not the NaN value
+    assert metric_value.none_mask.tolist() == [False, True, False, False, False]
+    assert np.isnan(metric_value.values_array[1])
+
+    for threshold_op, op in [('<', operator.lt), ('<=', operator.le),
+                             ('>', operator.gt), ('>=', operator.ge),
+                             ('==', operator.eq), ('!=', operator.ne)]:
+        metric_value_with_threshold = metric_value._with_threshold(
+            0.5, threshold_op)
+        expected = [x is not None and op(x, 0.5) for x in score_list]
+        assert metric_value_with_threshold.threshold_results == expected
+        assert metric_value_with_threshold.pass_rate == sum(expected) / 5
+        assert metric_value_with_threshold.all() == all(expected)
+        assert metric_value_with_threshold.any() == any(expected)
+        assert metric_value_with_threshold.to_df()['threshold_result'].tolist(
+        ) == expected
+
+    # The columns and the values array are shared, not copied
+    metric_value_with_threshold = metric_value > 0.5
+    assert metric_value_with_threshold.generated_outputs is generated_outputs
+    assert (metric_value_with_threshold.metric_values
+            is metric_value.metric_values)
+    assert (metric_value_with_threshold.values_array
+            is metric_value.values_array)
+
+    # The values array follows the changes made to the metric values in place
+    modified_metric_value = MetricValue(metric_name='test',
+                                        prompts=None,
+                                        generated_outputs=['a', 'b'],
+                                        reference_outputs=None,
+                                        sources=None,
+                                        explanations=None,
+                                        metric_values=[0.2, 0.8],
+                                        language='en')
+    assert (modified_metric_value > 0.5).pass_rate == 0.5
+    modified_metric_value.metric_values[0] = 0.8
+    assert modified_metric_value.values_array.tolist() == [0.8, 0.8]
+    assert (modified_metric_value > 0.5).pass_rate == 1.0
+    modified_metric_value.metric_values.pop()
+    assert modified_metric_value.values_array.tolist() == [0.8]
+    modified_metric_value.metric_values = [0.1, 0.9, 0.3]
+    assert (modified_metric_value > 0.5).pass_rate == 1 / 3
+
+    # An empty MetricValue has an undefined pass rate
+    empty_metric_value = MetricValue(metric_name='test',
+                                     prompts=None,
+                                     generated_outputs=[],
+                                     reference_outputs=None,
+                                     sources=None,
+                                     explanations=None,
+                                     metric_values=[],
+                                     language='en')
+    assert math.isnan((empty_metric_value > 0).pass_rate)
+    assert (empty_metric_value > 0).all()
+    assert not (empty_metric_value > 0).any()
+
+
 def test_pairwise_metric_value():
     score_list = [1.0, 0.0]
     dummy_generated_outputs_a = ['foo', 'bar']
@@ -98,3 +173,154 @@ def test_pairwise_metric_value():
         pd.Series(dummy_generated_outputs_b))
     assert metric_value_df['source_a'].equals(pd.Series([None, None]))
     assert metric_value_df['source_b'].equals(pd.Series([None, None]))
+
+
+@pytest.mark.parametrize('filename', ['metric_value.arrow', 'mv.parquet'])
+def test_save_and_load(tmp_path, filename):
+    pytest.importorskip('pyarrow')
+    metric_value = MetricValue(metric_name='test',
+                               prompts=['p1', 'p2', 'p3'],
+                               generated_outputs=['a', 'b', 'c'],
+                               reference_outputs=None,
+                               sources=['s1', 's2', 's3'],
+                               explanations=['x', None, 'z'],
+                               metric_values=[1, None, 0],
+                               language='en')
+    metric_value.latencies = [0.1, None, 0.3]
+    path = str(tmp_path / filename)
+
+    metric_value.save(path)
+    loaded = MetricValue.load(path)
+    assert type(loaded) is MetricValue
+    assert loaded.metric_name == 'test'
+    assert loaded.language == 'en'
+    assert loaded.none_mask.tolist() == [False, True, False]
+    assert loaded.values_array[[0, 2]].tolist() == [1.0, 0.0]
+    assert (loaded >= 1).threshold_results == [True, False, False]
+    assert loaded.to_df().equals(metric_value.to_df())
+    # The columns are not converted to lists until the fields are accessed
+    assert isinstance(loaded.__dict__['metric_values'], _LazyList)
+    assert isinstance(loaded.__dict__['prompts'], _LazyList)
+
+    assert loaded.prompts == ['p1', 'p2', 'p3']
+    assert loaded.sources == ['s1', 's2', 's3']
+    assert loaded.reference_outputs is None
+    assert loaded.metric_values == [1, None, 0]
+    assert loaded.latencies == [0.1, None, 0.3]
+    assert loaded.timed_out is None
+    assert loaded.eval_client_stats is None
+    loaded.metric_values[1] = 2
+    assert loaded.values_array.tolist() == [1.0, 2.0, 0.0]
+
+    metric_value_with_threshold = metric_value >= 1
+    metric_value_with_threshold.save(path)
+    loaded = MetricValue.load(path)
+    assert isinstance(loaded, MetricValueWithThreshold)
+    assert loaded.threshold == 1
+    assert loaded.threshold_op == '>='
+    assert loaded.threshold_results == [True, False, False]
+
+
+def test_save_and_load_pairwise(tmp_path):
+    pytest.importorskip('pyarrow')
+    metric_value = MetricValue(metric_name='pairwise_comparison',
+                               prompts=None,
+                               generated_outputs=(['a1', 'a2'], ['b1', 'b2']),
+                               reference_outputs=['r1', 'r2'],
+                               sources=(None, ['s1', 's2']),
+                               explanations=None,
+                               metric_values=[0.0, 1.0],
+                               language='ja')
+    metric_value.eval_client_stats = EvalClientStats(requests=[
+        RequestStats(prompt_tokens=10, completion_tokens=2, latency=0.5)
+    ])
+    path = str(tmp_path / 'pairwise.arrow')
+
+    metric_value.save(path)
+    loaded = MetricValue.load(path)
+    assert loaded.is_pairwise
+    assert loaded.generated_outputs == (['a1', 'a2'], ['b1', 'b2'])
+    assert loaded.sources == (None, ['s1', 's2'])
+    assert loaded.metric_values == [0.0, 1.0]
+    assert loaded.values_array.tolist() == [0.0, 1.0]
+    assert not loaded.values_array.flags.writeable
+    assert loaded.eval_client_stats == metric_value.eval_client_stats
+    assert loaded.to_df().equals(metric_value.to_df())
+
+    (tmp_path / 'other.arrow').write_bytes(b'not an arrow file')
+    with pytest.raises(Exception):
+        MetricValue.load(str(tmp_path / 'other.arrow'))
+    with pytest.raises(ValueError):
+        metric_value.save(path, format='csv')
+
+
+def test_concat_and_merge():
+    generated_outputs = ['1', 'a', '2', 'b', '3']
+    shard_indices = [[0, 2, 4], [1, 3]]
+    shards = [
+        is_float([generated_outputs[i]
+                  for i in indices])
+        for indices in shard_indices
+    ]
+    shards[1].latencies = [0.1, 0.2]
+
+    concatenated = MetricValue.concat(shards)
+    assert concatenated.generated_outputs == ['1', '2', '3', 'a', 'b']
+    assert concatenated.metric_values == [1, 1, 1, 0, 0]
+    assert concatenated.latencies == [None, None, None, 0.1, 0.2]
+    assert concatenated.values_array.tolist() == [1, 1, 1, 0, 0]
+
+    merged = MetricValue.merge(shards, shard_indices)
+    expected = is_float(generated_outputs)
+    assert merged.generated_outputs == generated_outputs
+    assert merged.metric_values == expected.metric_values
+    assert merged.values_array.tolist() == expected.metric_values
+    assert merged.latencies == [None, 0.1, None, 0.2, None]
+    assert merged.summary().mean == pytest.approx(0.6)
+
+    # The threshold results of the shards are reused
+    merged_with_threshold = MetricValue.merge([shard == 1 for shard in shards],
+                                              shard_indices)
+    assert isinstance(merged_with_threshold, MetricValueWithThreshold)
+    assert merged_with_threshold.threshold_results == [
+        True, False, True, False, True
+    ]
+    assert merged_with_threshold.pass_rate == 0.6
+
+    with pytest.raises(ValueError):
+        # Different thresholds
+        MetricValue.concat([shards[0] == 1, shards[1] == 0])
+    with pytest.raises(ValueError):
+        # Different metrics
+        MetricValue.concat([shards[0], is_int(['1'])])
+    with pytest.raises(ValueError):
+        # A row index is missing
+        MetricValue.merge(shards, [[0, 2, 4], [1, 5]])
+
+
+def test_merge_pairwise():
+    shards = [
+        MetricValue(metric_name='pairwise_comparison',
+                    prompts=None,
+                    generated_outputs=(['a1'], ['b1']),
+                    reference_outputs=None,
+                    sources=(['s1'], None),
+                    explanations=['x'],
+                    metric_values=[0.0],
+                    language='en'),
+        MetricValue(metric_name='pairwise_comparison',
+                    prompts=None,
+                    generated_outputs=(['a0'], ['b0']),
+                    reference_outputs=None,
+                    sources=(['s0'], None),
+                    explanations=None,
+                    metric_values=[None],
+                    language='en')
+    ]
+    merged = MetricValue.merge(shards, [[1], [0]])
+    assert merged.is_pairwise
+    assert merged.generated_outputs == (['a0', 'a1'], ['b0', 'b1'])
+    assert merged.sources == (['s0', 's1'], None)
+    assert merged.explanations == [None, 'x']
+    assert merged.metric_values == [None, 0.0]
+    assert merged.none_mask.tolist() == [True, False]
@@ -0,0 +1,42 @@
+import pytest
+
+from langcheck.metrics import readability
+from langcheck.metrics.de import flesch_reading_ease as de_flesch_reading_ease
+from langcheck.metrics.en import flesch_kincaid_grade, flesch_reading_ease
+
+################################################################################
+# Tests
+################################################################################
+
+
+@pytest.mark.parametrize(
+    'generated_outputs',
+    [
+        'My Friend. Welcome to the Carpathians. I am anxiously expecting you.',
+        [
+            'How slowly the time passes here, encompassed as I am by frost and snow!',  # NOQA: E501
+            'Yet a second step is taken towards my enterprise.'
+        ]
+    ])
+def test_readability(generated_outputs):
+    metric_values = readability(generated_outputs, languages=['en', 'de'])
+    assert [(metric_value.metric_name, metric_value.language)
+            for metric_value in metric_values
+           ] == [('flesch_reading_ease', 'en'), ('flesch_kincaid_grade', 'en'),
+                 ('flesch_reading_ease', 'de')]
+    expected = [
+        flesch_reading_ease(generated_outputs),
+        flesch_kincaid_grade(generated_outputs),
+        de_flesch_reading_ease(generated_outputs)
+    ]
+    for metric_value, expected_value in zip(metric_values, expected):
+        assert metric_value.metric_values == expected_value.metric_values
+
+
+def test_readability_invalid_arguments():
+    with pytest.raises(ValueError):
+        readability('Hello.', languages='xx')
+    with pytest.raises(ValueError):
+        readability('Hello.',
+                    languages='de',
+                    metric_names=['flesch_kincaid_grade'])
@@ -1,6 +1,9 @@
+import inspect
+
 import pytest
 
-from langcheck.metrics import exact_match
+from langcheck.metrics import (exact_match, rouge, rouge1, rouge2, rouge_corpus,
+                               rougeL)
 
 ################################################################################
 # Tests
@@ -23,3 +26,79 @@ def test_exact_match(generated_outputs, reference_outputs):
 def test_not_exact_match(generated_outputs, reference_outputs):
     metric_value = exact_match(generated_outputs, reference_outputs)
     assert metric_value == 0
+
+
+def test_rouge():
+    generated_outputs = [
+        'The cat sat on the mat.', 'Dogs are barking.\nThe end.', 'Hello', ''
+    ]
+    reference_outputs = [
+        'The cat is on the mat.', 'The dog barked.', 'Goodbye', 'Nothing'
+    ]
+    metric_values = rouge(generated_outputs,
+                          reference_outputs,
+                          rouge_types=['rougeL', 'rouge2', 'rouge1'])
+    expected = [
+        rougeL(generated_outputs, reference_outputs),
+        rouge2(generated_outputs, reference_outputs),
+        rouge1(generated_outputs, reference_outputs)
+    ]
+    for metric_value, expected_value in zip(metric_values, expected):
+        assert metric_value.metric_name == expected_value.metric_name
+        assert metric_value.metric_values == expected_value.metric_values
+        assert metric_value.language == 'en'
+
+    with pytest.raises(ValueError):
+        rouge(generated_outputs, reference_outputs, rouge_types=['rougeLsum'])
+
+
+def test_rouge_corpus():
+    generated_outputs = [
+        'The cat sat on the mat.', 'Dogs are barking.\nThe end.', 'Hello',
+        'The quick brown fox jumps over the lazy dog', ''
+    ]
+    reference_outputs = [
+        'The cat is on the mat.', 'The dog barked.', 'Goodbye',
+        'The quick brown dog jumps on the log.', 'Nothing'
+    ]
+    results = [
+        rouge_corpus(generated_outputs,
+                     reference_outputs,
+                     rouge_types=['rouge1', 'rougeL'],
+                     num_workers=num_workers,
+                     chunk_size=2,
+                     num_bootstrap=200) for num_workers in [1, 2]
+    ]
+    # The bootstrap does not depend on the number of workers
+    assert results[0][1] == results[1][1]
+
+    metric_values, aggregates = results[1]
+    expected = [
+        rouge1(generated_outputs, reference_outputs),
+        rougeL(generated_outputs, reference_outputs)
+    ]
+    for metric_value, expected_value in zip(metric_values, expected):
+        assert metric_value.metric_name == expected_value.metric_name
+        assert metric_value.metric_values == expected_value.metric_values
+        aggregate = aggregates[metric_value.metric_name]
+        assert aggregate.num_pairs == 5
+        assert aggregate.mean == pytest.approx(
+            sum(metric_value.metric_values) / 5)
+        assert 0 <= aggregate.low <= aggregate.mean <= aggregate.high <= 1
+
+
+def test_rouge_corpus_parallel_metric():
+    generated_outputs = ['The cat sat on the mat.', 'Hello', 'A b c d']
+    reference_outputs = ['The cat is on the mat.', 'Hello there', 'A b d']
+    assert rouge1(generated_outputs, reference_outputs,
+                  num_workers=2).metric_values == rouge1(
+                      generated_outputs, reference_outputs).metric_values
+
+
+@pytest.mark.parametrize('language', ['en', 'de', 'ja', 'zh'])
+def test_rouge_num_workers_is_keyword_only(language):
+    module = pytest.importorskip(
+        f'langcheck.metrics.{language}.reference_based_text_quality')
+    for metric in [module.rouge1, module.rouge2, module.rougeL]:
+        parameter = inspect.signature(metric).parameters['num_workers']
+        assert parameter.kind == inspect.Parameter.KEYWORD_ONLY
@@ -0,0 +1,56 @@
+import math
+
+import pytest
+from rouge_score import rouge_scorer
+from rouge_score.tokenizers import Tokenizer
+
+from langcheck.metrics._rouge import RougeEngine, rouge_corpus_f1_scores
+
+################################################################################
+# Tests
+################################################################################
+
+_TARGETS = [
+    'The quick brown fox jumps over the lazy dog',
+    'Cats are running.\nDogs are barking happily!\n\nThe end', '', 'a b c',
+    'The quick brown fox jumps over the lazy dog'
+]
+_PREDICTIONS = [
+    'The quick brown dog jumps on the log.',
+    'Dogs barked happily.\nThe cats ran, and ran.', 'Something', '',
+    'the lazy dog\nthe fox jumps over'
+]
+_ROUGE_TYPES = ['rouge1', 'rouge2', 'rouge3', 'rougeL', 'rougeLsum']
+
+
+class WhitespaceTokenizer(Tokenizer):
+
+    def tokenize(self, text):
+        return text.split(' ')
+
+
+@pytest.mark.parametrize('tokenizer', [None, WhitespaceTokenizer()])
+def test_rouge_engine(tokenizer):
+    scores = RougeEngine(tokenizer).score(_TARGETS, _PREDICTIONS, _ROUGE_TYPES)
+    for rouge_type in _ROUGE_TYPES:
+        scorer = rouge_scorer.RougeScorer([rouge_type],
+                                          use_stemmer=True,
+                                          tokenizer=tokenizer)
+        assert scores[rouge_type] == [
+            scorer.score(target, prediction)[rouge_type]
+            for target, prediction in zip(_TARGETS, _PREDICTIONS)
+        ]
+
+
+def test_rouge_engine_invalid_rouge_type():
+    with pytest.raises(ValueError):
+        RougeEngine().score(['a'], ['a'], ['rouge0'])
+
+
+def test_rouge_corpus_f1_scores_empty():
+    f1_values, aggregates = rouge_corpus_f1_scores([], [], ['rouge1', 'rougeL'])
+    assert f1_values == {'rouge1': [], 'rougeL': []}
+    for aggregate in aggregates.values():
+        assert aggregate.num_pairs == 0
+        assert math.isnan(aggregate.mean)
+        assert math.isnan(aggregate.low) and math.isnan(aggregate.high)
@@ -0,0 +1,48 @@
+import random
+
+import pytest
+
+from langcheck.metrics._string_matcher import (
+    _MAX_STRINGS_FOR_SUBSTRING_SEARCH, StringMatcher, compile_string_matcher)
+
+################################################################################
+# Tests
+################################################################################
+
+
+# The small sets of strings are searched for with `in`, and the large ones with
+# the automaton
+@pytest.mark.parametrize('num_strings',
+                         [8, _MAX_STRINGS_FOR_SUBSTRING_SEARCH + 1])
+@pytest.mark.parametrize('case_sensitive', [True, False])
+def test_string_matcher_matches_substring_search(num_strings, case_sensitive):
+    rng = random.Random(0)
+    alphabet = 'abAB '
+    for _ in range(200):
+        strings = [
+            ''.join(rng.choices(alphabet, k=rng.randint(0, 4)))
+            for _ in range(num_strings)
+        ]
+        text = ''.join(rng.choices(alphabet, k=rng.randint(0, 30)))
+        matcher = StringMatcher(tuple(strings), case_sensitive)
+        if case_sensitive:
+            expected = {i for i, s in enumerate(strings) if s in text}
+        else:
+            expected = {
+                i for i, s in enumerate(strings) if s.lower() in text.lower()
+            }
+        assert matcher.find(text) == expected
+
+
+def test_string_matcher_overlapping_strings():
+    strings = ('he', 'she', 'his', 'hers', 'xyz')
+    for padding in [(), ('_',) * _MAX_STRINGS_FOR_SUBSTRING_SEARCH]:
+        matcher = StringMatcher(strings + padding)
+        assert matcher.find('ushers') == {0, 1, 3}
+        assert matcher.find('') == set()
+
+
+def test_compile_string_matcher_is_cached():
+    matcher = compile_string_matcher(('foo', 'bar'), False)
+    assert compile_string_matcher(('foo', 'bar'), False) is matcher
+    assert compile_string_matcher(('foo', 'bar'), True) is not matcher
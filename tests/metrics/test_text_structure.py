@@ -1,10 +1,14 @@
 import json
+import time
+from unittest.mock import patch
 
 import pytest
 
 from langcheck.metrics import (contains_all_strings, contains_any_strings,
                                contains_regex, is_float, is_int, is_json_array,
-                               is_json_object, matches_regex, validation_fn)
+                               is_json_object, matches_json_schema,
+                               matches_regex, validation_fn)
+from langcheck.metrics._validation_workers import run_validation_fn
 from tests.utils import is_close, lists_are_equal
 
 ################################################################################
@@ -114,6 +118,40 @@ def test_is_json_object(generated_outputs, metric_values):
     assert is_close(metric_value.metric_values, metric_values)
 
 
+@pytest.mark.parametrize('generated_outputs,metric_values,explanations', [
+    ('{"name": "pen", "price": 1}', [1], [None]),
+    ([
+        '{"name": "pen", "price": 1}', '{"name": "pen", "price": "ten"}',
+        '{"price": 1}'
+    ], [1, 0, 0], [
+        None, '$.price: "ten" is not of type number',
+        '$: "name" is a required property'
+    ]),
+    ('pen', [0], ["Invalid JSON: Expecting value: line 1 column 1 (char 0)"]),
+])
+def test_matches_json_schema(generated_outputs, metric_values, explanations):
+    schema = {
+        'type': 'object',
+        'properties': {
+            'name': {
+                'type': 'string'
+            },
+            'price': {
+                'type': 'number'
+            }
+        },
+        'required': ['name', 'price']
+    }
+    metric_value = matches_json_schema(generated_outputs, schema)
+    assert metric_value.metric_name == 'matches_json_schema'
+    assert metric_value.prompts is None
+    assert metric_value.generated_outputs is not None
+    assert isinstance(metric_value.generated_outputs, list)
+    assert lists_are_equal(generated_outputs, metric_value.generated_outputs)
+    assert is_close(metric_value.metric_values, metric_values)
+    assert metric_value.explanations == explanations
+
+
 @pytest.mark.parametrize(
     'generated_outputs,regex,metric_values',
     [
@@ -274,6 +312,21 @@ def test_contains_any_strings(generated_outputs, strings, case_sensitive,
     assert is_close(metric_value.metric_values, metric_values)
 
 
+def test_contains_strings_explanations():
+    generated_outputs = ['As an AI language model, ...', 'Hello']
+    strings = ['language model', 'ai', 'foo']
+    metric_value = contains_all_strings(generated_outputs, strings)
+    assert metric_value.metric_values == [0, 0]
+    assert metric_value.explanations == [
+        'Matched strings: ["language model", "ai"]', 'Matched strings: []'
+    ]
+    metric_value = contains_any_strings(generated_outputs, strings)
+    assert metric_value.metric_values == [1, 0]
+    assert metric_value.explanations == [
+        'Matched strings: ["language model", "ai"]', 'Matched strings: []'
+    ]
+
+
 @pytest.mark.parametrize('generated_outputs,valid_fn,metric_values', [
     ('2', lambda x: int(x) % 2 == 0, [1]),
     (['2', '4', '9', '11'], lambda x: int(x) % 2 == 0, [1, 1, 0, 0]),
@@ -290,3 +343,54 @@ def test_validation_fn(generated_outputs, valid_fn, metric_values):
     assert isinstance(metric_value.generated_outputs, list)
     assert lists_are_equal(generated_outputs, metric_value.generated_outputs)
     assert is_close(metric_value.metric_values, metric_values)
+
+
+def _is_even_or_sleep(output):
+    if output == 'slow':
+        time.sleep(10)
+    return int(output) % 2 == 0
+
+
+@pytest.mark.parametrize('executor', [None, 'thread', 'process'])
+def test_validation_fn_executor(executor):
+    generated_outputs = ['2', '4', '9', '11', 'lorem ipsum']
+    metric_value = validation_fn(generated_outputs,
+                                 _is_even_or_sleep,
+                                 executor=executor,
+                                 max_workers=2)
+    assert metric_value.metric_values == [1, 1, 0, 0, 0]
+    assert metric_value.timed_out is None
+    if executor is None:
+        # The latencies are only measured by the executors
+        assert metric_value.latencies is None
+        assert 'latency' not in metric_value.to_df()
+    else:
+        assert metric_value.latencies is not None
+        for latency in metric_value.latencies:
+            assert latency is not None
+            assert latency >= 0
+
+
+@pytest.mark.parametrize('executor', ['thread', 'process'])
+def test_validation_fn_timeout(executor):
+    generated_outputs = ['2', 'slow', '9', 'slow', '4']
+    start_time = time.monotonic()
+    metric_value = validation_fn(generated_outputs,
+                                 _is_even_or_sleep,
+                                 executor=executor,
+                                 max_workers=2,
+                                 timeout=0.5)
+    assert time.monotonic() - start_time < 5
+    assert metric_value.metric_values == [1, None, 0, None, 1]
+    assert metric_value.timed_out == [False, True, False, True, False]
+    assert metric_value.latencies is not None
+    assert [latency is None for latency in metric_value.latencies
+           ] == metric_value.timed_out
+
+
+@pytest.mark.parametrize('executor', ['thread', 'process'])
+def test_run_validation_fn_empty(executor):
+    # No workers are started if there is nothing to validate
+    with patch('langcheck.metrics._validation_workers._Worker') as worker:
+        assert run_validation_fn([], _is_even_or_sleep, executor) == []
+    worker.assert_not_called()
@@ -0,0 +1,88 @@
+import contextvars
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import langcheck
+from langcheck.metrics.scorer._base import BaseSingleScorer
+from langcheck.profiling import profile_stage, profiled
+
+
+class LengthScorer(BaseSingleScorer[str, List[str]]):
+
+    def _tokenize(self, inputs):
+        return inputs
+
+    def _slice_tokens(self, tokens, start_idx, end_idx):
+        return tokens[start_idx:end_idx]
+
+    def _score_tokens(self, tokens):
+        return [float(len(token)) for token in tokens]
+
+
+@profiled(input_size=lambda texts: len(texts))
+def _count_characters(texts):
+    return sum(len(text) for text in texts)
+
+
+def test_profile_scorer_stages():
+    scorer = LengthScorer()
+    with langcheck.profile() as prof:
+        assert scorer.score(['a'] * 20) == [1.0] * 20
+    df = prof.to_df()
+    stages = df.set_index('stage')
+    assert stages.loc['LengthScorer._tokenize', 'calls'] == 1
+    assert stages.loc['LengthScorer._tokenize', 'input_size'] == 20
+    # The inputs are scored in batches of 8
+    assert stages.loc['LengthScorer._score_tokens', 'calls'] == 3
+    assert stages.loc['LengthScorer._score_tokens', 'input_size'] == 20
+    assert list(df['total_time']) == sorted(df['total_time'], reverse=True)
+    assert 'LengthScorer._score_tokens' in str(prof)
+
+
+def test_profile_nested_and_threads():
+    with langcheck.profile() as outer:
+        with langcheck.profile() as inner:
+            _count_characters(['ab', 'c'])
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [
+                executor.submit(contextvars.copy_context().run,
+                                _count_characters, ['abc']) for _ in range(4)
+            ]
+            assert [future.result() for future in futures] == [3] * 4
+    assert [timing.input_size for timing in inner.timings] == [2]
+    assert len(outer.timings) == 5
+    assert all(timing.name == '_count_characters' for timing in outer.timings)
+
+
+def test_profile_chrome_trace():
+    with langcheck.profile() as prof:
+        with profile_stage('outer', 3):
+            with profile_stage('inner'):
+                pass
+    trace = prof.to_chrome_trace()
+    events = {event['name']: event for event in trace['traceEvents']}
+    assert events['outer']['ph'] == 'X'
+    assert events['outer']['args'] == {'input_size': 3}
+    assert 'args' not in events['inner']
+    assert events['outer']['ts'] <= events['inner']['ts']
+    assert (events['inner']['ts'] + events['inner']['dur']
+            <= events['outer']['ts'] + events['outer']['dur'])
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, 'trace.json')
+        prof.save_chrome_trace(path)
+        with open(path) as f:
+            assert json.load(f) == trace
+
+
+def test_no_profile():
+    with profile_stage('stage'):
+        pass
+    assert _count_characters(['ab']) == 2
+    with langcheck.profile() as prof:
+        pass
+    assert prof.timings == []
+    assert len(prof.to_df()) == 0
@@ -1,6 +1,6 @@
 import pytest
 
-from langcheck.stats import compute_stats
+from langcheck.stats import compute_stats, compute_stats_batch
 
 ################################################################################
 # Tests
@@ -29,3 +29,14 @@ def test_compute_stats(input_text, num_sentences, num_words, num_syllables):
     assert (stats.num_sentences == num_sentences)
     assert (stats.num_words == num_words)
     assert (stats.num_syllables == num_syllables)
+
+
+def test_compute_stats_batch():
+    input_texts = [
+        'My Friend. Welcome to the Carpathians. I am anxiously expecting you.',
+        'How slowly the time passes here!', 'My Friend. Welcome.'
+    ]
+    assert compute_stats_batch(input_texts) == [
+        compute_stats(input_text) for input_text in input_texts
+    ]
+    assert compute_stats_batch([]) == []
@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+import json
 import math
-from typing import Iterable, List
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Iterable, List
 
 from langcheck.metrics.eval_clients import EvalClient
 
@@ -46,6 +50,133 @@ class MockEvalClient(EvalClient):
         return eval_results
 
 
+class MockOpenAIServer:
+    '''A local server implementing the chat completions endpoint of the OpenAI
+    API, so that the OpenAI-compatible clients can be tested (and load-tested)
+    without a network. Every request is answered with ``assessment`` after
+    ``delay`` seconds (or ``delay(prompt)`` seconds if it is a function), as a
+    tool call, a function call or a plain message depending on the request.
+    Connections are kept alive, and the server counts the connections opened
+    and the maximum number of requests in flight.
+
+    Example:
+        >>> with MockOpenAIServer(assessment='Good') as server:
+        ...     client = OpenAICompatibleEvalClient(server.base_url, 'mock')
+    '''
+
+    def __init__(self,
+                 assessment: str = 'Good',
+                 delay: float | Callable[[str], float] = 0.0) -> None:
+        self.assessment = assessment
+        self.delay = delay
+        self.num_requests = 0
+        self.num_connections = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0),
+                                           self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/v1'
+
+    def __enter__(self) -> MockOpenAIServer:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _response(self, request: dict[str, Any]) -> dict[str, Any]:
+        message: dict[str, Any] = {'role': 'assistant', 'content': None}
+        arguments = json.dumps({'assessment': self.assessment})
+        if 'tools' in request:
+            message['tool_calls'] = [{
+                'id': 'call_0',
+                'type': 'function',
+                'function': {
+                    'name': request['tools'][0]['function']['name'],
+                    'arguments': arguments
+                }
+            }]
+        elif 'functions' in request:
+            message['function_call'] = {
+                'name': request['functions'][0]['name'],
+                'arguments': arguments
+            }
+        else:
+            message['content'] = f'The assessment is {self.assessment}.'
+        prompt_tokens = sum(
+            len((m.get('content') or '').split()) for m in request['messages'])
+        return {
+            'id': 'chatcmpl-mock',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'mock'),
+            'choices': [{
+                'index': 0,
+                'message': message,
+                'finish_reason': 'stop'
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': 8,
+                'total_tokens': prompt_tokens + 8
+            }
+        }
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        mock_server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # HTTP/1.1 keeps the connections alive between requests
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def setup(self) -> None:
+                super().setup()
+                with mock_server._lock:
+                    mock_server.num_connections += 1
+
+            def do_POST(self) -> None:
+                with mock_server._lock:
+                    mock_server.num_requests += 1
+                    mock_server._in_flight += 1
+                    mock_server.max_in_flight = max(mock_server.max_in_flight,
+                                                    mock_server._in_flight)
+                try:
+                    length = int(self.headers.get('Content-Length', 0))
+                    request = json.loads(self.rfile.read(length))
+                    delay = mock_server.delay
+                    if callable(delay):
+                        delay = delay(request['messages'][-1]['content'])
+                    time.sleep(delay)
+                    if self.path.endswith('/chat/completions'):
+                        status, response = 200, mock_server._response(request)
+                    else:
+                        status, response = 404, {'error': {'message': 'N/A'}}
+                    body = json.dumps(response).encode()
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with mock_server._lock:
+                        mock_server._in_flight -= 1
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        return Handler
+
+
 ################################################################################
 # Utility functions
 ################################################################################
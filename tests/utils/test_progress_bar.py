@@ -0,0 +1,63 @@
+from unittest.mock import patch
+
+import pytest
+
+from langcheck.utils import (add_progress_callback, remove_progress_callback,
+                             set_progress_bar_enabled)
+from langcheck.utils.progress_bar import progress_bar, tqdm_wrapper
+
+
+@pytest.fixture
+def progress_bar_disabled():
+    set_progress_bar_enabled(False)
+    yield
+    set_progress_bar_enabled(True)
+
+
+def test_tqdm_wrapper_does_not_consume_iterators():
+    items = iter([1, 2, 3])
+    assert list(tqdm_wrapper(items)) == [1, 2, 3]
+    assert list(tqdm_wrapper(zip('abc', 'def'))) == [('a', 'd'), ('b', 'e'),
+                                                     ('c', 'f')]
+
+
+def test_tqdm_wrapper_disabled(progress_bar_disabled):
+    items = [1, 2, 3]
+    with patch('langcheck.utils.progress_bar.tqdm') as mock_tqdm:
+        assert tqdm_wrapper(items) is items
+        progress = progress_bar(total=3)
+        progress.update(3)
+        progress.close()
+    mock_tqdm.assert_not_called()
+
+
+def test_progress_callback(progress_bar_disabled):
+    updates = []
+    add_progress_callback(updates.append, min_interval=0)
+    try:
+        generator = (i for i in range(3))
+        assert list(tqdm_wrapper(generator, desc='Counting')) == [0, 1, 2]
+    finally:
+        remove_progress_callback(updates.append)
+
+    assert [(update.completed, update.finished) for update in updates
+           ] == [(0, False), (1, False), (2, False), (3, False), (3, True)]
+    assert all(update.desc == 'Counting' for update in updates)
+    assert all(update.total is None for update in updates)
+
+    # The callback is no longer called once removed
+    list(tqdm_wrapper([1, 2, 3]))
+    assert len(updates) == 5
+
+
+def test_progress_callback_min_interval(progress_bar_disabled):
+    updates = []
+    add_progress_callback(updates.append, min_interval=60)
+    try:
+        list(tqdm_wrapper(range(100)))
+    finally:
+        remove_progress_callback(updates.append)
+    # Only the start and the end are reported
+    assert [
+        (update.completed, update.total, update.finished) for update in updates
+    ] == [(0, 100, False), (100, 100, True)]